@@ -0,0 +1,119 @@
+"""
+Endpoints administrativos (diagnóstico do serviço)
+
+Protegidos pelo header X-Admin-Token, comparado com a variável de
+ambiente ADMIN_TOKEN. Sem ADMIN_TOKEN definido, ficam desabilitados.
+"""
+
+import os
+from typing import Literal
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
+
+from app.profiling import registro_perfis, token_admin_valido
+from app.query_stats import estatisticas_consultas
+from app.timing import RotaMedida
+from app.tracing import rastreador
+
+
+def verificar_admin(x_admin_token: str | None = Header(None)):
+    """Dependência: exige o token administrativo"""
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token:
+        raise HTTPException(
+            status_code=403, detail="Acesso administrativo desabilitado"
+        )
+    if not token_admin_valido(x_admin_token):
+        raise HTTPException(status_code=403, detail="Token inválido")
+
+
+router = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(verificar_admin)],
+    route_class=RotaMedida,
+)
+
+
+@router.get("/queries")
+def query_stats():
+    """Tempo, linhas e percentis por consulta (normalizada)"""
+    return {"consultas": estatisticas_consultas.resumo()}
+
+
+@router.get("/queries/slow")
+def slow_queries():
+    """Consultas lentas recentes, com EXPLAIN QUERY PLAN"""
+    return {"lentas": estatisticas_consultas.lentas()}
+
+
+@router.delete("/queries")
+def reset_query_stats():
+    """Zera as estatísticas e o log em memória"""
+    estatisticas_consultas.limpar()
+    return {"mensagem": "Estatísticas zeradas"}
+
+
+@router.get("/profiles")
+def listar_perfis():
+    """Perfis de requisições guardados (app/profiling.py)"""
+    return {"perfis": registro_perfis.listar()}
+
+
+@router.get("/profiles/{perfil_id}")
+def baixar_perfil(
+    perfil_id: str,
+    formato: Literal["texto", "pstats", "collapsed"] | None = None,
+):
+    """Baixa um perfil (texto/pstats para cProfile, collapsed p/ amostragem)"""
+    perfil = registro_perfis.obter(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    try:
+        conteudo, media_type, extensao = perfil.exportar(formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(
+        content=conteudo,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{perfil_id}.{extensao}"'
+            )
+        },
+    )
+
+
+@router.delete("/profiles")
+def limpar_perfis():
+    """Descarta os perfis guardados"""
+    registro_perfis.limpar()
+    return {"mensagem": "Perfis descartados"}
+
+
+@router.get("/traces")
+def listar_traces(limite: int = Query(50, ge=1, le=1000)):
+    """Traces mais recentes do buffer em memória (app/tracing.py)"""
+    return {"ativo": rastreador.ativo, "traces": rastreador.traces(limite)}
+
+
+@router.get("/traces/{trace_id}")
+def obter_trace(trace_id: str):
+    """Spans de um trace, em ordem de início"""
+    spans = rastreador.trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace não encontrado")
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@router.delete("/traces")
+def limpar_traces():
+    """Descarta os spans em memória (o arquivo TRACE_FILE é mantido)"""
+    rastreador.limpar()
+    return {"mensagem": "Traces descartados"}
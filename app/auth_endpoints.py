@@ -0,0 +1,28 @@
+"""
+Endpoints de sessão (token emitido por /auth/login-secure)
+
+Autorizados pelo header Authorization: Bearer <token>, validado pelo
+cache de sessões (app/sessions.py) sem consultar o banco.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.sessions import cache_sessoes, sessao_atual, token_do_header
+from app.timing import RotaMedida
+
+router = APIRouter(prefix="/auth", route_class=RotaMedida)
+
+
+@router.get("/me")
+def me(sessao=Depends(sessao_atual)):
+    """Usuário da sessão atual"""
+    return {"usuario": sessao.como_dict()}
+
+
+@router.post("/logout")
+def logout(
+    token: str = Depends(token_do_header), sessao=Depends(sessao_atual)
+):
+    """Encerra a sessão: o token deixa de ser aceito"""
+    cache_sessoes.revogar(token, sessao)
+    return {"mensagem": "Sessão encerrada"}
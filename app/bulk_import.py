@@ -0,0 +1,242 @@
+"""
+Importação em massa de produtos a partir de um corpo NDJSON/CSV em stream
+
+O corpo é lido em pedaços (request.stream()) e quebrado em registros
+conforme chega: nada além do lote atual fica em memória (uma linha ou
+registro CSV maior que MAX_REGISTRO é descartado e vira erro da linha).
+Cada lote de TAMANHO_LOTE linhas válidas é gravado com executemany em
+sua própria transação, em uma thread, enquanto o próximo lote é lido e
+validado.
+
+Linhas inválidas não interrompem a importação: são contadas e
+devolvidas (até MAX_ERROS) com o número do registro e o motivo.
+"""
+
+import asyncio
+import csv
+import json
+import math
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from app import database
+
+# Linhas por executemany/transação
+TAMANHO_LOTE = 10_000
+
+# Erros devolvidos na resposta (os demais são apenas contados)
+MAX_ERROS = 1000
+
+# Tamanho máximo (bytes) de uma linha NDJSON ou registro CSV
+MAX_REGISTRO = 1024 * 1024
+
+COLUNAS = ("name", "description", "price", "stock", "category")
+
+INSERT_PRODUTOS = (
+    "INSERT INTO products (name, description, price, stock, category) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def validar_produto(dados):
+    """Tupla pronta para o INSERT; ValueError com o motivo se inválido"""
+    if not isinstance(dados, dict):
+        raise ValueError("registro deve ser um objeto")
+
+    name = dados.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("name é obrigatório")
+
+    try:
+        price = float(dados.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError("price deve ser numérico")
+    if not math.isfinite(price):
+        raise ValueError("price deve ser um número finito")
+    if price < 0:
+        raise ValueError("price não pode ser negativo")
+
+    stock = dados.get("stock")
+    try:
+        stock = int(stock) if stock not in (None, "") else 0
+    except (TypeError, ValueError):
+        raise ValueError("stock deve ser inteiro")
+    if stock < 0:
+        raise ValueError("stock não pode ser negativo")
+
+    description = dados.get("description") or None
+    category = dados.get("category") or None
+    for campo, valor in (("description", description), ("category", category)):
+        if valor is not None and not isinstance(valor, str):
+            raise ValueError(f"{campo} deve ser texto")
+
+    return (name.strip(), description, price, stock, category)
+
+
+async def linhas(corpo):
+    """
+    Linhas (bytes, sem o \\n) de um iterador assíncrono de pedaços
+
+    Uma linha maior que MAX_REGISTRO é descartada enquanto chega e gera
+    None no lugar dela.
+    """
+    partes = []
+    tamanho = 0
+    longa = False
+    async for pedaco in corpo:
+        inicio = 0
+        while True:
+            fim = pedaco.find(b"\n", inicio)
+            trecho = pedaco[inicio:] if fim < 0 else pedaco[inicio:fim]
+            if not longa:
+                tamanho += len(trecho)
+                if tamanho > MAX_REGISTRO:
+                    longa, partes = True, []
+                else:
+                    partes.append(trecho)
+            if fim < 0:
+                break
+            yield None if longa else b"".join(partes)
+            partes, tamanho, longa = [], 0, False
+            inicio = fim + 1
+    if longa:
+        yield None
+    elif tamanho:
+        yield b"".join(partes)
+
+
+def _erro_tamanho():
+    return f"registro maior que {MAX_REGISTRO} bytes"
+
+
+async def registros_ndjson(corpo):
+    """Gera (número, dados, erro) para cada linha não vazia"""
+    numero = 0
+    async for linha in linhas(corpo):
+        if linha is None:
+            numero += 1
+            yield numero, None, _erro_tamanho()
+            continue
+        if not linha.strip():
+            continue
+        numero += 1
+        try:
+            yield numero, json.loads(linha), None
+        except ValueError as erro:
+            yield numero, None, f"JSON inválido: {erro}"
+
+
+async def registros_csv(corpo):
+    """
+    Gera (número, dados, erro) para cada registro do CSV (com cabeçalho)
+
+    Um campo entre aspas pode conter quebras de linha: linhas são
+    acumuladas até o número de aspas do registro ficar par. Um registro
+    que passa de MAX_REGISTRO (ex.: aspas nunca fechadas) é descartado e
+    a leitura recomeça na linha seguinte.
+    """
+    cabecalho = None
+    numero = 0
+    partes = []
+    tamanho = 0
+    aspas = 0
+    async for linha in linhas(corpo):
+        if linha is not None:
+            tamanho += len(linha) + 1
+        if linha is None or tamanho > MAX_REGISTRO:
+            partes, tamanho, aspas = [], 0, 0
+            numero += 1
+            yield numero, None, _erro_tamanho()
+            continue
+        partes.append(linha)
+        aspas += linha.count(b'"')
+        if aspas % 2:
+            continue
+        registro = b"\n".join(partes).decode("utf-8", "replace")
+        partes, tamanho, aspas = [], 0, 0
+        if not registro.strip():
+            continue
+
+        campos = next(csv.reader([registro.rstrip("\r")]))
+        if cabecalho is None:
+            cabecalho = [campo.strip() for campo in campos]
+            continue
+        numero += 1
+        if len(campos) != len(cabecalho):
+            yield numero, None, (
+                f"esperados {len(cabecalho)} campos, recebidos {len(campos)}"
+            )
+            continue
+        yield numero, dict(zip(cabecalho, campos)), None
+
+    if partes:
+        numero += 1
+        yield numero, None, "aspas não fechadas no fim do arquivo"
+
+
+def _gravar_lote(conn, lote):
+    with conn:
+        conn.executemany(INSERT_PRODUTOS, lote)
+    database.registrar_escrita()
+    return len(lote)
+
+
+async def importar_produtos(corpo, formato):
+    """Importa os produtos do corpo; devolve contagens e erros por linha"""
+    inicio = time.perf_counter()
+    registros = registros_csv if formato == "csv" else registros_ndjson
+    resultado = {
+        "formato": formato,
+        "recebidas": 0,
+        "inseridas": 0,
+        "lotes": 0,
+        "total_erros": 0,
+        "erros": [],
+    }
+
+    conn = await run_in_threadpool(
+        database.get_db_connection, check_same_thread=False
+    )
+    gravando = None
+    lote = []
+    try:
+        async for numero, dados, erro in registros(corpo):
+            resultado["recebidas"] += 1
+            if erro is None:
+                try:
+                    lote.append(validar_produto(dados))
+                except ValueError as invalido:
+                    erro = str(invalido)
+            if erro is not None:
+                resultado["total_erros"] += 1
+                if len(resultado["erros"]) < MAX_ERROS:
+                    resultado["erros"].append({"linha": numero, "erro": erro})
+                continue
+
+            if len(lote) >= TAMANHO_LOTE:
+                # no máximo um lote gravando enquanto o próximo é lido
+                if gravando is not None:
+                    resultado["inseridas"] += await gravando
+                    resultado["lotes"] += 1
+                gravando = asyncio.ensure_future(
+                    run_in_threadpool(_gravar_lote, conn, lote)
+                )
+                lote = []
+
+        if gravando is not None:
+            resultado["inseridas"] += await gravando
+            resultado["lotes"] += 1
+            gravando = None
+        if lote:
+            resultado["inseridas"] += await run_in_threadpool(
+                _gravar_lote, conn, lote
+            )
+            resultado["lotes"] += 1
+    finally:
+        if gravando is not None:
+            await asyncio.gather(gravando, return_exceptions=True)
+        await run_in_threadpool(conn.close)
+
+    resultado["tempo"] = round(time.perf_counter() - inicio, 3)
+    return resultado
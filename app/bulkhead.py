@@ -0,0 +1,185 @@
+"""
+Bulkhead: isolamento das rotas de demonstração vulneráveis
+
+As rotas *-vulnerable recebem tráfego constante de scanners. Para que
+esse tráfego não afete as rotas seguras, elas rodam em um compartimento
+próprio:
+
+- executor de threads dedicado (não usa o threadpool padrão do FastAPI)
+- limite de requisições em andamento: acima dele, 503 imediato
+- pool próprio de conexões somente leitura (mode=ro)
+- opcionalmente, uma cópia separada do banco (DEMO_DB_COPY=caminho)
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from app import database, timing
+from app.query_stats import ConexaoInstrumentada
+
+
+class ConexaoDoPool(ConexaoInstrumentada):
+    """Conexão somente leitura cujo close() devolve ao pool"""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        for cursor in list(self._cursores):
+            cursor._finalizar()
+        self.set_progress_handler(None, 0)
+        self.pool.devolver(self)
+
+    def fechar_de_verdade(self):
+        self.pool = None
+        super().close()
+
+
+class PoolSomenteLeitura:
+    """Pool de conexões read-only, reutilizadas pelas threads do bulkhead"""
+
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._db_path = None
+
+    def obter(self, db_path, orcamento=None):
+        with self._lock:
+            if db_path != self._db_path:
+                self._esvaziar()
+                self._db_path = db_path
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            with timing.medir("db_connect"):
+                conn = sqlite3.connect(
+                    f"file:{db_path}?mode=ro",
+                    uri=True,
+                    check_same_thread=False,
+                    factory=ConexaoDoPool,
+                )
+            conn.row_factory = sqlite3.Row
+            conn.db_path = db_path
+        conn.pool = self
+        if orcamento is not None:
+            orcamento.aplicar(conn)
+        return conn
+
+    def devolver(self, conn):
+        if conn.db_path == self._db_path and self._livres.qsize() < (
+            self.tamanho
+        ):
+            self._livres.put(conn)
+        else:
+            conn.fechar_de_verdade()
+
+    def _esvaziar(self):
+        while True:
+            try:
+                self._livres.get_nowait().fechar_de_verdade()
+            except queue.Empty:
+                return
+
+
+class Bulkhead:
+    """Executor, limite de concorrência e pool de conexões isolados"""
+
+    def __init__(self, nome, max_workers, max_fila, copia_banco=None):
+        self.nome = nome
+        self.max_workers = max_workers
+        self.max_em_andamento = max_workers + max_fila
+        self.copia_banco = copia_banco
+        self.rejeitadas = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix=nome
+        )
+        self._vagas = threading.BoundedSemaphore(self.max_em_andamento)
+        self._em_andamento = 0
+        self._lock = threading.Lock()
+        self._copia_feita = False
+        self._pool = PoolSomenteLeitura(max_workers)
+
+    @property
+    def em_andamento(self):
+        return self._em_andamento
+
+    def conexao(self, orcamento=None):
+        """Conexão somente leitura do pool do bulkhead"""
+        return self._pool.obter(self._db_path(), orcamento)
+
+    def _db_path(self):
+        if not self.copia_banco:
+            return database.DB_PATH
+        with self._lock:
+            if not self._copia_feita:
+                copiar_banco(database.DB_PATH, self.copia_banco)
+                self._copia_feita = True
+        return self.copia_banco
+
+    async def executar(self, funcao, *args, **kwargs):
+        """Roda a função no executor do bulkhead (503 se estiver cheio)"""
+        if not self._vagas.acquire(blocking=False):
+            with self._lock:
+                self.rejeitadas += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Rotas de demonstração sobrecarregadas",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._em_andamento += 1
+        contexto = contextvars.copy_context()
+        chamada = functools.partial(funcao, *args, **kwargs)
+        try:
+            futuro = self._executor.submit(contexto.run, chamada)
+        except BaseException:
+            self._liberar()
+            raise
+        # A vaga é liberada quando o trabalho termina (ou é cancelado ainda
+        # na fila), não quando quem espera desiste: um cliente que cai não
+        # deixa o trabalho dele fora do limite
+        futuro.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar(self, futuro=None):
+        with self._lock:
+            self._em_andamento -= 1
+        self._vagas.release()
+
+    def isolar(self, funcao):
+        """Decorador: a rota (síncrona) passa a rodar dentro do bulkhead"""
+
+        @functools.wraps(funcao)
+        async def wrapper(*args, **kwargs):
+            return await self.executar(funcao, *args, **kwargs)
+
+        return wrapper
+
+
+def copiar_banco(origem, destino):
+    """Cópia consistente do banco (API de backup do SQLite)"""
+    fonte = sqlite3.connect(origem)
+    copia = sqlite3.connect(destino)
+    try:
+        fonte.backup(copia)
+    finally:
+        copia.close()
+        fonte.close()
+
+
+bulkhead_demo = Bulkhead(
+    "demo-vulneravel",
+    max_workers=int(os.environ.get("DEMO_MAX_WORKERS", "4")),
+    max_fila=int(os.environ.get("DEMO_MAX_FILA", "16")),
+    copia_banco=os.environ.get("DEMO_DB_COPY"),
+)
@@ -0,0 +1,226 @@
+"""
+Endpoints do catálogo de produtos
+"""
+
+import re
+from typing import Literal
+
+from fastapi import APIRouter, Query, Request
+
+from app.bulk_import import importar_produtos
+from app.database import get_read_connection
+from app.query_cache import cache_consultas
+from app.streaming import resposta_streaming
+from app.timing import RotaMedida
+
+router = APIRouter(route_class=RotaMedida)
+
+# Palavra (letras/números, com acento) opcionalmente seguida de "*"
+TERMO_REGEX = re.compile(r"(\w+)(\*?)")
+
+
+def montar_consulta_fts(texto, prefixo=False):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5
+
+    Cada palavra vira uma string entre aspas, então operadores e
+    caracteres especiais do FTS5 (NEAR, OR, ^, :, ...) não são
+    interpretados. Palavras terminadas em "*" são buscas por prefixo;
+    com prefixo=True a última palavra também é (busca enquanto digita).
+    """
+    termos = TERMO_REGEX.findall(texto)
+    partes = []
+    for i, (palavra, asterisco) in enumerate(termos):
+        ultimo = i == len(termos) - 1
+        if asterisco or (prefixo and ultimo):
+            partes.append(f'"{palavra}"*')
+        else:
+            partes.append(f'"{palavra}"')
+    return " ".join(partes)
+
+
+@router.get("/products/search-text")
+def search_products_text(
+    q: str,
+    prefixo: bool = False,
+    pagina: int = Query(1, ge=1),
+    tamanho: int = Query(20, ge=1, le=100),
+):
+    """
+    Busca textual em nome e descrição dos produtos (FTS5)
+
+    - Ordenação por relevância (bm25, nome pesa mais que descrição)
+    - Trechos com os termos destacados em <mark>
+    - Busca por prefixo: "note*" ou prefixo=true
+    - Paginação com pagina/tamanho
+    """
+    consulta = montar_consulta_fts(q, prefixo)
+    if not consulta:
+        return {
+            "tipo": "SEGURO",
+            "consulta": consulta,
+            "total": 0,
+            "pagina": pagina,
+            "tamanho": tamanho,
+            "products": [],
+        }
+
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT COUNT(*) AS total FROM products_fts "
+        "WHERE products_fts MATCH ?",
+        (consulta,),
+    )
+    total = cursor.fetchone()["total"]
+
+    query = """
+        SELECT p.*,
+               highlight(products_fts, 0, '<mark>', '</mark>') AS destaque,
+               snippet(products_fts, 1, '<mark>', '</mark>', '…', 16)
+                   AS trecho,
+               bm25(products_fts, 10.0, 1.0) AS relevancia
+        FROM products_fts
+        JOIN products p ON p.id = products_fts.rowid
+        WHERE products_fts MATCH ?
+        ORDER BY relevancia
+        LIMIT ? OFFSET ?
+    """
+    cursor.execute(query, (consulta, tamanho, (pagina - 1) * tamanho))
+
+    results = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return {
+        "tipo": "SEGURO",
+        "consulta": consulta,
+        "total": total,
+        "pagina": pagina,
+        "tamanho": tamanho,
+        "products": results,
+    }
+
+
+# Ordenações aceitas -> coluna (nunca interpolar o valor recebido)
+ORDENACOES_CATALOGO = {"price": "price", "name": "name"}
+
+
+def montar_consulta_catalogo(
+    category=None,
+    preco_min=None,
+    preco_max=None,
+    em_estoque=False,
+    ordenar="name",
+    ordem="asc",
+):
+    """
+    Monta (sql, params) do catálogo com filtros opcionais
+
+    Só os nomes de colunas da lista branca, nomes de índices fixos e
+    ASC/DESC entram no texto do SQL; todos os valores vão como
+    parâmetros. O id desempata a ordem (mesma ordem do índice, que
+    termina no rowid). Faixa de preço com ordem por nome custa
+    proporcional aos produtos da faixa (ordenados em memória).
+    """
+    coluna = ORDENACOES_CATALOGO[ordenar]
+    direcao = "DESC" if ordem == "desc" else "ASC"
+
+    condicoes = []
+    params = []
+    if category is not None:
+        condicoes.append("category = ?")
+        params.append(category)
+    if preco_min is not None:
+        condicoes.append("price >= ?")
+        params.append(preco_min)
+    if preco_max is not None:
+        condicoes.append("price <= ?")
+        params.append(preco_max)
+    if em_estoque:
+        condicoes.append("stock > 0")
+
+    sql = "SELECT * FROM products"
+    if ordenar == "name" and (preco_min, preco_max) != (None, None):
+        # Sem a dica, o SQLite percorre o índice de nome inteiro filtrando
+        # o preço; assim busca a faixa no índice de preço e ordena só ela
+        if category is not None:
+            indice = "idx_products_category_price"
+        elif em_estoque:
+            indice = "idx_products_estoque_price"
+        else:
+            indice = "idx_products_price"
+        sql += f" INDEXED BY {indice}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += f" ORDER BY {coluna} {direcao}, id {direcao} LIMIT ? OFFSET ?"
+    return sql, params
+
+
+@router.get("/products/catalog")
+def catalog_products(
+    category: str | None = None,
+    preco_min: float | None = Query(None, ge=0),
+    preco_max: float | None = Query(None, ge=0),
+    em_estoque: bool = False,
+    ordenar: Literal["price", "name"] = "name",
+    ordem: Literal["asc", "desc"] = "asc",
+    pagina: int = Query(1, ge=1),
+    tamanho: int = Query(20, ge=1, le=100),
+):
+    """
+    Catálogo com filtros (categoria, faixa de preço, em estoque) e
+    ordenação por preço ou nome
+
+    Cada combinação usa um dos índices de schema.INDICES_CATALOGO. A
+    resposta indica se há próxima página (lê tamanho + 1 linhas).
+    """
+    sql, params = montar_consulta_catalogo(
+        category, preco_min, preco_max, em_estoque, ordenar, ordem
+    )
+    params += [tamanho + 1, (pagina - 1) * tamanho]
+    results = cache_consultas.consultar(sql, params)
+
+    return {
+        "tipo": "SEGURO",
+        "pagina": pagina,
+        "tamanho": tamanho,
+        "proxima": len(results) > tamanho,
+        "products": results[:tamanho],
+    }
+
+
+@router.get("/products/export")
+def export_products(
+    formato: Literal["ndjson", "csv"] = "ndjson", category: str | None = None
+):
+    """
+    Exporta o catálogo (ou uma categoria) em streaming, NDJSON ou CSV
+    """
+    if category is None:
+        return resposta_streaming(
+            "SELECT * FROM products ORDER BY id", (), formato, "produtos"
+        )
+    return resposta_streaming(
+        "SELECT * FROM products WHERE category = ? ORDER BY id",
+        (category,),
+        formato,
+        "produtos",
+    )
+
+
+@router.post("/products/bulk")
+async def bulk_import_products(
+    request: Request, formato: Literal["ndjson", "csv"] | None = None
+):
+    """
+    Importa produtos de um corpo NDJSON ou CSV (com cabeçalho) em stream
+
+    O formato vem do parâmetro formato ou do Content-Type (text/csv ou
+    application/x-ndjson). Linhas inválidas são ignoradas e devolvidas
+    em "erros"; as válidas são gravadas em lotes.
+    """
+    if formato is None:
+        content_type = request.headers.get("content-type", "")
+        formato = "csv" if content_type.startswith("text/csv") else "ndjson"
+    return await importar_produtos(request.stream(), formato)
@@ -0,0 +1,149 @@
+"""
+Acesso ao banco de dados SQLite compartilhado pelos routers
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from app import timing
+from app.query_stats import ConexaoInstrumentada, estatisticas_consultas
+
+# Caminho do banco de dados
+DB_PATH = "database.db"
+
+# Réplica em memória usada pelas leituras (app/replica.py); definida no
+# startup quando DB_REPLICA_MEMORIA=1
+replica_leitura = None
+
+
+def get_db_connection(orcamento=None, **kwargs):
+    """
+    Cria conexão com o banco (kwargs são repassados ao sqlite3.connect)
+
+    Com orcamento (OrcamentoConsulta), as consultas da conexão são
+    interrompidas quando passam do tempo/passos permitidos.
+    """
+    if estatisticas_consultas.ativo:
+        kwargs.setdefault("factory", ConexaoInstrumentada)
+    with timing.medir("db_connect"):
+        conn = sqlite3.connect(DB_PATH, **kwargs)
+    conn.row_factory = sqlite3.Row
+    if orcamento is not None:
+        orcamento.aplicar(conn)
+    return conn
+
+
+def get_read_connection(orcamento=None, **kwargs):
+    """Conexão para consultas somente leitura (réplica em memória, se ativa)"""
+    replica = replica_leitura
+    if replica is not None and replica.db_path == DB_PATH:
+        return replica.conexao(orcamento=orcamento, **kwargs)
+    return get_db_connection(orcamento=orcamento, **kwargs)
+
+
+class OrcamentoExcedido(Exception):
+    """A consulta foi interrompida por exceder o orçamento de execução"""
+
+    def __init__(self, orcamento):
+        super().__init__("Consulta excedeu o orçamento de execução")
+        self.orcamento = orcamento
+
+
+class OrcamentoConsulta:
+    """
+    Limite de tempo e de passos da VM do SQLite para uma conexão
+
+    Usa set_progress_handler: a cada `intervalo` instruções da VM o SQLite
+    chama o handler, que interrompe a consulta (OperationalError
+    "interrupted") quando o prazo ou o número de passos estoura. O prazo
+    conta a partir da criação da conexão.
+    """
+
+    def __init__(self, segundos, passos=None, intervalo=1000):
+        self.segundos = segundos
+        self.passos = passos
+        self.intervalo = intervalo
+
+    def aplicar(self, conn):
+        prazo = time.monotonic() + self.segundos
+        max_chamadas = None
+        if self.passos is not None:
+            max_chamadas = max(1, self.passos // self.intervalo)
+        chamadas = 0
+
+        def handler():
+            nonlocal chamadas
+            chamadas += 1
+            if max_chamadas is not None and chamadas > max_chamadas:
+                return 1
+            return 1 if time.monotonic() > prazo else 0
+
+        conn.set_progress_handler(handler, self.intervalo)
+
+    def verificar(self, erro):
+        """Converte a interrupção do SQLite em OrcamentoExcedido"""
+        if isinstance(erro, sqlite3.OperationalError) and (
+            str(erro) == "interrupted"
+        ):
+            raise OrcamentoExcedido(self) from erro
+
+
+class MonitorVersao:
+    """
+    Detecta, de forma barata, se o banco mudou desde a última leitura
+
+    Combina três sinais:
+    - identidade e mtime do arquivo: o banco foi recriado (init_db.py)
+    - PRAGMA data_version de uma conexão sentinela que nunca escreve: muda
+      sempre que outra conexão (deste ou de outro processo) faz commit
+    - geração de escrita: incrementada pelo próprio app após cada commit
+
+    Enquanto a versão não muda, qualquer leitura feita antes continua
+    válida.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sentinelas = {}
+        self._geracao = 0
+
+    def registrar_escrita(self):
+        """Chamado após commits feitos pelo app"""
+        with self._lock:
+            self._geracao += 1
+
+    def versao(self, db_path):
+        """Retorna um valor que muda a cada alteração do banco"""
+        try:
+            st = os.stat(db_path)
+        except FileNotFoundError:
+            return None
+        identidade = (st.st_dev, st.st_ino)
+
+        with self._lock:
+            sentinela = self._sentinelas.get(db_path)
+            if sentinela is None or sentinela[0] != identidade:
+                if sentinela is not None:
+                    sentinela[1].close()
+                conn = sqlite3.connect(db_path, check_same_thread=False)
+                sentinela = (identidade, conn)
+                self._sentinelas[db_path] = sentinela
+
+            cursor = sentinela[1].execute("PRAGMA data_version")
+            data_version = cursor.fetchone()[0]
+            return (identidade, st.st_mtime_ns, data_version, self._geracao)
+
+
+monitor_versao = MonitorVersao()
+
+
+def registrar_escrita():
+    """Invalida caches derivados do banco após uma escrita do app"""
+    monitor_versao.registrar_escrita()
+
+
+def versao_dados():
+    """Versão atual dos dados do banco configurado em DB_PATH"""
+    return monitor_versao.versao(DB_PATH)
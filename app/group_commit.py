@@ -0,0 +1,225 @@
+"""
+Escrita de pedidos com group commit
+
+O SQLite aceita um escritor por vez e cada COMMIT custa um fsync. Em vez
+de cada requisição abrir sua transação, POST /orders coloca o pedido em
+uma fila; uma thread escritora dedicada junta até MAX_LOTE pedidos (ou o
+que chegar em MAX_ESPERA segundos) e grava todos em uma transação.
+
+Cada pedido roda em seu SAVEPOINT: um pedido inválido é desfeito sozinho
+e só o seu chamador recebe o erro. Os chamadores recebem o resultado
+depois do COMMIT do lote.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from fastapi import HTTPException
+
+from app import database
+
+logger = logging.getLogger("app.group_commit")
+
+
+class PedidoInvalido(Exception):
+    """Pedido recusado na gravação (usuário/produto inexistente)"""
+
+
+class _Pendente:
+    __slots__ = ("user_id", "product_id", "quantity", "status", "futuro")
+
+    def __init__(self, user_id, product_id, quantity, status):
+        self.user_id = user_id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.status = status
+        self.futuro = Future()
+
+
+class EscritorPedidos:
+    """Thread única que grava os pedidos da fila em lotes"""
+
+    def __init__(self, max_lote=256, max_espera=0.002, max_fila=10_000):
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.lotes = 0
+        self.pedidos = 0
+        self.maior_lote = 0
+        self._fila = queue.Queue(max_fila)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = None
+        self._db_path = None
+
+    def iniciar(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._executar, name="escritor-pedidos", daemon=True
+                )
+                self._thread.start()
+
+    def parar(self):
+        """Grava o que está na fila e encerra a thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(None)
+            thread.join()
+
+    def enviar(self, user_id, product_id, quantity, status="pending"):
+        """Enfileira o pedido; o Future resolve após o commit do lote"""
+        self.iniciar()
+        pendente = _Pendente(user_id, product_id, quantity, status)
+        try:
+            self._fila.put_nowait(pendente)
+        except queue.Full:
+            raise HTTPException(
+                status_code=503,
+                detail="Fila de gravação de pedidos cheia",
+                headers={"Retry-After": "1"},
+            )
+        return pendente.futuro
+
+    async def inserir(self, user_id, product_id, quantity, status="pending"):
+        """Grava o pedido e devolve a linha criada"""
+        futuro = self.enviar(user_id, product_id, quantity, status)
+        return await asyncio.wrap_future(futuro)
+
+    def _executar(self):
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                self._fechar()
+                return
+            lote = [primeiro]
+            prazo = time.monotonic() + self.max_espera
+            parar = False
+            while len(lote) < self.max_lote:
+                restante = prazo - time.monotonic()
+                try:
+                    item = (
+                        self._fila.get(timeout=restante)
+                        if restante > 0
+                        else self._fila.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if item is None:
+                    parar = True
+                    break
+                lote.append(item)
+
+            self._gravar(lote)
+            if parar:
+                self._fechar()
+                return
+
+    def _conexao(self):
+        if self._conn is None or self._db_path != database.DB_PATH:
+            self._fechar()
+            self._db_path = database.DB_PATH
+            self._conn = database.get_db_connection(isolation_level=None)
+        return self._conn
+
+    def _fechar(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _gravar(self, lote):
+        # Chamadores cancelados antes do lote não têm o pedido gravado; os
+        # demais Futures passam a RUNNING e não podem mais ser cancelados
+        lote = [p for p in lote if p.futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        resultados = []
+        try:
+            conn = self._conexao()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for pendente in lote:
+                    resultados.append(self._inserir(conn, pendente))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as erro:
+            self._fechar()
+            for pendente in lote:
+                self._entregar(pendente.futuro, erro)
+            return
+
+        database.registrar_escrita()
+        self.lotes += 1
+        self.pedidos += len(lote)
+        self.maior_lote = max(self.maior_lote, len(lote))
+        for pendente, resultado in zip(lote, resultados):
+            if not isinstance(resultado, Exception):
+                resultado["lote"] = len(lote)
+            self._entregar(pendente.futuro, resultado)
+
+    @staticmethod
+    def _entregar(futuro, resultado):
+        """Resolve o Future sem deixar um erro derrubar a thread"""
+        try:
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+        except Exception:
+            logger.exception("Falha ao entregar o resultado do pedido")
+
+    def _inserir(self, conn, pendente):
+        """Grava um pedido em seu savepoint; devolve a linha ou o erro"""
+        conn.execute("SAVEPOINT pedido")
+        try:
+            produto = conn.execute(
+                "SELECT price FROM products WHERE id = ?",
+                (pendente.product_id,),
+            ).fetchone()
+            if produto is None:
+                raise PedidoInvalido("Produto não encontrado")
+            usuario = conn.execute(
+                "SELECT 1 FROM users WHERE id = ?", (pendente.user_id,)
+            ).fetchone()
+            if usuario is None:
+                raise PedidoInvalido("Usuário não encontrado")
+
+            total = round(produto["price"] * pendente.quantity, 2)
+            cursor = conn.execute(
+                "INSERT INTO orders (user_id, product_id, quantity, total, "
+                "status) VALUES (?, ?, ?, ?, ?)",
+                (
+                    pendente.user_id,
+                    pendente.product_id,
+                    pendente.quantity,
+                    total,
+                    pendente.status,
+                ),
+            )
+        except (PedidoInvalido, sqlite3.IntegrityError) as erro:
+            conn.execute("ROLLBACK TO pedido")
+            conn.execute("RELEASE pedido")
+            return erro
+        conn.execute("RELEASE pedido")
+        return {
+            "id": cursor.lastrowid,
+            "user_id": pendente.user_id,
+            "product_id": pendente.product_id,
+            "quantity": pendente.quantity,
+            "total": total,
+            "status": pendente.status,
+        }
+
+
+escritor_pedidos = EscritorPedidos(
+    max_lote=int(os.environ.get("ORDERS_MAX_LOTE", "256")),
+    max_espera=float(os.environ.get("ORDERS_MAX_ESPERA_MS", "2")) / 1000,
+)
@@ -1,18 +1,115 @@
 # Endpoints para testes com mocking e fixtures
 # API externa: JSONPlaceholder (https://jsonplaceholder.typicode.com)
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 import requests
 
+from app import database, schema, timing, tracing
+from app.database import OrcamentoExcedido
+from app.admin_endpoints import router as admin_router
+from app.auth_endpoints import router as auth_router
+from app.catalog_endpoints import router as catalog_router
+from app.group_commit import escritor_pedidos
+from app.metrics import MiddlewareMetricas
+from app.metrics import router as metrics_router
+from app.order_endpoints import router as order_router
+from app.passwords import servico_senhas
+from app.replica import ReplicaMemoria
 from app.sql_injection_endpoints import router as sql_injection_router
+from app.timing import RotaMedida
+from app.user_index import indice_usuarios
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Startup: garante o schema do banco (sem apagar dados), com
+    DB_REPLICA_MEMORIA=1 carrega a réplica em memória para as leituras e
+    carrega o índice de usuários; PASSWORD_HASH_TARGET_MS calibra o custo
+    do hash de senhas para este host
+    """
+    app.state.banco = await run_in_threadpool(schema.inicializar_banco)
+    replica = None
+    if os.environ.get("DB_REPLICA_MEMORIA") == "1":
+        replica = await run_in_threadpool(ReplicaMemoria().iniciar)
+        database.replica_leitura = replica
+    if indice_usuarios.ativo:
+        await run_in_threadpool(indice_usuarios.carregar)
+    if os.environ.get("PASSWORD_HASH_TARGET_MS"):
+        alvo_ms = float(os.environ["PASSWORD_HASH_TARGET_MS"])
+        await run_in_threadpool(servico_senhas.configurar, alvo_ms=alvo_ms)
+    try:
+        yield
+    finally:
+        escritor_pedidos.parar()
+        servico_senhas.encerrar()
+        if replica is not None:
+            database.replica_leitura = None
+            replica.parar()
+
+
+app = FastAPI(lifespan=lifespan)
+# Rotas marcam o fim do endpoint (fase "serialize" do Server-Timing)
+app.router.route_class = RotaMedida
 
 # Registrar rotas de SQL Injection
 app.include_router(sql_injection_router, tags=["SQL Injection"])
+app.include_router(catalog_router, tags=["Catálogo"])
+app.include_router(order_router, tags=["Pedidos"])
+app.include_router(admin_router, tags=["Admin"])
+app.include_router(auth_router, tags=["Autenticação"])
+app.include_router(metrics_router, tags=["Métricas"])
+
+# Contagens e latências por rota (GET /metrics)
+app.add_middleware(MiddlewareMetricas)
+
+
+@app.exception_handler(OrcamentoExcedido)
+def orcamento_excedido(request, exc):
+    """Consulta interrompida pelo orçamento de execução: mesma resposta"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "Consulta excedeu o tempo de execução permitido",
+            "limite_segundos": exc.orcamento.segundos,
+        },
+        headers={"Retry-After": "1"},
+    )
+
+
+# URL base da API externa; UPSTREAM_BASE_URL aponta para outra instância,
+# como o substituto local (python -m app.upstream_local)
+BASE_URL = os.environ.get(
+    "UPSTREAM_BASE_URL", "https://jsonplaceholder.typicode.com"
+).rstrip("/")
 
-# URL base da API externa
-BASE_URL = "https://jsonplaceholder.typicode.com"
+
+def buscar_upstream(caminho):
+    """
+    GET na API externa; o tempo entra na fase "upstream" da requisição
+
+    Com tracing ativo a chamada vira um span e leva o header traceparent.
+    """
+    url = f"{BASE_URL}{caminho}"
+    with timing.medir("upstream"), tracing.rastreador.span(
+        f"GET {caminho}", url=url
+    ) as span:
+        if span is None:
+            return requests.get(url)
+        response = requests.get(url, headers=tracing.cabecalhos_propagacao())
+        span.atributos["http.status_code"] = response.status_code
+        return response
+
+
+def ler_json(response):
+    """Corpo JSON da API externa; o tempo entra na fase json_decode"""
+    with timing.medir("json_decode"):
+        return response.json()
 
 
 # ENDPOINTS
@@ -27,90 +124,90 @@ def root():
 @app.get("/posts")
 def get_posts(limit: int = 10):
     """Lista posts (com limite opcional)"""
-    response = requests.get(f"{BASE_URL}/posts")
+    response = buscar_upstream("/posts")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    posts = response.json()
+    posts = ler_json(response)
     return posts[:limit]
 
 
 @app.get("/posts/{post_id}")
 def get_post(post_id: int):
     """Obtém um post específico por ID"""
-    response = requests.get(f"{BASE_URL}/posts/{post_id}")
+    response = buscar_upstream(f"/posts/{post_id}")
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="Post não encontrado")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/posts/{post_id}/comments")
 def get_post_comments(post_id: int):
     """Obtém comentários de um post específico"""
-    response = requests.get(f"{BASE_URL}/posts/{post_id}/comments")
+    response = buscar_upstream(f"/posts/{post_id}/comments")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/users")
 def get_users():
     """Lista todos os usuários"""
-    response = requests.get(f"{BASE_URL}/users")
+    response = buscar_upstream("/users")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/users/{user_id}")
 def get_user(user_id: int):
     """Obtém um usuário específico por ID"""
-    response = requests.get(f"{BASE_URL}/users/{user_id}")
+    response = buscar_upstream(f"/users/{user_id}")
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/users/{user_id}/posts")
 def get_user_posts(user_id: int):
     """Obtém todos os posts de um usuário específico"""
-    response = requests.get(f"{BASE_URL}/users/{user_id}/posts")
+    response = buscar_upstream(f"/users/{user_id}/posts")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/comments")
 def get_comments(limit: int = 20):
     """Lista comentários (com limite opcional)"""
-    response = requests.get(f"{BASE_URL}/comments")
+    response = buscar_upstream("/comments")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    comments = response.json()
+    comments = ler_json(response)
     return comments[:limit]
 
 
 @app.get("/todos/{todo_id}")
 def get_todo(todo_id: int):
     """Obtém uma tarefa específica por ID"""
-    response = requests.get(f"{BASE_URL}/todos/{todo_id}")
+    response = buscar_upstream(f"/todos/{todo_id}")
     if response.status_code == 404:
         raise HTTPException(status_code=404, detail="Tarefa não encontrada")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    return response.json()
+    return ler_json(response)
 
 
 @app.get("/albums/{album_id}/photos")
 def get_album_photos(album_id: int, limit: int = 10):
     """Obtém fotos de um álbum específico"""
-    response = requests.get(f"{BASE_URL}/albums/{album_id}/photos")
+    response = buscar_upstream(f"/albums/{album_id}/photos")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erro na API externa")
-    photos = response.json()
+    photos = ler_json(response)
     return photos[:limit]
 
 
@@ -123,14 +220,14 @@ def get_user_stats(user_id: int):
     - Post mais comentado
     """
     # 1. Buscar posts do usuário
-    response = requests.get(f"{BASE_URL}/users/{user_id}/posts")
+    response = buscar_upstream(f"/users/{user_id}/posts")
 
     if response.status_code != 200:
         raise HTTPException(
             status_code=500, detail="Erro ao buscar posts do usuário"
         )
 
-    posts = response.json()
+    posts = ler_json(response)
 
     # 2. Verificar se usuário tem posts
     if not posts:
@@ -139,22 +236,35 @@ def get_user_stats(user_id: int):
         )
 
     # 3. Buscar comentários de cada post
-    total_comments = 0
-    post_comments_count = {}
+    comentarios = {}
 
     for post in posts:
         post_id = post["id"]
-        comments_response = requests.get(
-            f"{BASE_URL}/posts/{post_id}/comments"
-        )
+        comments_response = buscar_upstream(f"/posts/{post_id}/comments")
 
         if comments_response.status_code != 200:
             raise HTTPException(
                 status_code=500, detail="Erro ao buscar comentários"
             )
 
-        comments = comments_response.json()
-        comments_count = len(comments)
+        comentarios[post_id] = ler_json(comments_response)
+
+    # 4. Calcular estatísticas
+    return resumir_atividade(user_id, posts, comentarios)
+
+
+def resumir_atividade(user_id, posts, comentarios):
+    """
+    Estatísticas de get_user_stats a partir dos posts do usuário e dos
+    comentários de cada um (comentarios[post_id]); sem I/O, para poder
+    ser testada e medida isoladamente (benchmarks/micro.py)
+    """
+    total_comments = 0
+    post_comments_count = {}
+
+    for post in posts:
+        post_id = post["id"]
+        comments_count = len(comentarios[post_id])
 
         total_comments += comments_count
         post_comments_count[post_id] = {
@@ -162,11 +272,10 @@ def get_user_stats(user_id: int):
             "title": post["title"],
         }
 
-    # 4. Calcular estatísticas
     total_posts = len(posts)
     average_comments = total_comments / total_posts if total_posts > 0 else 0.0
 
-    # 5. Encontrar post mais comentado
+    # Post mais comentado
     most_commented = max(
         post_comments_count.items(),
         key=lambda x: x[1]["count"],
@@ -181,7 +290,6 @@ def get_user_stats(user_id: int):
         ),
     }
 
-    # 6. Retornar estatísticas
     return {
         "user_id": user_id,
         "total_posts": total_posts,
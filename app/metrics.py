@@ -0,0 +1,274 @@
+"""
+Métricas no formato de texto do Prometheus (GET /metrics)
+
+O middleware (ASGI puro) registra, por rota (template, ex.:
+/users/{user_id}) e método: contagem por status e histogramas de
+latência total, do tempo na API externa (fase "upstream"), do tempo no
+SQLite (fases "db_*") e do tempo restante, que é o processamento do
+próprio app. As fases vêm do acumulador por requisição de app/timing.py.
+
+Com SERVER_TIMING=1 o mesmo middleware envia as fases no header
+Server-Timing (ver app/timing.py).
+
+O registro custa alguns dict lookups e uma aquisição de lock curta por
+requisição; os gauges (threadpool, requisições em andamento, caches) são
+lidos só quando /metrics é chamado.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from anyio import to_thread
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import timing
+from app.bulkhead import bulkhead_demo
+from app.query_cache import cache_consultas
+from app.sessions import cache_sessoes
+
+# Limites (segundos) dos buckets dos histogramas
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HISTOGRAMAS = {
+    "http_request_duration_seconds": "Latência total da requisição",
+    "http_request_upstream_seconds": "Tempo esperando a API externa",
+    "http_request_db_seconds": "Tempo no SQLite (conexão e statements)",
+    "http_request_app_seconds": "Tempo de processamento do próprio app",
+}
+
+# Rota não encontrada: um único rótulo, para não criar uma série por URL
+ROTA_DESCONHECIDA = "desconhecida"
+
+
+class Histograma:
+    __slots__ = ("contagens", "soma")
+
+    def __init__(self):
+        self.contagens = [0] * (len(BUCKETS) + 1)
+        self.soma = 0.0
+
+    def observar(self, valor):
+        # chamado com o lock do registro adquirido
+        self.contagens[bisect_left(BUCKETS, valor)] += 1
+        self.soma += valor
+
+
+def _rotulos(**rotulos):
+    pares = ",".join(
+        f'{nome}="{str(valor).replace(chr(34), chr(39))}"'
+        for nome, valor in rotulos.items()
+    )
+    return "{" + pares + "}"
+
+
+class RegistroMetricas:
+    """Contadores e histogramas por rota"""
+
+    def __init__(self):
+        self.em_andamento = 0
+        self._lock = threading.Lock()
+        self._requisicoes = {}
+        self._histogramas = {}
+        self._gauges = []
+
+    def registrar(self, metodo, rota, status, duracao, fases):
+        """Registra uma requisição concluída"""
+        upstream = fases.get("upstream", 0.0)
+        db = sum(v for fase, v in fases.items() if fase.startswith("db_"))
+        valores = (
+            duracao,
+            upstream,
+            db,
+            max(duracao - upstream - db, 0.0),
+        )
+        chave = (metodo, rota)
+        with self._lock:
+            contagem = (metodo, rota, status)
+            self._requisicoes[contagem] = (
+                self._requisicoes.get(contagem, 0) + 1
+            )
+            histogramas = self._histogramas.get(chave)
+            if histogramas is None:
+                histogramas = self._histogramas[chave] = [
+                    Histograma() for _ in HISTOGRAMAS
+                ]
+            for histograma, valor in zip(histogramas, valores):
+                histograma.observar(valor)
+
+    def gauge(self, nome, ajuda):
+        """Decorador: função que devolve [(rótulos, valor)] ou um valor"""
+
+        def registrar(funcao):
+            self._gauges.append((nome, ajuda, funcao))
+            return funcao
+
+        return registrar
+
+    def renderizar(self):
+        """Texto no formato de exposição do Prometheus"""
+        with self._lock:
+            requisicoes = dict(self._requisicoes)
+            histogramas = {
+                chave: [(list(h.contagens), h.soma) for h in valores]
+                for chave, valores in self._histogramas.items()
+            }
+
+        linhas = [
+            "# HELP http_requests_total Requisições por rota e status",
+            "# TYPE http_requests_total counter",
+        ]
+        for (metodo, rota, status), total in sorted(requisicoes.items()):
+            rotulos = _rotulos(method=metodo, route=rota, status=status)
+            linhas.append(f"http_requests_total{rotulos} {total}")
+
+        for indice, (nome, ajuda) in enumerate(HISTOGRAMAS.items()):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} histogram")
+            for (metodo, rota), valores in sorted(histogramas.items()):
+                contagens, soma = valores[indice]
+                acumulado = 0
+                for limite, contagem in zip(BUCKETS + ("+Inf",), contagens):
+                    acumulado += contagem
+                    rotulos = _rotulos(method=metodo, route=rota, le=limite)
+                    linhas.append(f"{nome}_bucket{rotulos} {acumulado}")
+                rotulos = _rotulos(method=metodo, route=rota)
+                linhas.append(f"{nome}_sum{rotulos} {soma:.6f}")
+                linhas.append(f"{nome}_count{rotulos} {acumulado}")
+
+        for nome, ajuda, funcao in self._gauges:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} gauge")
+            valores = funcao()
+            if not isinstance(valores, list):
+                valores = [({}, valores)]
+            for rotulos, valor in valores:
+                rotulos = _rotulos(**rotulos) if rotulos else ""
+                linhas.append(f"{nome}{rotulos} {valor}")
+
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._lock:
+            self._requisicoes.clear()
+            self._histogramas.clear()
+
+
+metricas = RegistroMetricas()
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que mede cada requisição HTTP"""
+
+    def __init__(self, app, registro=metricas):
+        self.app = app
+        self.registro = registro
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        inicio = time.perf_counter()
+        fases, token = timing.iniciar()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                timing.registrar_serializacao(fases)
+                if timing.SERVER_TIMING:
+                    valor = timing.cabecalho_server_timing(
+                        fases, time.perf_counter() - inicio
+                    )
+                    mensagem["headers"] = list(mensagem.get("headers", ())) + [
+                        (b"server-timing", valor.encode())
+                    ]
+            await send(mensagem)
+
+        # contador alterado só na thread do event loop: sem lock
+        self.registro.em_andamento += 1
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            self.registro.em_andamento -= 1
+            timing.encerrar(token)
+            rota = scope.get("route")
+            self.registro.registrar(
+                scope["method"],
+                getattr(rota, "path", ROTA_DESCONHECIDA),
+                status,
+                time.perf_counter() - inicio,
+                fases,
+            )
+
+
+# =============================================================================
+# Gauges
+# =============================================================================
+
+
+@metricas.gauge("http_requests_in_flight", "Requisições em andamento")
+def _em_andamento():
+    return metricas.em_andamento
+
+
+@metricas.gauge(
+    "threadpool_threads", "Threads do pool padrão (rotas síncronas)"
+)
+def _threadpool():
+    limitador = to_thread.current_default_thread_limiter()
+    return [
+        ({"estado": "ocupadas"}, limitador.borrowed_tokens),
+        ({"estado": "total"}, limitador.total_tokens),
+    ]
+
+
+@metricas.gauge("bulkhead_demo_in_flight", "Rotas vulneráveis em andamento")
+def _bulkhead():
+    return bulkhead_demo.em_andamento
+
+
+@metricas.gauge("cache_hit_ratio", "Taxa de acerto dos caches")
+def _caches():
+    sessoes = cache_sessoes.acertos + cache_sessoes.faltas
+    return [
+        (
+            {"cache": "consultas"},
+            cache_consultas.estatisticas()["taxa_acerto"],
+        ),
+        (
+            {"cache": "sessoes"},
+            cache_sessoes.acertos / sessoes if sessoes else 0.0,
+        ),
+    ]
+
+
+router = APIRouter(route_class=timing.RotaMedida)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas do serviço no formato de texto do Prometheus
+
+    Assíncrona: o limitador do threadpool só pode ser lido no event loop.
+    """
+    return PlainTextResponse(
+        metricas.renderizar(), media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,110 @@
+"""
+Endpoints de pedidos
+
+As análises leem as tabelas de resumo mantidas pelos triggers de orders
+(ver app/schema.py): cada consulta é uma leitura direta por chave ou pelo
+índice do ranking, nunca um GROUP BY sobre o histórico de pedidos.
+
+A criação de pedidos passa pela thread escritora com group commit
+(app/group_commit.py).
+"""
+
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from app.group_commit import PedidoInvalido, escritor_pedidos
+from app.query_cache import cache_consultas
+from app.timing import RotaMedida
+
+router = APIRouter(route_class=RotaMedida)
+
+
+def _resumo(row):
+    """Converte a linha de resumo (receita arredondada em centavos)"""
+    resumo = dict(row)
+    resumo["receita"] = round(resumo["receita"], 2)
+    return resumo
+
+
+class NovoPedido(BaseModel):
+    user_id: int
+    product_id: int
+    quantity: int = Field(gt=0, le=10_000)
+    status: Literal["pending", "shipped", "completed", "cancelled"] = "pending"
+
+
+@router.post("/orders", status_code=201)
+async def create_order(pedido: NovoPedido):
+    """
+    Cria um pedido (total = preço do produto x quantidade)
+
+    A resposta só volta depois do COMMIT do lote em que o pedido entrou.
+    """
+    try:
+        return await escritor_pedidos.inserir(
+            pedido.user_id, pedido.product_id, pedido.quantity, pedido.status
+        )
+    except PedidoInvalido as erro:
+        raise HTTPException(status_code=422, detail=str(erro))
+
+
+@router.get("/orders/analytics/revenue-by-user")
+def revenue_by_user(limit: int = Query(10, ge=1, le=1000)):
+    """Ranking de usuários por receita"""
+    query = """
+        SELECT s.user_id, u.username, s.pedidos, s.unidades, s.receita
+        FROM order_stats_user s
+        LEFT JOIN users u ON u.id = s.user_id
+        ORDER BY s.receita DESC
+        LIMIT ?
+    """
+    rows = cache_consultas.consultar(query, (limit,))
+    return {"usuarios": [_resumo(row) for row in rows]}
+
+
+@router.get("/orders/analytics/users/{user_id}")
+def revenue_of_user(user_id: int):
+    """Pedidos, unidades e receita de um usuário"""
+    query = "SELECT * FROM order_stats_user WHERE user_id = ?"
+    rows = cache_consultas.consultar(query, (user_id,))
+    if not rows:
+        raise HTTPException(
+            status_code=404, detail="Usuário não possui pedidos"
+        )
+    return _resumo(rows[0])
+
+
+@router.get("/orders/analytics/units-by-product")
+def units_by_product(limit: int = Query(10, ge=1, le=1000)):
+    """Ranking de produtos por unidades vendidas"""
+    query = """
+        SELECT s.product_id, p.name, s.pedidos, s.unidades, s.receita
+        FROM order_stats_product s
+        LEFT JOIN products p ON p.id = s.product_id
+        ORDER BY s.unidades DESC
+        LIMIT ?
+    """
+    rows = cache_consultas.consultar(query, (limit,))
+    return {"produtos": [_resumo(row) for row in rows]}
+
+
+@router.get("/orders/analytics/products/{product_id}")
+def units_of_product(product_id: int):
+    """Pedidos, unidades e receita de um produto"""
+    query = "SELECT * FROM order_stats_product WHERE product_id = ?"
+    rows = cache_consultas.consultar(query, (product_id,))
+    if not rows:
+        raise HTTPException(
+            status_code=404, detail="Produto não possui pedidos"
+        )
+    return _resumo(rows[0])
+
+
+@router.get("/orders/analytics/status")
+def orders_by_status():
+    """Quantidade de pedidos, unidades e receita por status"""
+    query = "SELECT * FROM order_stats_status ORDER BY pedidos DESC"
+    rows = cache_consultas.consultar(query)
+    return {"status": [_resumo(row) for row in rows]}
@@ -0,0 +1,228 @@
+"""
+Hash de senhas (scrypt) calculado em um pool de processos
+
+O scrypt é caro de propósito (dezenas de ms e MBs de memória por hash).
+Calculado na thread da requisição, cada login prenderia um worker; aqui
+ele roda em um ProcessPoolExecutor limitado, fora do GIL, e o excesso de
+logins simultâneos recebe 503 em vez de formar uma fila sem fim.
+
+Formato armazenado em users.password:
+
+    scrypt$<n>$<r>$<p>$<salt base64>$<hash base64>
+
+Linhas antigas (senha em texto puro) continuam aceitas e são convertidas
+para hash no primeiro login bem-sucedido. Hashes com parâmetros
+diferentes dos atuais também são refeitos no login.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+
+PREFIXO = "scrypt$"
+
+# Parâmetros padrão: n=2**14, r=8 -> 16 MiB e ~50 ms por hash
+SCRYPT_N = int(os.environ.get("PASSWORD_HASH_N", str(2**14)))
+SCRYPT_R = int(os.environ.get("PASSWORD_HASH_R", "8"))
+SCRYPT_P = int(os.environ.get("PASSWORD_HASH_P", "1"))
+
+TAMANHO_SALT = 16
+TAMANHO_HASH = 32
+
+# Chave do processo para guardar senhas legadas apenas como digest
+_CHAVE_PROCESSO = secrets.token_bytes(32)
+
+
+def _b64(dados):
+    return base64.b64encode(dados).decode("ascii")
+
+
+def _scrypt(senha, salt, n, r, p):
+    return hashlib.scrypt(
+        senha.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * r * (n + p + 2),
+        dklen=TAMANHO_HASH,
+    )
+
+
+def gerar_hash(senha, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Hash no formato armazenado (roda nos processos do pool)"""
+    salt = secrets.token_bytes(TAMANHO_SALT)
+    calculado = _scrypt(senha, salt, n, r, p)
+    return f"{PREFIXO}{n}${r}${p}${_b64(salt)}${_b64(calculado)}"
+
+
+def e_hash(valor):
+    """Verifica se o valor da coluna password já é um hash"""
+    return isinstance(valor, str) and valor.startswith(PREFIXO)
+
+
+def parametros(armazenado):
+    """(n, r, p) de um hash armazenado"""
+    _, n, r, p, _, _ = armazenado.split("$")
+    return int(n), int(r), int(p)
+
+
+def verificar_hash(senha, armazenado):
+    """Compara a senha com o hash em tempo constante (roda no pool)"""
+    try:
+        _, n, r, p, salt, esperado = armazenado.split("$")
+        salt = base64.b64decode(salt)
+        esperado = base64.b64decode(esperado)
+        calculado = _scrypt(senha, salt, int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(calculado, esperado)
+
+
+class SenhaLegada:
+    """Senha em texto puro de linha antiga, mantida só como digest"""
+
+    __slots__ = ("digest",)
+
+    def __init__(self, senha):
+        self.digest = self._calcular(senha)
+
+    @staticmethod
+    def _calcular(senha):
+        return hashlib.blake2b(
+            senha.encode("utf-8"), key=_CHAVE_PROCESSO, digest_size=32
+        ).digest()
+
+    def confere(self, senha):
+        return hmac.compare_digest(self._calcular(senha), self.digest)
+
+
+def credencial(valor):
+    """Valor da coluna password no formato guardado em memória"""
+    return valor if e_hash(valor) else SenhaLegada(valor)
+
+
+def calibrar(alvo_ms, r=SCRYPT_R, p=SCRYPT_P, n_minimo=2**10):
+    """
+    Maior n (potência de 2) cujo hash leva no máximo alvo_ms neste host
+
+    O tempo do scrypt cresce linearmente com n: dobra n até o próximo
+    passo passar do alvo.
+    """
+    n = n_minimo
+    while True:
+        inicio = time.perf_counter()
+        _scrypt("calibracao", b"\0" * TAMANHO_SALT, n * 2, r, p)
+        if (time.perf_counter() - inicio) * 1000 > alvo_ms:
+            return n
+        n *= 2
+
+
+class ServicoSenhas:
+    """Pool de processos limitado para gerar e verificar hashes"""
+
+    def __init__(self, max_workers=None, max_fila=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        if max_fila is None:
+            max_fila = self.max_workers * 4
+        self.n, self.r, self.p = SCRYPT_N, SCRYPT_R, SCRYPT_P
+        self.rejeitadas = 0
+        self._vagas = threading.BoundedSemaphore(self.max_workers + max_fila)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._ficticios = {}
+
+    def configurar(self, n=None, r=None, p=None, alvo_ms=None):
+        """Define os parâmetros (ou calibra n para alvo_ms)"""
+        self.r = r or self.r
+        self.p = p or self.p
+        if alvo_ms:
+            n = calibrar(alvo_ms, self.r, self.p)
+        self.n = n or self.n
+        return self.n, self.r, self.p
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            return self._executor
+
+    async def _executar(self, funcao, *args):
+        if not self._vagas.acquire(blocking=False):
+            with self._lock:
+                self.rejeitadas += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Muitos logins simultâneos",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            futuro = self._pool().submit(funcao, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        # A vaga volta quando o hash termina (ou é cancelado ainda na fila),
+        # não quando o login desiste de esperar (como no bulkhead)
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return await asyncio.wrap_future(futuro)
+
+    async def gerar(self, senha):
+        """Hash da senha com os parâmetros atuais"""
+        return await self._executar(gerar_hash, senha, self.n, self.r, self.p)
+
+    async def verificar(self, senha, armazenado):
+        """
+        Verifica a senha contra a credencial (hash ou SenhaLegada)
+
+        Retorna (confere, precisa_atualizar): senhas legadas e hashes com
+        parâmetros antigos devem ser refeitos após um login válido.
+        """
+        if isinstance(armazenado, SenhaLegada):
+            # o digest é instantâneo: o scrypt fictício iguala o custo ao de
+            # um hash ou de um usuário inexistente, certa ou errada a senha
+            await self._executar(verificar_hash, senha, await self._ficticio())
+            confere = armazenado.confere(senha)
+            return confere, confere
+        confere = await self._executar(verificar_hash, senha, armazenado)
+        if not confere:
+            return False, False
+        return True, parametros(armazenado) != (self.n, self.r, self.p)
+
+    async def verificar_ausente(self, senha):
+        """
+        Mesmo custo de verificar() para um usuário que não existe
+
+        Sem isso, o scrypt só rodaria para usernames cadastrados e o tempo
+        de resposta revelaria quais existem. Compara com um hash fictício
+        (um por conjunto de parâmetros); retorna sempre (False, False).
+        """
+        await self._executar(verificar_hash, senha, await self._ficticio())
+        return False, False
+
+    async def _ficticio(self):
+        """Hash fictício com os parâmetros atuais (gerado uma vez)"""
+        chave = (self.n, self.r, self.p)
+        ficticio = self._ficticios.get(chave)
+        if ficticio is None:
+            ficticio = await self._executar(gerar_hash, "", *chave)
+            self._ficticios[chave] = ficticio
+        return ficticio
+
+    def encerrar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+servico_senhas = ServicoSenhas(
+    max_workers=int(os.environ.get("PASSWORD_HASH_WORKERS", "0")) or None,
+)
@@ -0,0 +1,257 @@
+"""
+Profiling de requisições sob demanda
+
+Duas formas de ativar, sem redeploy:
+
+- header X-Profile com o token administrativo (ADMIN_TOKEN): só aquela
+  requisição roda sob o profiler e o id do perfil volta no header
+  X-Profile-Id;
+- PROFILE_SAMPLE_N=N: uma a cada N requisições de cada rota.
+
+Os perfis ficam num buffer circular (PROFILE_BUFFER perfis, padrão 50)
+baixado em /admin/profiles. Há dois profilers (PROFILE_MODE, ou o header
+X-Profile-Mode na requisição):
+
+- "cprofile" (padrão): determinístico; exporta pstats (arquivo lido por
+  pstats.Stats/snakeviz) ou texto;
+- "amostragem": uma thread lê a pilha da thread do endpoint a cada
+  PROFILE_INTERVALO_MS (padrão 1) e gera stacks colapsadas (formato do
+  flamegraph.pl/speedscope). Em rotas assíncronas só conta as amostras
+  em que o endpoint está de fato executando.
+
+Só o corpo do endpoint é perfilado (não as dependências nem a
+serialização). Em rotas assíncronas o cProfile cobre a thread do event
+loop e pode incluir trabalho de outras requisições.
+
+Só um cProfile roda por vez no processo (no Python 3.12 ele usa
+sys.monitoring e vale para todas as threads): com outro ativo, a
+requisição é perfilada por amostragem e nunca falha por isso.
+"""
+
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+MODOS = ("cprofile", "amostragem")
+
+# Formatos de exportação por modo (o primeiro é o padrão)
+FORMATOS = {"cprofile": ("texto", "pstats"), "amostragem": ("collapsed",)}
+
+_perfil = ContextVar("perfil_requisicao", default=None)
+
+# Um cProfile por processo (global a partir do Python 3.12)
+_cprofile_livre = threading.Lock()
+
+
+def token_admin_valido(valor):
+    """Compara com ADMIN_TOKEN em tempo constante (falso se não definido)"""
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token or valor is None:
+        return False
+    return hmac.compare_digest(valor.encode(), token.encode())
+
+
+class Perfil:
+    """Perfil de uma requisição; usado como context manager no endpoint"""
+
+    __slots__ = (
+        "id",
+        "metodo",
+        "rota",
+        "modo",
+        "motivo",
+        "quando",
+        "duracao",
+        "dados",
+        "intervalo",
+        "_inicio",
+        "_parar",
+        "_amostrador",
+    )
+
+    def __init__(self, metodo, rota, modo, motivo, intervalo):
+        self.id = secrets.token_hex(8)
+        self.metodo = metodo
+        self.rota = rota
+        self.modo = modo
+        self.motivo = motivo
+        self.quando = time.time()
+        self.duracao = None
+        self.dados = None
+        self.intervalo = intervalo
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        self._amostrador = None
+        if self.modo == "cprofile":
+            if _cprofile_livre.acquire(blocking=False):
+                self.dados = cProfile.Profile()
+                try:
+                    self.dados.enable()
+                    return self
+                except ValueError:
+                    # outra ferramenta (coverage, debugger) já monitora
+                    _cprofile_livre.release()
+            self.modo = "amostragem"
+        self.dados = {}
+        self._parar = threading.Event()
+        self._amostrador = threading.Thread(
+            target=self._amostrar,
+            args=(threading.get_ident(), sys._getframe(1)),
+            daemon=True,
+        )
+        self._amostrador.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._amostrador is not None:
+            self._parar.set()
+            self._amostrador.join()
+        elif isinstance(self.dados, cProfile.Profile):
+            self.dados.disable()
+            _cprofile_livre.release()
+        self.duracao = time.perf_counter() - self._inicio
+        return False
+
+    def _amostrar(self, thread_id, base):
+        """Conta as pilhas da thread acima do frame base (o wrapper)"""
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(thread_id)
+            pilha = []
+            while frame is not None and frame is not base:
+                codigo = frame.f_code
+                modulo = frame.f_globals.get("__name__", "?")
+                pilha.append(f"{modulo}:{codigo.co_name}")
+                frame = frame.f_back
+            if frame is None or not pilha:
+                # endpoint suspenso (await) ou já encerrado
+                continue
+            chave = ";".join(reversed(pilha))
+            self.dados[chave] = self.dados.get(chave, 0) + 1
+
+    def resumo(self):
+        return {
+            "id": self.id,
+            "metodo": self.metodo,
+            "rota": self.rota,
+            "modo": self.modo,
+            "motivo": self.motivo,
+            "quando": self.quando,
+            "duracao_ms": round(self.duracao * 1000, 3),
+            "formatos": list(FORMATOS[self.modo]),
+        }
+
+    def exportar(self, formato=None):
+        """(conteúdo, media type, extensão); ValueError se não suportado"""
+        formato = formato or FORMATOS[self.modo][0]
+        if formato not in FORMATOS[self.modo]:
+            raise ValueError(
+                f"Formato {formato} indisponível para perfis {self.modo}"
+            )
+        if formato == "collapsed":
+            linhas = sorted(f"{p} {n}" for p, n in self.dados.items())
+            return "\n".join(linhas) + "\n", "text/plain", "folded"
+        if formato == "pstats":
+            self.dados.create_stats()
+            conteudo = marshal.dumps(self.dados.stats)
+            return conteudo, "application/octet-stream", "pstats"
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(self.dados, stream=saida)
+        estatisticas.sort_stats("cumulative").print_stats(50)
+        return saida.getvalue(), "text/plain", "txt"
+
+
+class RegistroPerfis:
+    """Decide quais requisições perfilar e guarda os últimos perfis"""
+
+    def __init__(self, capacidade=None, amostra_n=None, modo=None):
+        if capacidade is None:
+            capacidade = int(os.environ.get("PROFILE_BUFFER", "50"))
+        if amostra_n is None:
+            amostra_n = int(os.environ.get("PROFILE_SAMPLE_N", "0"))
+        if modo is None:
+            modo = os.environ.get("PROFILE_MODE", "cprofile")
+        self.capacidade = capacidade
+        self.amostra_n = amostra_n
+        self.modo = modo if modo in MODOS else "cprofile"
+        self.intervalo = (
+            float(os.environ.get("PROFILE_INTERVALO_MS", "1")) / 1000
+        )
+        self._lock = threading.Lock()
+        self._perfis = OrderedDict()
+        self._contagens = {}
+
+    def _sortear(self, chave):
+        with self._lock:
+            contagem = self._contagens.get(chave, 0) + 1
+            self._contagens[chave] = contagem
+        return contagem % self.amostra_n == 0
+
+    def preparar(self, request, rota):
+        """Perfil para a requisição, ou None se ela não será perfilada"""
+        pedido = request.headers.get("x-profile")
+        modo = self.modo
+        if pedido is not None and token_admin_valido(pedido):
+            motivo = "pedido"
+            modo = request.headers.get("x-profile-mode", modo)
+            if modo not in MODOS:
+                modo = self.modo
+        elif self.amostra_n > 0 and self._sortear((request.method, rota)):
+            motivo = "amostra"
+        else:
+            return None
+        return Perfil(request.method, rota, modo, motivo, self.intervalo)
+
+    async def executar(self, manipulador, request, rota):
+        """Roda o handler da rota, perfilando o endpoint se for o caso"""
+        perfil = self.preparar(request, rota)
+        if perfil is None:
+            return await manipulador(request)
+        token = _perfil.set(perfil)
+        try:
+            response = await manipulador(request)
+        finally:
+            _perfil.reset(token)
+            if perfil.duracao is not None and perfil.dados is not None:
+                self.guardar(perfil)
+        if perfil.duracao is not None and perfil.dados is not None:
+            response.headers["X-Profile-Id"] = perfil.id
+        return response
+
+    def guardar(self, perfil):
+        with self._lock:
+            self._perfis[perfil.id] = perfil
+            while len(self._perfis) > self.capacidade:
+                self._perfis.popitem(last=False)
+
+    def listar(self):
+        """Resumo dos perfis guardados, do mais recente ao mais antigo"""
+        with self._lock:
+            perfis = list(self._perfis.values())
+        return [perfil.resumo() for perfil in reversed(perfis)]
+
+    def obter(self, perfil_id):
+        with self._lock:
+            return self._perfis.get(perfil_id)
+
+    def limpar(self):
+        with self._lock:
+            self._perfis.clear()
+            self._contagens.clear()
+
+
+registro_perfis = RegistroPerfis()
+
+
+def perfil_pendente():
+    """Perfil a aplicar no endpoint da requisição atual (ou None)"""
+    return _perfil.get()
@@ -0,0 +1,91 @@
+"""
+Cache de resultados de consultas de leitura no SQLite
+
+Chave: (banco, SQL normalizado, parâmetros). Cada entrada guarda a versão
+dos dados em que foi lida (database.versao_dados); se o banco mudou desde
+então a entrada é descartada, então o cache nunca devolve linhas
+anteriores a uma escrita.
+"""
+
+import threading
+from collections import OrderedDict
+
+from app import database
+
+
+def normalizar_sql(sql):
+    """Remove diferenças de espaços/quebras de linha da consulta"""
+    return " ".join(sql.split())
+
+
+class QueryCache:
+    """Cache LRU de resultados (lista de dicts) de consultas SELECT"""
+
+    def __init__(self, max_entradas=1024):
+        self.max_entradas = max_entradas
+        self.ativo = True
+        self.acertos = 0
+        self.faltas = 0
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+
+    def consultar(self, sql, params=()):
+        """
+        Executa a consulta (ou devolve o resultado em cache)
+
+        O resultado é compartilhado entre chamadas: não modifique as linhas
+        retornadas.
+        """
+        if not self.ativo:
+            return self._executar(sql, params)
+
+        chave = (database.DB_PATH, normalizar_sql(sql), tuple(params))
+        versao = database.versao_dados()
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == versao:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return list(entrada[1])
+            self.faltas += 1
+
+        linhas = self._executar(sql, params)
+
+        with self._lock:
+            self._entradas[chave] = (versao, linhas)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+        return list(linhas)
+
+    def _executar(self, sql, params):
+        conn = database.get_read_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def limpar(self):
+        """Remove todas as entradas e zera as estatísticas"""
+        with self._lock:
+            self._entradas.clear()
+            self.acertos = 0
+            self.faltas = 0
+
+    def estatisticas(self):
+        """Acertos, faltas e taxa de acerto"""
+        with self._lock:
+            total = self.acertos + self.faltas
+            return {
+                "entradas": len(self._entradas),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / total if total else 0.0,
+            }
+
+
+cache_consultas = QueryCache()
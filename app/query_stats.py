@@ -0,0 +1,323 @@
+"""
+Instrumentação das consultas SQLite
+
+Toda conexão criada por database.get_db_connection usa
+ConexaoInstrumentada: cada statement tem o tempo (execute + fetch) e as
+linhas retornadas registrados em estatisticas_consultas, agrupados pelo
+SQL normalizado (literais viram "?"). Statements acima de SLOW_QUERY_MS
+vão para o log de consultas lentas com o EXPLAIN QUERY PLAN.
+
+Nem o log nem as estatísticas guardam valores: só o SQL normalizado e o
+tipo/tamanho dos parâmetros (senhas e tokens também passam por aqui).
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+from functools import lru_cache
+
+from app import timing, tracing
+
+logger = logging.getLogger("app.slow_queries")
+
+# Limite (ms) para uma consulta entrar no log de consultas lentas
+LIMITE_LENTA_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+# Arquivo opcional (JSON por linha) do log de consultas lentas
+ARQUIVO_LENTAS = os.environ.get("SLOW_QUERY_LOG")
+
+# Amostras guardadas por statement para os percentis
+MAX_AMOSTRAS = 1000
+
+# Statements distintos acompanhados; os demais somam em CONSULTAS_OUTRAS
+# (cada payload novo de um scanner de injeção vira um statement)
+MAX_CONSULTAS = int(os.environ.get("QUERY_STATS_MAX", "500"))
+CONSULTAS_OUTRAS = "(outras consultas)"
+
+LITERAIS_REGEX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+ESPACOS_REGEX = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalizar_consulta(sql):
+    """Troca literais por ? e colapsa espaços: agrupa variações da query"""
+    sql = LITERAIS_REGEX.sub("?", sql)
+    return ESPACOS_REGEX.sub(" ", sql).strip()
+
+
+def percentil(ordenadas, p):
+    """Percentil por posição (nearest-rank) de uma lista ordenada"""
+    if not ordenadas:
+        return 0.0
+    indice = max(0, int(round(p / 100 * len(ordenadas))) - 1)
+    return ordenadas[min(indice, len(ordenadas) - 1)]
+
+
+def _descrever(valor):
+    """Tipo (e tamanho, em textos e bytes) de um parâmetro, sem o valor"""
+    tipo = type(valor).__name__
+    if isinstance(valor, (str, bytes)):
+        return f"{tipo}({len(valor)})"
+    return tipo
+
+
+class _Estatistica:
+    __slots__ = ("contagem", "erros", "tempo_total", "linhas", "amostras")
+
+    def __init__(self):
+        self.contagem = 0
+        self.erros = 0
+        self.tempo_total = 0.0
+        self.linhas = 0
+        self.amostras = deque(maxlen=MAX_AMOSTRAS)
+
+
+class EstatisticasConsultas:
+    """Estatísticas por statement normalizado e log de consultas lentas"""
+
+    def __init__(self):
+        self.ativo = os.environ.get("QUERY_STATS", "1") != "0"
+        self._lock = threading.Lock()
+        self._por_consulta = {}
+        self._lentas = deque(maxlen=200)
+
+    def registrar(self, sql, duracao, linhas, erro=False):
+        """Registra uma execução; retorna True se foi lenta"""
+        chave = normalizar_consulta(sql)
+        with self._lock:
+            estatistica = self._por_consulta.get(chave)
+            if estatistica is None:
+                if len(self._por_consulta) >= MAX_CONSULTAS:
+                    chave = CONSULTAS_OUTRAS
+                    estatistica = self._por_consulta.get(chave)
+                if estatistica is None:
+                    estatistica = self._por_consulta[chave] = _Estatistica()
+            estatistica.contagem += 1
+            estatistica.erros += erro
+            estatistica.tempo_total += duracao
+            estatistica.linhas += linhas
+            estatistica.amostras.append(duracao)
+        return duracao * 1000 >= LIMITE_LENTA_MS
+
+    def registrar_lenta(self, sql, params, duracao, linhas, plano):
+        """Guarda a consulta lenta em memória, no logger e no arquivo"""
+        entrada = {
+            "quando": time.time(),
+            "consulta": normalizar_consulta(sql),
+            "parametros": (
+                {k: _descrever(v) for k, v in params.items()}
+                if isinstance(params, dict)
+                else [_descrever(p) for p in params]
+            ),
+            "tempo_ms": round(duracao * 1000, 3),
+            "linhas": linhas,
+            "plano": plano,
+        }
+        with self._lock:
+            self._lentas.append(entrada)
+        linha = json.dumps(entrada, ensure_ascii=False)
+        logger.warning(linha)
+        if ARQUIVO_LENTAS:
+            with open(ARQUIVO_LENTAS, "a", encoding="utf-8") as arquivo:
+                arquivo.write(linha + "\n")
+
+    def resumo(self):
+        """Estatísticas de todas as consultas, da mais cara para a menos"""
+        with self._lock:
+            itens = [
+                (
+                    chave,
+                    e.contagem,
+                    e.erros,
+                    e.tempo_total,
+                    e.linhas,
+                    sorted(e.amostras),
+                )
+                for chave, e in self._por_consulta.items()
+            ]
+
+        resultado = []
+        for chave, contagem, erros, total, linhas, amostras in itens:
+            resultado.append(
+                {
+                    "consulta": chave,
+                    "contagem": contagem,
+                    "erros": erros,
+                    "linhas": linhas,
+                    "tempo_total_ms": round(total * 1000, 3),
+                    "tempo_medio_ms": round(total / contagem * 1000, 3),
+                    "p50_ms": round(percentil(amostras, 50) * 1000, 3),
+                    "p95_ms": round(percentil(amostras, 95) * 1000, 3),
+                    "p99_ms": round(percentil(amostras, 99) * 1000, 3),
+                }
+            )
+        resultado.sort(key=lambda c: c["tempo_total_ms"], reverse=True)
+        return resultado
+
+    def lentas(self):
+        """Consultas lentas mais recentes primeiro"""
+        with self._lock:
+            return list(reversed(self._lentas))
+
+    def limpar(self):
+        with self._lock:
+            self._por_consulta.clear()
+            self._lentas.clear()
+
+
+estatisticas_consultas = EstatisticasConsultas()
+
+
+def plano_consulta(conn, sql, params):
+    """EXPLAIN QUERY PLAN da consulta (cursor não instrumentado)"""
+    try:
+        cursor = sqlite3.Cursor(conn)
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in cursor.fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Cursor que mede execute + fetch de cada statement
+
+    O tempo do statement é acumulado até o resultado acabar (fetch vazio),
+    o cursor ser reutilizado/fechado ou a conexão ser fechada.
+    """
+
+    _sql = None
+
+    def execute(self, sql, params=()):
+        self._finalizar()
+        self._iniciar(sql, params)
+        return self._medir("db_execute", super().execute, sql, params)
+
+    def executemany(self, sql, params):
+        self._finalizar()
+        self._iniciar(sql, ())
+        resultado = self._medir("db_execute", super().executemany, sql, params)
+        self._linhas = max(self.rowcount, 0)
+        self._finalizar()
+        return resultado
+
+    def fetchone(self):
+        row = self._medir("db_fetch", super().fetchone)
+        if row is None:
+            self._finalizar()
+        elif self._sql is not None:
+            self._linhas += 1
+        return row
+
+    def fetchmany(self, size=None):
+        tamanho = self.arraysize if size is None else size
+        rows = self._medir("db_fetch", super().fetchmany, tamanho)
+        if self._sql is not None:
+            self._linhas += len(rows)
+        if len(rows) < tamanho:
+            self._finalizar()
+        return rows
+
+    def fetchall(self):
+        rows = self._medir("db_fetch", super().fetchall)
+        if self._sql is not None:
+            self._linhas += len(rows)
+        self._finalizar()
+        return rows
+
+    def close(self):
+        self._finalizar()
+        super().close()
+
+    def __del__(self):
+        # cursor descartado sem consumir tudo (ex.: conn.execute().fetchone())
+        self._finalizar()
+
+    def _iniciar(self, sql, params):
+        self._sql = sql
+        self._params = params
+        self._tempo = 0.0
+        self._linhas = 0
+        self._inicio = time.perf_counter()
+        self._span = tracing.span_atual()
+
+    def _registrar_span(self, sql, **atributos):
+        # duração do span: tempo em execute + fetch, não o intervalo todo
+        tracing.rastreador.registrar_filho(
+            self._span,
+            "sqlite",
+            self._inicio,
+            self._tempo,
+            consulta=normalizar_consulta(sql),
+            linhas=self._linhas,
+            **atributos,
+        )
+
+    def _medir(self, fase, funcao, *args):
+        # fase: db_execute ou db_fetch, somada ao tempo da requisição
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        except sqlite3.Error:
+            if self._sql is not None:
+                self._tempo += time.perf_counter() - inicio
+                estatisticas_consultas.registrar(
+                    self._sql, self._tempo, self._linhas, erro=True
+                )
+                self._registrar_span(self._sql, erro="sqlite3.Error")
+                self._sql = None
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            timing.acumular(fase, duracao)
+            if self._sql is not None:
+                self._tempo += duracao
+
+    def _finalizar(self):
+        if self._sql is None:
+            return
+        sql, params = self._sql, self._params
+        self._sql = None
+        lenta = estatisticas_consultas.registrar(
+            sql, self._tempo, self._linhas
+        )
+        self._registrar_span(sql)
+        if lenta:
+            estatisticas_consultas.registrar_lenta(
+                sql,
+                params,
+                self._tempo,
+                self._linhas,
+                plano_consulta(self.connection, sql, params),
+            )
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive de conn.execute) são medidos"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursores = weakref.WeakSet()
+
+    def cursor(self, factory=CursorInstrumentado):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, CursorInstrumentado):
+            self._cursores.add(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, params):
+        return self.cursor().executemany(sql, params)
+
+    def close(self):
+        for cursor in list(self._cursores):
+            cursor._finalizar()
+        super().close()
@@ -0,0 +1,121 @@
+"""
+Réplica em memória do banco para as rotas de leitura
+
+No startup o arquivo é copiado (API de backup do SQLite) para um banco
+em memória compartilhado (file:...?mode=memory&cache=shared), e as
+leituras das rotas seguras abrem conexões nele em vez do arquivo.
+
+A réplica guarda a versão dos dados (database.versao_dados) em que foi
+copiada. Quando a versão do arquivo muda, uma nova cópia é feita em
+segundo plano em outro banco em memória (buffer duplo) e trocada pelo
+nome ao final; enquanto isso as leituras vão para o arquivo, então
+nunca devolvem dados anteriores a uma escrita. Com o banco estável,
+nenhuma leitura toca o disco.
+"""
+
+import itertools
+import sqlite3
+import threading
+
+from app import database, timing
+from app.query_stats import ConexaoInstrumentada, estatisticas_consultas
+
+_sequencia = itertools.count(1)
+
+
+class ReplicaMemoria:
+    """Cópia em memória do banco, atualizada quando o arquivo muda"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or database.DB_PATH
+        self.atualizacoes = 0
+        self.leituras_disco = 0
+        self._lock = threading.Lock()
+        self._nome = None
+        self._versao = None
+        self._dono = None
+        self._atualizando = None
+
+    @property
+    def pronta(self):
+        return self._nome is not None
+
+    def iniciar(self):
+        """Faz a primeira cópia (bloqueante, chamada no startup)"""
+        self._atualizar()
+        return self
+
+    def parar(self):
+        """Libera a réplica (o banco em memória some com a última conexão)"""
+        self.aguardar()
+        with self._lock:
+            dono, self._dono = self._dono, None
+            self._nome = self._versao = None
+        if dono is not None:
+            dono.close()
+
+    def conexao(self, orcamento=None, **kwargs):
+        """
+        Conexão de leitura: na réplica se ela está na versão atual do
+        arquivo, senão no próprio arquivo (e dispara a atualização)
+        """
+        versao = database.monitor_versao.versao(self.db_path)
+        with self._lock:
+            nome = self._nome if versao == self._versao else None
+            if nome is None and self._dono is not None:
+                self._agendar_atualizacao()
+
+        if nome is None:
+            self.leituras_disco += 1
+            return database.get_db_connection(orcamento, **kwargs)
+
+        if estatisticas_consultas.ativo:
+            kwargs.setdefault("factory", ConexaoInstrumentada)
+        with timing.medir("db_connect"):
+            conn = sqlite3.connect(nome, uri=True, **kwargs)
+        conn.row_factory = sqlite3.Row
+        # a cópia é compartilhada: nenhuma conexão pode alterá-la
+        conn.execute("PRAGMA query_only = ON")
+        if orcamento is not None:
+            orcamento.aplicar(conn)
+        return conn
+
+    def aguardar(self):
+        """Espera a atualização em andamento (usado nos testes)"""
+        atualizando = self._atualizando
+        if atualizando is not None:
+            atualizando.join()
+
+    def _agendar_atualizacao(self):
+        # chamado com self._lock adquirido
+        if self._atualizando is None:
+            self._atualizando = threading.Thread(
+                target=self._atualizar, name="replica-memoria", daemon=True
+            )
+            self._atualizando.start()
+
+    def _atualizar(self):
+        try:
+            # versão lida antes da cópia: uma escrita durante o backup
+            # deixa a réplica "velha" e provoca outra atualização
+            versao = database.monitor_versao.versao(self.db_path)
+            nome = f"file:replica_{id(self)}_{next(_sequencia)}"
+            nome += "?mode=memory&cache=shared"
+            dono = sqlite3.connect(nome, uri=True, check_same_thread=False)
+            fonte = sqlite3.connect(self.db_path)
+            try:
+                fonte.backup(dono)
+            finally:
+                fonte.close()
+
+            with self._lock:
+                antigo, self._dono = self._dono, dono
+                self._nome, self._versao = nome, versao
+                self.atualizacoes += 1
+            # conexões ainda abertas na cópia antiga continuam válidas
+            if antigo is not None:
+                antigo.close()
+        finally:
+            with self._lock:
+                if self._atualizando is threading.current_thread():
+                    self._atualizando = None
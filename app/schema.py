@@ -0,0 +1,460 @@
+"""
+Schema do banco de dados e migrações
+
+As migrações são numeradas pela posição em MIGRACOES e a versão aplicada
+fica em PRAGMA user_version (cabeçalho do arquivo, leitura O(1)). Todas
+são idempotentes e nenhuma remove dados.
+
+Usado pelo init_db.py ao criar o banco, pelo startup do app
+(inicializar_banco) e manualmente:
+
+    python -m app.schema
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from app import database
+
+# Tabelas lidas a cada requisição: páginas pré-carregadas no startup
+TABELAS_QUENTES = ("users", "products")
+
+
+# =============================================================================
+# Tabelas principais
+# =============================================================================
+
+
+def criar_tabelas(conn):
+    """Cria as tabelas principais (users, products, orders)"""
+
+    # Criar tabela de usuários
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            email TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            active INTEGER DEFAULT 1
+        )
+    """)
+
+    # Criar tabela de produtos
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            stock INTEGER DEFAULT 0,
+            category TEXT
+        )
+    """)
+
+    # Criar tabela de pedidos
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            total REAL NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        )
+    """)
+
+
+# =============================================================================
+# Índices
+# =============================================================================
+
+
+def criar_indices(conn):
+    """Índices secundários usados pelas consultas do app"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_category "
+        "ON products (category)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders (user_id)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_product_id "
+        "ON orders (product_id)"
+    )
+
+
+# =============================================================================
+# Busca textual de produtos (FTS5)
+# =============================================================================
+
+
+def criar_fts_produtos(conn):
+    """
+    Cria a tabela virtual FTS5 de produtos e os triggers de sincronização
+
+    A tabela usa products como "external content": o índice guarda apenas
+    os tokens, e os triggers mantêm o índice igual à tabela a cada
+    INSERT/UPDATE/DELETE. O índice é sempre reconstruído a partir dos
+    produtos já cadastrados: a migração roda uma vez, na mesma transação
+    que grava a versão, então uma falha no meio não deixa uma tabela
+    existente com o índice vazio.
+    """
+    # remove_diacritics: "eletronicos" encontra "Eletrônicos"
+    # prefix: índices auxiliares para buscas por prefixo ("note*")
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name,
+            description,
+            content='products',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+    """)
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ai
+        AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ad
+        AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_au
+        AFTER UPDATE OF id, name, description ON products BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO products_fts (rowid, name, description)
+            VALUES (new.id, new.name, new.description);
+        END
+    """)
+
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+# =============================================================================
+# Resumos de pedidos (mantidos por triggers)
+# =============================================================================
+
+# tabela de resumo -> expressão da chave a partir da linha de orders
+RESUMOS_PEDIDOS = {
+    "order_stats_user": "user_id",
+    "order_stats_product": "product_id",
+    "order_stats_status": "status",
+}
+
+
+def _chave_resumo(coluna, linha):
+    """Expressão da chave para new/old (status nulo vira '')"""
+    if coluna == "status":
+        return f"coalesce({linha}.status, '')"
+    return f"{linha}.{coluna}"
+
+
+def _somar_pedido(tabela, coluna, linha, sinal):
+    """SQL que soma (sinal=+1) ou subtrai (sinal=-1) um pedido do resumo"""
+    chave = _chave_resumo(coluna, linha)
+    if sinal > 0:
+        return f"""
+            INSERT INTO {tabela} ({coluna}, pedidos, unidades, receita)
+            VALUES ({chave}, 1, {linha}.quantity, {linha}.total)
+            ON CONFLICT ({coluna}) DO UPDATE SET
+                pedidos = pedidos + 1,
+                unidades = unidades + excluded.unidades,
+                receita = receita + excluded.receita;
+        """
+    return f"""
+            UPDATE {tabela} SET
+                pedidos = pedidos - 1,
+                unidades = unidades - {linha}.quantity,
+                receita = receita - {linha}.total
+            WHERE {coluna} = {chave};
+            DELETE FROM {tabela} WHERE {coluna} = {chave} AND pedidos = 0;
+        """
+
+
+def criar_resumos_pedidos(conn):
+    """
+    Cria as tabelas de resumo de pedidos e os triggers que as atualizam
+
+    Cada INSERT/UPDATE/DELETE em orders ajusta apenas as linhas de resumo
+    afetadas, então receita por usuário, unidades por produto e pedidos
+    por status são leituras diretas, sem GROUP BY sobre todos os pedidos.
+    Os resumos são sempre recalculados a partir de orders (como o índice
+    de criar_fts_produtos).
+    """
+    for tabela, coluna in RESUMOS_PEDIDOS.items():
+        tipo = "TEXT" if coluna == "status" else "INTEGER"
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabela} (
+                {coluna} {tipo} PRIMARY KEY NOT NULL,
+                pedidos INTEGER NOT NULL,
+                unidades INTEGER NOT NULL,
+                receita REAL NOT NULL
+            )
+        """)
+
+    # Ordenação dos rankings sem varrer o resumo inteiro
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_order_stats_user_receita "
+        "ON order_stats_user (receita)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_order_stats_product_unidades "
+        "ON order_stats_product (unidades)"
+    )
+
+    inserir = "".join(
+        _somar_pedido(t, c, "new", +1) for t, c in RESUMOS_PEDIDOS.items()
+    )
+    remover = "".join(
+        _somar_pedido(t, c, "old", -1) for t, c in RESUMOS_PEDIDOS.items()
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS orders_stats_ai
+        AFTER INSERT ON orders BEGIN {inserir} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS orders_stats_ad
+        AFTER DELETE ON orders BEGIN {remover} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS orders_stats_au
+        AFTER UPDATE OF user_id, product_id, quantity, total, status
+        ON orders BEGIN {remover} {inserir} END
+    """)
+
+    reconstruir_resumos_pedidos(conn)
+
+
+def reconstruir_resumos_pedidos(conn):
+    """Recalcula todos os resumos a partir da tabela orders"""
+    for tabela, coluna in RESUMOS_PEDIDOS.items():
+        chave = "coalesce(status, '')" if coluna == "status" else coluna
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(f"""
+            INSERT INTO {tabela} ({coluna}, pedidos, unidades, receita)
+            SELECT {chave}, COUNT(*), SUM(quantity), SUM(total)
+            FROM orders
+            GROUP BY {chave}
+        """)
+
+
+# =============================================================================
+# Índices do catálogo (filtros e ordenação de /products/catalog)
+# =============================================================================
+
+# Combinações atendidas:
+# - categoria + ordem por preço  -> (category, price)
+# - categoria + ordem por nome   -> (category, name), ou (category, price)
+#   com faixa de preço
+# - sem categoria, ordem por preço -> (price)
+# - sem categoria, ordem por nome  -> (name), ou (price) com faixa de
+#   preço
+# - só em estoque                -> índices parciais de INDICES_ESTOQUE
+INDICES_CATALOGO = {
+    "idx_products_category_price": "products (category, price)",
+    "idx_products_category_name": "products (category, name)",
+    "idx_products_price": "products (price)",
+    "idx_products_name": "products (name)",
+}
+
+
+def criar_indices_catalogo(conn):
+    """Índices compostos para os filtros/ordenações do catálogo"""
+    for nome, definicao in INDICES_CATALOGO.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+
+
+# Parciais: só os produtos em estoque, já na ordem do catálogo; o filtro
+# em_estoque sem categoria percorre apenas linhas que o satisfazem
+INDICES_ESTOQUE = {
+    "idx_products_estoque_price": "products (price) WHERE stock > 0",
+    "idx_products_estoque_name": "products (name) WHERE stock > 0",
+}
+
+
+def criar_indices_estoque(conn):
+    """Índices parciais para o filtro em_estoque do catálogo"""
+    for nome, definicao in INDICES_ESTOQUE.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+
+
+# =============================================================================
+# Geração da tabela users (invalidação do índice em memória)
+# =============================================================================
+
+
+def criar_geracao_usuarios(conn):
+    """
+    Contador incrementado por triggers a cada escrita em users
+
+    O índice de usuários (app/user_index.py) só recarrega a tabela quando
+    o contador muda, e não a cada escrita em pedidos ou produtos.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users_geracao (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            geracao INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO users_geracao VALUES (1, 0)")
+    for sufixo, evento in (
+        ("ai", "INSERT"),
+        ("ad", "DELETE"),
+        ("au", "UPDATE"),
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS users_geracao_{sufixo}
+            AFTER {evento} ON users BEGIN
+                UPDATE users_geracao SET geracao = geracao + 1;
+            END
+        """)
+
+
+# =============================================================================
+# Migrações e inicialização
+# =============================================================================
+
+# A migração N (1, 2, ...) é MIGRACOES[N - 1]. Só acrescente no final.
+MIGRACOES = [
+    criar_tabelas,
+    criar_indices,
+    criar_fts_produtos,
+    criar_resumos_pedidos,
+    criar_indices_catalogo,
+    criar_geracao_usuarios,
+    criar_indices_estoque,
+]
+
+SCHEMA_VERSION = len(MIGRACOES)
+
+# Espera (s) pelo lock de escrita quando outro processo está migrando
+ESPERA_MIGRACAO = 300
+
+
+def versao_schema(conn):
+    """Versão do schema gravada no banco (0 = nunca migrado)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    """
+    Aplica apenas as migrações que faltam, cada uma em sua transação
+
+    O sqlite3 do Python não abre transação para CREATE (o DDL seria
+    gravado na hora): as migrações rodam com BEGIN IMMEDIATE explícito, e
+    o DDL, os dados derivados e o user_version são gravados juntos ou não
+    são. Com vários processos subindo juntos (uvicorn --workers), um
+    espera o outro (busy timeout da conexão) e, já dentro da transação,
+    relê a versão e pula a migração que o outro aplicou.
+
+    Retorna a lista das versões aplicadas. Bancos criados antes do
+    controle de versão (user_version = 0) funcionam: as migrações usam
+    IF NOT EXISTS e reconstroem índices derivados a partir dos dados.
+    """
+    atual = versao_schema(conn)
+    if atual > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Banco na versão {atual}, mais nova que a do app "
+            f"({SCHEMA_VERSION})"
+        )
+
+    if conn.in_transaction:
+        conn.commit()
+    isolamento = conn.isolation_level
+    conn.isolation_level = None
+    aplicadas = []
+    try:
+        for versao in range(atual + 1, SCHEMA_VERSION + 1):
+            conn.execute("BEGIN IMMEDIATE")
+            if versao_schema(conn) >= versao:
+                conn.execute("COMMIT")
+                continue
+            try:
+                MIGRACOES[versao - 1](conn)
+                conn.execute(f"PRAGMA user_version = {versao}")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            aplicadas.append(versao)
+    finally:
+        conn.isolation_level = isolamento
+    return aplicadas
+
+
+def aquecer_cache(db_path, tabelas=TABELAS_QUENTES):
+    """
+    Lê todas as páginas das tabelas quentes para o cache do sistema
+
+    COUNT(*) com NOT INDEXED percorre as folhas da própria tabela (e não
+    um índice menor), trazendo as páginas do disco uma única vez. Retorna
+    as linhas lidas por tabela.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            tabela: conn.execute(
+                f"SELECT COUNT(*) FROM {tabela} NOT INDEXED"
+            ).fetchone()[0]
+            for tabela in tabelas
+        }
+    finally:
+        conn.close()
+
+
+def inicializar_banco(db_path=None, aquecer=True):
+    """
+    Prepara o banco para o app sem nunca apagar dados
+
+    - banco inexistente: cria o schema vazio
+    - versão antiga: aplica só as migrações que faltam
+    - versão atual: apenas lê user_version (milissegundos)
+
+    O aquecimento do cache roda em uma thread em segundo plano para não
+    atrasar o startup.
+    """
+    db_path = db_path or database.DB_PATH
+    inicio = time.perf_counter()
+
+    conn = sqlite3.connect(db_path, timeout=ESPERA_MIGRACAO)
+    try:
+        versao = versao_schema(conn)
+        aplicadas = aplicar_migracoes(conn) if versao != SCHEMA_VERSION else []
+    finally:
+        conn.close()
+
+    if aquecer and os.environ.get("DB_WARM", "1") != "0":
+        threading.Thread(
+            target=aquecer_cache, args=(db_path,), daemon=True
+        ).start()
+
+    return {
+        "versao_anterior": versao,
+        "versao": SCHEMA_VERSION,
+        "migracoes_aplicadas": aplicadas,
+        "tempo": time.perf_counter() - inicio,
+    }
+
+
+if __name__ == "__main__":
+    resultado = inicializar_banco(aquecer=False)
+    print(
+        f"Banco '{database.DB_PATH}' na versão {resultado['versao']} "
+        f"(migrações aplicadas: {resultado['migracoes_aplicadas'] or '-'})"
+    )
@@ -0,0 +1,187 @@
+"""
+Sessões emitidas pelo login seguro
+
+O login (hash scrypt) acontece uma vez; depois o cliente envia o token
+no header Authorization: Bearer <token>. O token é assinado com HMAC
+(SESSION_SECRET ou uma chave aleatória do processo) e carrega o id da
+sessão, o usuário e a expiração, então validar custa uma verificação de
+assinatura e uma busca no cache LRU, nunca uma consulta ao banco.
+
+O cache guarda as sessões ativas (até MAX_SESSOES, expiradas pelo TTL).
+Uma sessão que saiu do cache por LRU (ou foi emitida por outro processo
+com a mesma chave) continua válida pela assinatura; logout grava o id
+em uma lista de revogadas até o token expirar.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Depends, Header, HTTPException
+
+TTL_SEGUNDOS = int(os.environ.get("SESSION_TTL", "3600"))
+MAX_SESSOES = int(os.environ.get("SESSION_CACHE_SIZE", "10000"))
+
+
+def _b64(dados):
+    return base64.urlsafe_b64encode(dados).rstrip(b"=").decode("ascii")
+
+
+def _de_b64(texto):
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+class Sessao:
+    """Sessão autenticada (dados públicos do usuário)"""
+
+    __slots__ = ("sid", "user_id", "username", "role", "expira")
+
+    def __init__(self, sid, user_id, username, role, expira):
+        self.sid = sid
+        self.user_id = user_id
+        self.username = username
+        self.role = role
+        self.expira = expira
+
+    def como_dict(self):
+        return {
+            "user_id": self.user_id,
+            "username": self.username,
+            "role": self.role,
+            "expira_em": self.expira,
+        }
+
+
+class CacheSessoes:
+    """Emissão e validação de tokens com cache LRU/TTL das sessões"""
+
+    def __init__(
+        self, segredo=None, ttl=TTL_SEGUNDOS, max_sessoes=MAX_SESSOES
+    ):
+        segredo = segredo or os.environ.get("SESSION_SECRET")
+        self._chave = segredo.encode() if segredo else secrets.token_bytes(32)
+        self.ttl = ttl
+        self.max_sessoes = max_sessoes
+        self.acertos = 0
+        self.faltas = 0
+        self._lock = threading.Lock()
+        self._sessoes = OrderedDict()
+        self._revogadas = {}
+
+    def _assinar(self, payload):
+        return hmac.new(self._chave, payload, hashlib.sha256).digest()
+
+    def emitir(self, usuario):
+        """Cria a sessão do usuário (dict com id, username, role)"""
+        sessao = Sessao(
+            secrets.token_urlsafe(16),
+            usuario["id"],
+            usuario["username"],
+            usuario.get("role"),
+            int(time.time()) + self.ttl,
+        )
+        payload = json.dumps(
+            [
+                sessao.sid,
+                sessao.user_id,
+                sessao.username,
+                sessao.role,
+                sessao.expira,
+            ],
+            separators=(",", ":"),
+        ).encode("utf-8")
+        token = f"{_b64(payload)}.{_b64(self._assinar(payload))}"
+        self._guardar(token, sessao)
+        return token, sessao
+
+    def _guardar(self, token, sessao):
+        with self._lock:
+            self._sessoes[token] = sessao
+            self._sessoes.move_to_end(token)
+            while len(self._sessoes) > self.max_sessoes:
+                self._sessoes.popitem(last=False)
+
+    def _decodificar(self, token):
+        """Sessão contida no token se a assinatura confere, senão None"""
+        try:
+            payload, assinatura = token.split(".")
+            payload = _de_b64(payload)
+            assinatura = _de_b64(assinatura)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(self._assinar(payload), assinatura):
+            return None
+        return Sessao(*json.loads(payload))
+
+    def validar(self, token):
+        """Sessão válida do token ou None"""
+        # o cache é indexado pelo token inteiro (assinatura incluída): a
+        # assinatura só é verificada quando a sessão não está no cache
+        with self._lock:
+            sessao = self._sessoes.get(token)
+            if sessao is not None:
+                self._sessoes.move_to_end(token)
+                self.acertos += 1
+            else:
+                self.faltas += 1
+
+        if sessao is None:
+            sessao = self._decodificar(token)
+            if sessao is None or sessao.sid in self._revogadas:
+                return None
+            self._guardar(token, sessao)
+
+        if sessao.expira <= time.time():
+            self.revogar(token, sessao)
+            return None
+        return sessao
+
+    def revogar(self, token, sessao):
+        """Encerra a sessão (logout): o token deixa de ser aceito"""
+        agora = time.time()
+        with self._lock:
+            self._sessoes.pop(token, None)
+            self._revogadas[sessao.sid] = sessao.expira
+            # limpa revogações de tokens que já expiraram
+            for sid, expira in list(self._revogadas.items()):
+                if expira <= agora:
+                    del self._revogadas[sid]
+
+    def limpar(self):
+        with self._lock:
+            self._sessoes.clear()
+            self._revogadas.clear()
+            self.acertos = self.faltas = 0
+
+
+cache_sessoes = CacheSessoes()
+
+
+def token_do_header(authorization: str | None = Header(None)):
+    """Dependência: token do header Authorization: Bearer <token>"""
+    esquema, _, token = (authorization or "").partition(" ")
+    if esquema.lower() != "bearer" or not token.strip():
+        raise HTTPException(
+            status_code=401,
+            detail="Sessão inválida ou expirada",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token.strip()
+
+
+def sessao_atual(token: str = Depends(token_do_header)):
+    """Dependência: sessão válida do token (401 se inválida/expirada)"""
+    sessao = cache_sessoes.validar(token)
+    if sessao is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Sessão inválida ou expirada",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return sessao
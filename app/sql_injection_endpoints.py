@@ -3,21 +3,70 @@ Endpoints de SQL Injection
 Aula: Testando Vulnerabilidades - SQL Injection
 """
 
-import sqlite3
+import json
+import os
 import time
-from fastapi import APIRouter
+from typing import Literal
 
-router = APIRouter()
+from fastapi import APIRouter, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
-# Caminho do banco de dados
-DB_PATH = "database.db"
+from app.bulkhead import bulkhead_demo
+from app.database import (
+    OrcamentoConsulta,
+    get_db_connection,
+    get_read_connection,
+    registrar_escrita,
+)
+from app.passwords import credencial, e_hash, servico_senhas
+from app.query_cache import cache_consultas
+from app.sessions import cache_sessoes
+from app.streaming import resposta_streaming
+from app.timing import RotaMedida
+from app.user_index import indice_usuarios
 
+router = APIRouter(route_class=RotaMedida)
 
-def get_db_connection():
-    """Cria conexão com o banco"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Máximo de IDs por verificação em lote
+MAX_IDS_LOTE = 1000
+
+# Orçamento de execução das rotas vulneráveis: scanners (ZAP, sqlmap)
+# disparam consultas pesadas que prenderiam a thread por segundos.
+# Essas rotas também rodam isoladas no bulkhead_demo (app/bulkhead.py).
+ORCAMENTO_BUSCA_VULNERAVEL = OrcamentoConsulta(segundos=1.0, passos=50_000_000)
+ORCAMENTO_BLIND_VULNERAVEL = OrcamentoConsulta(segundos=0.25, passos=5_000_000)
+
+# Padrão do caminho rápido (JSON montado pelo SQLite), ver json_nativo
+JSON_NATIVO = os.environ.get("SQLITE_JSON_NATIVO") == "1"
+
+# Colunas de products na ordem do SELECT *
+COLUNAS_PRODUTOS = ("id", "name", "description", "price", "stock", "category")
+
+
+class LoteIds(BaseModel):
+    """Corpo das verificações em lote"""
+
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_IDS_LOTE)
+
+
+def verificar_existencia_lote(tabela, ids):
+    """
+    Verifica quais IDs existem na tabela com uma única consulta
+
+    Os IDs vão como um único parâmetro JSON (json_each), então o tamanho
+    do lote não esbarra no limite de variáveis do SQLite. A tabela vem
+    sempre do código, nunca do usuário.
+    """
+    ids = list(dict.fromkeys(ids))
+    query = (
+        f"SELECT id FROM {tabela} "
+        "WHERE id IN (SELECT value FROM json_each(?))"
+    )
+    linhas = cache_consultas.consultar(query, (json.dumps(ids),))
+
+    encontrados = {row["id"] for row in linhas}
+    return {str(i): i in encontrados for i in ids}
 
 
 # =============================================================================
@@ -26,6 +75,7 @@ def get_db_connection():
 
 
 @router.get("/users/search-vulnerable")
+@bulkhead_demo.isolar
 def search_users_vulnerable(username: str):
     """
     VULNERÁVEL - SQL Injection (Error-Based)
@@ -43,7 +93,7 @@ def search_users_vulnerable(username: str):
     - username=' UNION SELECT null, username, password, email,
       null, null FROM users --
     """
-    conn = get_db_connection()
+    conn = bulkhead_demo.conexao(orcamento=ORCAMENTO_BUSCA_VULNERAVEL)
     cursor = conn.cursor()
 
     # VULNERÁVEL: Concatenação de string
@@ -62,6 +112,7 @@ def search_users_vulnerable(username: str):
         }
     except Exception as e:
         conn.close()
+        ORCAMENTO_BUSCA_VULNERAVEL.verificar(e)
         return {
             "aviso": "ENDPOINT VULNERÁVEL",
             "erro": str(e),
@@ -79,16 +130,25 @@ def search_users_secure(username: str):
     Mesmo testando ataques, não funciona:
     - username=' OR '1'='1
     - username=admin' --
-    """
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
+    Com o índice de usuários ativo (app/user_index.py) a busca não abre
+    conexão; a senha nunca é devolvida.
+    """
     # SEGURO: Prepared statement com placeholder
-    query = "SELECT * FROM users WHERE username = ?"
-    cursor.execute(query, (username,))
-
-    users = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    query = (
+        "SELECT id, username, email, role, active FROM users "
+        "WHERE username = ?"
+    )
+
+    if indice_usuarios.ativo:
+        registro = indice_usuarios.buscar(username)
+        users = [registro.como_dict()] if registro is not None else []
+    else:
+        conn = get_read_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, (username,))
+        users = [dict(row) for row in cursor.fetchall()]
+        conn.close()
 
     return {
         "tipo": "SEGURO - Prepared Statement",
@@ -105,6 +165,7 @@ def search_users_secure(username: str):
 
 
 @router.get("/products/search-vulnerable")
+@bulkhead_demo.isolar
 def search_products_vulnerable(category: str):
     """
     VULNERÁVEL - SQL Injection Union-Based
@@ -117,7 +178,7 @@ def search_products_vulnerable(category: str):
     - category=' UNION SELECT id, username, email, role,
       null, null FROM users WHERE role='admin' --
     """
-    conn = get_db_connection()
+    conn = bulkhead_demo.conexao(orcamento=ORCAMENTO_BUSCA_VULNERAVEL)
     cursor = conn.cursor()
 
     # VULNERÁVEL
@@ -136,6 +197,7 @@ def search_products_vulnerable(category: str):
         }
     except Exception as e:
         conn.close()
+        ORCAMENTO_BUSCA_VULNERAVEL.verificar(e)
         return {
             "aviso": "ENDPOINT VULNERÁVEL",
             "erro": str(e),
@@ -143,21 +205,52 @@ def search_products_vulnerable(category: str):
         }
 
 
+def json_object_sql(colunas):
+    """Monta json_object('col', col, ...) para as colunas (fixas no código)"""
+    pares = ", ".join(f"'{coluna}', {coluna}" for coluna in colunas)
+    return f"json_object({pares})"
+
+
 @router.get("/products/search-secure")
-def search_products_secure(category: str):
+def search_products_secure(category: str, json_nativo: bool | None = None):
     """
     SEGURO - Union-Based não funciona com prepared statements
+
+    Com json_nativo=true a resposta inteira é montada pelo próprio SQLite
+    (json_group_array/json_object) e devolvida como bytes, sem criar um
+    dict por linha nem recodificar em Python. O conteúdo é o mesmo do
+    caminho padrão.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    if json_nativo is None:
+        json_nativo = JSON_NATIVO
+
+    if json_nativo:
+        produto = json_object_sql(COLUNAS_PRODUTOS)
+        query = (
+            "SELECT json_object('tipo', 'SEGURO', 'total', COUNT(*), "
+            f"'products', json_group_array({produto})) AS resposta "
+            "FROM (SELECT * FROM products WHERE category = ? ORDER BY id)"
+        )
+        resposta = cache_consultas.consultar(query, (category,))[0]
+        return Response(resposta["resposta"], media_type="application/json")
+
+    query = "SELECT * FROM products WHERE category = ? ORDER BY id"
+    results = cache_consultas.consultar(query, (category,))
 
-    query = "SELECT * FROM products WHERE category = ?"
-    cursor.execute(query, (category,))
+    return {"tipo": "SEGURO", "total": len(results), "products": results}
 
-    results = [dict(row) for row in cursor.fetchall()]
-    conn.close()
 
-    return {"tipo": "SEGURO", "total": len(results), "products": results}
+@router.get("/products/search-secure/stream")
+def search_products_secure_stream(
+    category: str, formato: Literal["ndjson", "csv"] = "ndjson"
+):
+    """
+    SEGURO - Mesma busca, enviada em streaming (NDJSON ou CSV)
+
+    Para categorias grandes: memória constante e primeiros bytes imediatos
+    """
+    query = "SELECT * FROM products WHERE category = ? ORDER BY id"
+    return resposta_streaming(query, (category,), formato)
 
 
 # =============================================================================
@@ -166,6 +259,7 @@ def search_products_secure(category: str):
 
 
 @router.get("/products/check-vulnerable")
+@bulkhead_demo.isolar
 def check_product_vulnerable(product_id: str):
     """
     VULNERÁVEL - Boolean-Based Blind SQL Injection
@@ -181,7 +275,7 @@ def check_product_vulnerable(product_id: str):
     - product_id=1 AND (SELECT LENGTH(password) FROM users WHERE id=1) > 5
       (descobre tamanho da senha)
     """
-    conn = get_db_connection()
+    conn = bulkhead_demo.conexao(orcamento=ORCAMENTO_BLIND_VULNERAVEL)
     cursor = conn.cursor()
 
     # VULNERÁVEL - usa string diretamente sem validação
@@ -201,6 +295,7 @@ def check_product_vulnerable(product_id: str):
         }
     except Exception as e:
         conn.close()
+        ORCAMENTO_BLIND_VULNERAVEL.verificar(e)
         return {
             "aviso": "ENDPOINT VULNERÁVEL",
             "erro": str(e),
@@ -213,26 +308,41 @@ def check_product_secure(product_id: int):
     """
     SEGURO - Boolean-Based blind não funciona
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     query = "SELECT COUNT(*) as count FROM products WHERE id = ?"
-    cursor.execute(query, (product_id,))
-
-    result = cursor.fetchone()
-    conn.close()
+    result = cache_consultas.consultar(query, (product_id,))[0]
 
     exists = result["count"] > 0
 
     return {"tipo": "SEGURO", "produto_existe": exists}
 
 
+@router.get("/products/check-secure/batch")
+def check_products_secure_batch(
+    ids: list[int] = Query(..., min_length=1, max_length=MAX_IDS_LOTE),
+):
+    """
+    SEGURO - Verifica vários produtos de uma vez (?ids=1&ids=2...)
+    """
+    existem = verificar_existencia_lote("products", ids)
+    return {"tipo": "SEGURO", "total": len(existem), "produtos": existem}
+
+
+@router.post("/products/check-secure/batch")
+def check_products_secure_batch_post(lote: LoteIds):
+    """
+    SEGURO - Verifica vários produtos de uma vez ({"ids": [1, 2, ...]})
+    """
+    existem = verificar_existencia_lote("products", lote.ids)
+    return {"tipo": "SEGURO", "total": len(existem), "produtos": existem}
+
+
 # =============================================================================
 # EXEMPLO 4: SQL Injection - Time-Based Blind (VULNERÁVEL)
 # =============================================================================
 
 
 @router.get("/users/check-vulnerable")
+@bulkhead_demo.isolar
 def check_user_vulnerable(user_id: str):
     """
     VULNERÁVEL - Time-Based Blind SQL Injection
@@ -247,20 +357,20 @@ def check_user_vulnerable(user_id: str):
 
     Nota: SQLite não tem SLEEP(), mas é possível usar queries pesadas
     """
-    conn = get_db_connection()
+    conn = bulkhead_demo.conexao(orcamento=ORCAMENTO_BLIND_VULNERAVEL)
     cursor = conn.cursor()
 
     # VULNERÁVEL - usa string diretamente sem validação
     query = f"SELECT COUNT(*) as count FROM users WHERE id = {user_id}"
 
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     try:
         cursor.execute(query)
         result = cursor.fetchone()
         conn.close()
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
 
         return {
             "aviso": "ENDPOINT VULNERÁVEL - aceita string sem validação",
@@ -270,7 +380,8 @@ def check_user_vulnerable(user_id: str):
         }
     except Exception as e:
         conn.close()
-        elapsed = time.time() - start_time
+        ORCAMENTO_BLIND_VULNERAVEL.verificar(e)
+        elapsed = time.perf_counter() - start_time
 
         return {
             "aviso": "ENDPOINT VULNERÁVEL",
@@ -285,18 +396,12 @@ def check_user_secure(user_id: int):
     """
     SEGURO - Time-Based blind não funciona
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     query = "SELECT COUNT(*) as count FROM users WHERE id = ?"
-    cursor.execute(query, (user_id,))
+    result = cache_consultas.consultar(query, (user_id,))[0]
 
-    result = cursor.fetchone()
-    conn.close()
-
-    elapsed = time.time() - start_time
+    elapsed = time.perf_counter() - start_time
 
     return {
         "tipo": "SEGURO",
@@ -305,12 +410,33 @@ def check_user_secure(user_id: int):
     }
 
 
+@router.get("/users/check-secure/batch")
+def check_users_secure_batch(
+    ids: list[int] = Query(..., min_length=1, max_length=MAX_IDS_LOTE),
+):
+    """
+    SEGURO - Verifica vários usuários de uma vez (?ids=1&ids=2...)
+    """
+    existem = verificar_existencia_lote("users", ids)
+    return {"tipo": "SEGURO", "total": len(existem), "usuarios": existem}
+
+
+@router.post("/users/check-secure/batch")
+def check_users_secure_batch_post(lote: LoteIds):
+    """
+    SEGURO - Verifica vários usuários de uma vez ({"ids": [1, 2, ...]})
+    """
+    existem = verificar_existencia_lote("users", lote.ids)
+    return {"tipo": "SEGURO", "total": len(existem), "usuarios": existem}
+
+
 # =============================================================================
 # EXEMPLO 5: Login Vulnerável vs Seguro
 # =============================================================================
 
 
 @router.get("/auth/login-vulnerable")
+@bulkhead_demo.isolar
 def login_vulnerable(username: str, password: str):
     """
     VULNERÁVEL - Bypass de autenticação
@@ -320,7 +446,7 @@ def login_vulnerable(username: str, password: str):
     - username=' OR '1'='1' --&password=
     - username=admin' OR '1'='1&password=admin' OR '1'='1
     """
-    conn = get_db_connection()
+    conn = bulkhead_demo.conexao(orcamento=ORCAMENTO_BUSCA_VULNERAVEL)
     cursor = conn.cursor()
 
     # VULNERÁVEL
@@ -348,6 +474,7 @@ def login_vulnerable(username: str, password: str):
             }
     except Exception as e:
         conn.close()
+        ORCAMENTO_BUSCA_VULNERAVEL.verificar(e)
         return {
             "aviso": "ENDPOINT VULNERÁVEL",
             "erro": str(e),
@@ -355,32 +482,75 @@ def login_vulnerable(username: str, password: str):
         }
 
 
+def _credenciais(username):
+    """(usuário sem senha, credencial armazenada) ou (None, None)"""
+    if indice_usuarios.ativo:
+        registro = indice_usuarios.buscar(username)
+        if registro is None:
+            return None, None
+        return registro.como_dict(), registro.credencial
+
+    conn = get_read_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
+    user = cursor.fetchone()
+    conn.close()
+    if user is None:
+        return None, None
+    user_dict = dict(user)
+    return user_dict, credencial(user_dict.pop("password"))
+
+
+def _atualizar_hash(user_id, anterior, novo):
+    """Grava o novo hash se a senha não mudou desde a leitura"""
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                (novo, user_id, anterior),
+            )
+    finally:
+        conn.close()
+    registrar_escrita()
+
+
 @router.get("/auth/login-secure")
-def login_secure(username: str, password: str):
+async def login_secure(username: str, password: str):
     """
-    SEGURO - Prepared statement + hash de senha (simulado)
+    SEGURO - Prepared statement + hash de senha (scrypt)
 
-    Nota: Em produção, use bcrypt ou argon2 para senhas
+    O hash roda no pool de processos de app/passwords.py. Senhas legadas
+    em texto puro são convertidas para hash no primeiro login válido.
+    Usernames inexistentes também pagam um scrypt (hash fictício), para o
+    tempo de resposta não revelar quais existem. O login devolve um token
+    de sessão (app/sessions.py) para as requisições seguintes.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    query = "SELECT * FROM users WHERE username = ? AND password = ?"
-    cursor.execute(query, (username, password))
+    user_dict, armazenado = await run_in_threadpool(_credenciais, username)
 
-    user = cursor.fetchone()
-    conn.close()
+    if user_dict is not None:
+        confere, atualizar = await servico_senhas.verificar(
+            password, armazenado
+        )
+    else:
+        confere, atualizar = await servico_senhas.verificar_ausente(password)
 
-    if user:
-        user_dict = dict(user)
-        # Remover senha da resposta
-        user_dict.pop("password", None)
+    if confere:
+        if atualizar:
+            anterior = armazenado if e_hash(armazenado) else password
+            novo = await servico_senhas.gerar(password)
+            await run_in_threadpool(
+                _atualizar_hash, user_dict["id"], anterior, novo
+            )
 
+        token, sessao = cache_sessoes.emitir(user_dict)
         return {
             "tipo": "SEGURO",
             "sucesso": True,
             "mensagem": "Login realizado",
             "usuario": user_dict,
+            "token": token,
+            "expira_em": sessao.expira,
         }
     else:
         return {
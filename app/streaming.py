@@ -0,0 +1,91 @@
+"""
+Respostas em streaming (NDJSON/CSV) para resultados grandes do SQLite
+
+As linhas são lidas com fetchmany em lotes e enviadas assim que cada lote
+fica pronto: a memória usada não depende do tamanho do resultado e o
+cliente recebe os primeiros bytes sem esperar o fetchall().
+"""
+
+import csv
+import io
+import json
+
+from fastapi.responses import StreamingResponse
+
+from app.database import get_read_connection
+
+# Linhas lidas do banco por vez
+TAMANHO_LOTE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def ler_em_lotes(sql, params=(), tamanho_lote=TAMANHO_LOTE):
+    """
+    Gera (colunas, linhas) a cada lote de fetchmany
+
+    O primeiro lote é gerado mesmo vazio, para que quem consome receba as
+    colunas (cabeçalho do CSV) também quando a consulta não tem linhas.
+
+    A conexão é fechada quando o gerador termina ou é descartado (cliente
+    desconectou). O StreamingResponse consome o gerador em threads do pool,
+    por isso check_same_thread=False: o uso é sequencial, nunca simultâneo.
+    """
+    conn = get_read_connection(check_same_thread=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        colunas = [coluna[0] for coluna in cursor.description]
+        linhas = cursor.fetchmany(tamanho_lote)
+        yield colunas, linhas
+        while linhas:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if linhas:
+                yield colunas, linhas
+    finally:
+        conn.close()
+
+
+def gerar_ndjson(lotes):
+    """Um objeto JSON por linha"""
+    for colunas, linhas in lotes:
+        yield "".join(
+            json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n"
+            for linha in linhas
+        ).encode("utf-8")
+
+
+def gerar_csv(lotes):
+    """CSV com cabeçalho, enviado mesmo quando não há linhas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    cabecalho = True
+    for colunas, linhas in lotes:
+        if cabecalho:
+            writer.writerow(colunas)
+            cabecalho = False
+        writer.writerows(linhas)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def resposta_streaming(sql, params=(), formato="ndjson", nome_arquivo=None):
+    """StreamingResponse com o resultado da consulta em NDJSON ou CSV"""
+    lotes = ler_em_lotes(sql, params)
+    if formato == "csv":
+        conteudo = gerar_csv(lotes)
+    else:
+        conteudo = gerar_ndjson(lotes)
+
+    headers = {}
+    if nome_arquivo:
+        headers["Content-Disposition"] = (
+            f'attachment; filename="{nome_arquivo}.{formato}"'
+        )
+    return StreamingResponse(
+        conteudo, media_type=MEDIA_TYPES[formato], headers=headers
+    )
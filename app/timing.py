@@ -0,0 +1,165 @@
+"""
+Tempo por fase da requisição atual
+
+O middleware de métricas abre um acumulador por requisição (contextvar);
+o código instrumentado soma nele o tempo de cada fase (SQLite, API
+externa, ...). O dict é compartilhado com as threads do pool, que
+recebem uma cópia do contexto, então a soma vale também para as rotas
+síncronas. Fora de uma requisição, acumular() não faz nada.
+
+Com SERVER_TIMING=1 as fases também vão para o header Server-Timing da
+resposta (visível no DevTools do navegador).
+"""
+
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+
+from app.profiling import perfil_pendente, registro_perfis
+from app.tracing import rastreador
+
+# Envia o header Server-Timing em todas as respostas
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# Fases conhecidas, na ordem do header
+FASES = (
+    "upstream",  # API externa
+    "json_decode",  # decodificação do JSON da API externa
+    "db_connect",
+    "db_execute",
+    "db_fetch",
+    "serialize",  # do retorno do endpoint ao início da resposta
+)
+
+# Instante em que o endpoint retornou (marcado por RotaMedida)
+FIM_ENDPOINT = "_fim_endpoint"
+
+_fases = ContextVar("fases_requisicao", default=None)
+
+
+def iniciar():
+    """Novo acumulador para a requisição; retorna (fases, token)"""
+    fases = {}
+    return fases, _fases.set(fases)
+
+
+def encerrar(token):
+    _fases.reset(token)
+
+
+def fases_atuais():
+    """Acumulador da requisição atual (ou None)"""
+    return _fases.get()
+
+
+def acumular(fase, duracao):
+    """Soma a duração (segundos) na fase da requisição atual"""
+    fases = _fases.get()
+    if fases is not None:
+        fases[fase] = fases.get(fase, 0.0) + duracao
+
+
+@contextmanager
+def medir(fase):
+    """Mede o bloco e acumula na fase"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        acumular(fase, time.perf_counter() - inicio)
+
+
+def marcar_fim_endpoint():
+    fases = _fases.get()
+    if fases is not None:
+        fases[FIM_ENDPOINT] = time.perf_counter()
+
+
+def registrar_serializacao(fases):
+    """Tempo entre o fim do endpoint e o início da resposta"""
+    fim = fases.pop(FIM_ENDPOINT, None)
+    if fim is not None:
+        fases["serialize"] = time.perf_counter() - fim
+
+
+def _span_serializacao(span):
+    """Span do fim do endpoint até a resposta pronta"""
+    fases = _fases.get()
+    fim = fases.get(FIM_ENDPOINT) if fases is not None else None
+    if fim is not None:
+        agora = time.perf_counter()
+        rastreador.registrar_filho(span, "serialize", fim, agora - fim)
+
+
+def cabecalho_server_timing(fases, total):
+    """Valor do header Server-Timing (durações em ms)"""
+    partes = [
+        f"{fase};dur={fases[fase] * 1000:.3f}"
+        for fase in FASES
+        if fase in fases
+    ]
+    partes.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(partes)
+
+
+class RotaMedida(APIRoute):
+    """
+    Rota cujo endpoint marca o instante em que retornou
+
+    O que acontece entre esse instante e o início da resposta (validação
+    do retorno, jsonable_encoder, json.dumps) é a fase "serialize". O
+    endpoint também roda sob o profiler quando a requisição foi escolhida
+    para profiling (app/profiling.py), e o handler abre o span da rota
+    (app/tracing.py).
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def medido(*args, **kw):
+                perfil = perfil_pendente()
+                try:
+                    if perfil is None:
+                        return await endpoint(*args, **kw)
+                    with perfil:
+                        return await endpoint(*args, **kw)
+                finally:
+                    marcar_fim_endpoint()
+
+        else:
+
+            @functools.wraps(endpoint)
+            def medido(*args, **kw):
+                perfil = perfil_pendente()
+                try:
+                    if perfil is None:
+                        return endpoint(*args, **kw)
+                    with perfil:
+                        return endpoint(*args, **kw)
+                finally:
+                    marcar_fim_endpoint()
+
+        super().__init__(path, medido, **kwargs)
+
+    def get_route_handler(self):
+        manipulador = super().get_route_handler()
+        rota = self.path
+
+        async def manipular(request):
+            with rastreador.span_requisicao(request, rota) as span:
+                response = await registro_perfis.executar(
+                    manipulador, request, rota
+                )
+                if span is not None:
+                    _span_serializacao(span)
+                    span.atributos["http.status_code"] = response.status_code
+                    response.headers["X-Trace-Id"] = span.trace_id
+                return response
+
+        return manipular
@@ -0,0 +1,246 @@
+"""
+Tracing em processo (spans) com exportação local
+
+Com TRACING=1 cada requisição vira um trace: o span da rota e, como
+filhos, um span por chamada à API externa, um por statement SQLite
+(cursores instrumentados de app/query_stats.py) e o da serialização da
+resposta. O contexto segue o W3C Trace Context: um header traceparent
+recebido vira o pai do span da rota, e cada chamada à API externa envia
+o traceparent do próprio span. O id do trace volta no header X-Trace-Id.
+
+Os spans concluídos vão para um buffer circular em memória (TRACE_BUFFER
+spans, padrão 5000), lido em /admin/traces, e, com TRACE_FILE definido,
+também para um arquivo JSONL. Não há coletor externo. O arquivo é escrito
+por uma thread própria, com o arquivo sempre aberto: quem conclui o span
+só o coloca em uma fila limitada (cheia, o span fica só na memória).
+"""
+
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+
+TRACEPARENT_REGEX = re.compile(
+    r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$"
+)
+
+# perf_counter (monotônico) -> horário Unix, para exportar o início
+_OFFSET_EPOCH = time.time() - time.perf_counter()
+
+_span_atual = ContextVar("span_atual", default=None)
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "pai_id",
+        "nome",
+        "inicio",
+        "duracao",
+        "atributos",
+    )
+
+    def __init__(self, nome, trace_id, pai_id, inicio, atributos):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.pai_id = pai_id
+        self.nome = nome
+        self.inicio = inicio
+        self.duracao = None
+        self.atributos = atributos
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def como_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "pai_id": self.pai_id,
+            "nome": self.nome,
+            "inicio_unix_ns": int((self.inicio + _OFFSET_EPOCH) * 1e9),
+            "duracao_ms": round(self.duracao * 1000, 3),
+            "atributos": self.atributos,
+        }
+
+
+class Rastreador:
+    """Cria os spans da requisição e guarda os concluídos"""
+
+    def __init__(self, ativo=None, capacidade=None, arquivo=None):
+        if ativo is None:
+            ativo = os.environ.get("TRACING", "0") == "1"
+        if capacidade is None:
+            capacidade = int(os.environ.get("TRACE_BUFFER", "5000"))
+        if arquivo is None:
+            arquivo = os.environ.get("TRACE_FILE")
+        self.ativo = ativo
+        self.arquivo = arquivo
+        self.descartados = 0
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=capacidade)
+        self._fila = queue.Queue(capacidade)
+        self._escritor = None
+
+    def _exportar(self, span):
+        with self._lock:
+            self._spans.append(span)
+        arquivo = self.arquivo
+        if arquivo:
+            self._iniciar_escritor()
+            try:
+                self._fila.put_nowait((arquivo, span))
+            except queue.Full:
+                with self._lock:
+                    self.descartados += 1
+
+    def _iniciar_escritor(self):
+        if self._escritor is None:
+            with self._lock:
+                if self._escritor is None:
+                    self._escritor = threading.Thread(
+                        target=self._escrever,
+                        name="exportador-traces",
+                        daemon=True,
+                    )
+                    self._escritor.start()
+
+    def _escrever(self):
+        """Thread do arquivo JSONL: um handle aberto, flush ao esvaziar"""
+        caminho = aberto = None
+        while True:
+            destino, span = self._fila.get()
+            try:
+                if destino != caminho:
+                    if aberto is not None:
+                        aberto.close()
+                    caminho = destino
+                    aberto = open(caminho, "a", encoding="utf-8")
+                linha = json.dumps(span.como_dict(), ensure_ascii=False)
+                aberto.write(linha + "\n")
+                if self._fila.empty():
+                    aberto.flush()
+            except OSError:
+                if aberto is not None:
+                    with suppress(OSError):
+                        aberto.close()
+                caminho = aberto = None
+                with self._lock:
+                    self.descartados += 1
+            finally:
+                self._fila.task_done()
+
+    def descarregar(self):
+        """Espera a fila do arquivo ser gravada"""
+        self._fila.join()
+
+    @contextmanager
+    def _ativar(self, span):
+        token = _span_atual.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.atributos["erro"] = type(e).__name__
+            raise
+        finally:
+            span.duracao = time.perf_counter() - span.inicio
+            _span_atual.reset(token)
+            self._exportar(span)
+
+    @contextmanager
+    def span_requisicao(self, request, rota):
+        """Span da rota; continua o trace do header traceparent, se houver"""
+        if not self.ativo:
+            yield None
+            return
+        encontrado = TRACEPARENT_REGEX.match(
+            request.headers.get("traceparent", "")
+        )
+        if encontrado and set(encontrado.group(1)) != {"0"}:
+            trace_id, pai_id = encontrado.groups()
+        else:
+            trace_id, pai_id = secrets.token_hex(16), None
+        span = Span(
+            f"{request.method} {rota}",
+            trace_id,
+            pai_id,
+            time.perf_counter(),
+            {"http.method": request.method, "http.route": rota},
+        )
+        with self._ativar(span):
+            yield span
+
+    @contextmanager
+    def span(self, nome, **atributos):
+        """Span filho do atual; sem trace em andamento, não faz nada"""
+        pai = _span_atual.get()
+        if pai is None:
+            yield None
+            return
+        span = Span(
+            nome, pai.trace_id, pai.span_id, time.perf_counter(), atributos
+        )
+        with self._ativar(span):
+            yield span
+
+    def registrar_filho(self, pai, nome, inicio, duracao, **atributos):
+        """Span já medido (inicio em perf_counter) como filho de pai"""
+        if pai is None:
+            return
+        span = Span(nome, pai.trace_id, pai.span_id, inicio, atributos)
+        span.duracao = duracao
+        self._exportar(span)
+
+    def traces(self, limite=50):
+        """Resumo dos traces mais recentes (raiz, duração, nº de spans)"""
+        with self._lock:
+            spans = list(self._spans)
+        por_trace = {}
+        for span in reversed(spans):
+            por_trace.setdefault(span.trace_id, []).append(span)
+        resumo = []
+        for trace_id, itens in list(por_trace.items())[:limite]:
+            ids = {span.span_id for span in itens}
+            raiz = min(itens, key=lambda s: (s.pai_id in ids, s.inicio))
+            resumo.append(
+                {
+                    "trace_id": trace_id,
+                    "raiz": raiz.nome,
+                    "duracao_ms": round(raiz.duracao * 1000, 3),
+                    "spans": len(itens),
+                }
+            )
+        return resumo
+
+    def trace(self, trace_id):
+        """Spans do trace em ordem de início"""
+        with self._lock:
+            spans = [s for s in self._spans if s.trace_id == trace_id]
+        spans.sort(key=lambda s: s.inicio)
+        return [span.como_dict() for span in spans]
+
+    def limpar(self):
+        with self._lock:
+            self._spans.clear()
+
+
+rastreador = Rastreador()
+
+
+def span_atual():
+    return _span_atual.get()
+
+
+def cabecalhos_propagacao():
+    """Header traceparent para uma chamada de saída (vazio sem trace)"""
+    span = _span_atual.get()
+    if span is None:
+        return {}
+    return {"traceparent": span.traceparent()}
@@ -0,0 +1,408 @@
+"""
+Substituto local do JSONPlaceholder, com latência e falhas injetadas
+
+Serve os mesmos recursos e formatos da API externa usada por
+app/main.py (posts, comments, users, todos, albums, photos), a partir
+de dados gerados de tamanho configurável, para medir o app sem depender
+da internet. Para usar, aponte o app para ele com UPSTREAM_BASE_URL:
+
+    python -m app.upstream_local --porta 8001 --usuarios 100
+    UPSTREAM_BASE_URL=http://127.0.0.1:8001 uvicorn app.main:app
+
+Controles (variáveis UPSTREAM_*, opções da linha de comando ou, em
+execução, PUT /_config):
+
+- latencia: distribuição da latência de cada resposta, "fixa:MS",
+  "uniforme:MIN:MAX", "exponencial:MEDIA" ou "lognormal:MEDIANA:SIGMA"
+  (ms); padrão "fixa:0";
+- taxa_erro / status_erro: fração das respostas trocadas por um erro
+  (padrão 500);
+- taxa_corpo_lento / corpo_lento_ms: fração das respostas cujo corpo é
+  enviado aos pedaços ao longo de corpo_lento_ms.
+
+Os sorteios usam um random.Random com semente (UPSTREAM_SEED), então
+uma execução é reproduzível.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+# Tamanhos padrão: os mesmos do JSONPlaceholder
+TAMANHOS_PADRAO = {
+    "usuarios": 10,
+    "posts_por_usuario": 10,
+    "comentarios_por_post": 5,
+    "albuns_por_usuario": 10,
+    "fotos_por_album": 50,
+    "tarefas_por_usuario": 20,
+}
+
+# Pedaços em que um corpo lento é enviado
+PEDACOS_CORPO_LENTO = 10
+
+PALAVRAS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua enim ad "
+    "minim veniam quis nostrud exercitation ullamco laboris nisi aliquip"
+).split()
+
+
+class Latencia:
+    """Distribuição de latência a partir do texto "tipo:param[:param]" """
+
+    TIPOS = {
+        "fixa": 1,
+        "uniforme": 2,
+        "exponencial": 1,
+        "lognormal": 2,
+    }
+
+    def __init__(self, texto="fixa:0"):
+        tipo, *parametros = texto.split(":")
+        if self.TIPOS.get(tipo) != len(parametros):
+            raise ValueError(f"Latência inválida: {texto!r}")
+        self.texto = texto
+        self.tipo = tipo
+        valores = [float(p) for p in parametros]
+        if any(v < 0 for v in valores):
+            raise ValueError(f"Latência inválida: {texto!r}")
+        # ms -> s; o sigma da lognormal não é um tempo
+        self.parametros = [valores[0] / 1000] + [
+            v if tipo == "lognormal" else v / 1000 for v in valores[1:]
+        ]
+
+    def sortear(self, rng):
+        """Latência em segundos"""
+        if self.tipo == "fixa":
+            return self.parametros[0]
+        if self.tipo == "uniforme":
+            return rng.uniform(*self.parametros)
+        if self.tipo == "exponencial":
+            media = self.parametros[0]
+            return rng.expovariate(1 / media) if media else 0.0
+        mediana, sigma = self.parametros
+        if not mediana:
+            return 0.0
+        return rng.lognormvariate(math.log(mediana), sigma)
+
+
+class ConfigUpstream:
+    """Controles de latência e falhas; lidos das variáveis UPSTREAM_*"""
+
+    def __init__(self, **valores):
+        ambiente = {
+            "latencia": os.environ.get("UPSTREAM_LATENCIA", "fixa:0"),
+            "taxa_erro": os.environ.get("UPSTREAM_TAXA_ERRO", "0"),
+            "status_erro": os.environ.get("UPSTREAM_STATUS_ERRO", "500"),
+            "taxa_corpo_lento": os.environ.get(
+                "UPSTREAM_TAXA_CORPO_LENTO", "0"
+            ),
+            "corpo_lento_ms": os.environ.get("UPSTREAM_CORPO_LENTO_MS", "0"),
+        }
+        ambiente.update(valores)
+        self.atualizar(**ambiente)
+
+    def atualizar(self, **valores):
+        """Aplica os valores informados (os demais ficam como estão)"""
+        if "latencia" in valores:
+            self.latencia = Latencia(valores["latencia"])
+        if "taxa_erro" in valores:
+            self.taxa_erro = float(valores["taxa_erro"])
+        if "status_erro" in valores:
+            self.status_erro = int(valores["status_erro"])
+        if "taxa_corpo_lento" in valores:
+            self.taxa_corpo_lento = float(valores["taxa_corpo_lento"])
+        if "corpo_lento_ms" in valores:
+            self.corpo_lento_ms = float(valores["corpo_lento_ms"])
+
+    def como_dict(self):
+        return {
+            "latencia": self.latencia.texto,
+            "taxa_erro": self.taxa_erro,
+            "status_erro": self.status_erro,
+            "taxa_corpo_lento": self.taxa_corpo_lento,
+            "corpo_lento_ms": self.corpo_lento_ms,
+        }
+
+
+class AtualizacaoConfig(BaseModel):
+    latencia: str | None = None
+    taxa_erro: float | None = Field(None, ge=0, le=1)
+    status_erro: int | None = Field(None, ge=400, le=599)
+    taxa_corpo_lento: float | None = Field(None, ge=0, le=1)
+    corpo_lento_ms: float | None = Field(None, ge=0)
+
+
+def _texto(rng, palavras):
+    return " ".join(rng.choice(PALAVRAS) for _ in range(palavras))
+
+
+def gerar_dados(seed=1, **tamanhos):
+    """Recursos no formato do JSONPlaceholder (ids a partir de 1)"""
+    t = {**TAMANHOS_PADRAO, **tamanhos}
+    rng = random.Random(seed)
+    dados = {
+        "users": [],
+        "posts": [],
+        "comments": [],
+        "albums": [],
+        "photos": [],
+        "todos": [],
+    }
+    for user_id in range(1, t["usuarios"] + 1):
+        username = f"usuario{user_id}"
+        dados["users"].append(
+            {
+                "id": user_id,
+                "name": f"Usuário {user_id}",
+                "username": username,
+                "email": f"{username}@exemplo.com",
+                "address": {
+                    "street": _texto(rng, 2).title(),
+                    "suite": f"Apt. {rng.randint(1, 999)}",
+                    "city": _texto(rng, 1).title(),
+                    "zipcode": f"{rng.randint(10000, 99999)}-{user_id:04d}",
+                    "geo": {
+                        "lat": f"{rng.uniform(-90, 90):.4f}",
+                        "lng": f"{rng.uniform(-180, 180):.4f}",
+                    },
+                },
+                "phone": f"1-770-736-{rng.randint(1000, 9999)}",
+                "website": f"{username}.org",
+                "company": {
+                    "name": _texto(rng, 2).title(),
+                    "catchPhrase": _texto(rng, 4),
+                    "bs": _texto(rng, 3),
+                },
+            }
+        )
+        for _ in range(t["posts_por_usuario"]):
+            dados["posts"].append(
+                {
+                    "userId": user_id,
+                    "id": len(dados["posts"]) + 1,
+                    "title": _texto(rng, 5),
+                    "body": _texto(rng, 30),
+                }
+            )
+        for _ in range(t["albuns_por_usuario"]):
+            dados["albums"].append(
+                {
+                    "userId": user_id,
+                    "id": len(dados["albums"]) + 1,
+                    "title": _texto(rng, 4),
+                }
+            )
+        for _ in range(t["tarefas_por_usuario"]):
+            dados["todos"].append(
+                {
+                    "userId": user_id,
+                    "id": len(dados["todos"]) + 1,
+                    "title": _texto(rng, 4),
+                    "completed": rng.random() < 0.5,
+                }
+            )
+    for post in dados["posts"]:
+        for _ in range(t["comentarios_por_post"]):
+            comment_id = len(dados["comments"]) + 1
+            dados["comments"].append(
+                {
+                    "postId": post["id"],
+                    "id": comment_id,
+                    "name": _texto(rng, 4),
+                    "email": f"leitor{comment_id}@exemplo.com",
+                    "body": _texto(rng, 20),
+                }
+            )
+    for album in dados["albums"]:
+        for _ in range(t["fotos_por_album"]):
+            photo_id = len(dados["photos"]) + 1
+            cor = f"{rng.randrange(0x1000000):06x}"
+            dados["photos"].append(
+                {
+                    "albumId": album["id"],
+                    "id": photo_id,
+                    "title": _texto(rng, 5),
+                    "url": f"https://via.placeholder.com/600/{cor}",
+                    "thumbnailUrl": f"https://via.placeholder.com/150/{cor}",
+                }
+            )
+    return dados
+
+
+class Recursos:
+    """Dados gerados com índices por id e por chave estrangeira"""
+
+    # recurso -> (campo do pai, recurso pai)
+    FILHOS = {
+        "posts": ("userId", "users"),
+        "comments": ("postId", "posts"),
+        "albums": ("userId", "users"),
+        "photos": ("albumId", "albums"),
+        "todos": ("userId", "users"),
+    }
+
+    def __init__(self, dados):
+        self.dados = dados
+        self._por_id = {
+            recurso: {item["id"]: item for item in itens}
+            for recurso, itens in dados.items()
+        }
+        self._por_pai = {}
+        for recurso, (campo, _) in self.FILHOS.items():
+            indice = self._por_pai[recurso] = {}
+            for item in dados[recurso]:
+                indice.setdefault(item[campo], []).append(item)
+
+    def listar(self, recurso, filtros=None):
+        """Lista o recurso; filtro pelo campo do pai (ex.: ?postId=1)"""
+        campo = self.FILHOS.get(recurso, (None,))[0]
+        if filtros and campo in filtros:
+            try:
+                pai = int(filtros[campo])
+            except ValueError:
+                return []
+            return self._por_pai[recurso].get(pai, [])
+        return self.dados[recurso]
+
+    def obter(self, recurso, item_id):
+        return self._por_id[recurso].get(item_id)
+
+    def filhos(self, recurso_pai, pai_id, recurso):
+        campo, pai = self.FILHOS[recurso]
+        if pai != recurso_pai:
+            return None
+        return self._por_pai[recurso].get(pai_id, [])
+
+
+async def _corpo_lento(corpo, duracao):
+    tamanho = math.ceil(len(corpo) / PEDACOS_CORPO_LENTO) or 1
+    for inicio in range(0, len(corpo), tamanho):
+        await asyncio.sleep(duracao / PEDACOS_CORPO_LENTO)
+        yield corpo[inicio : inicio + tamanho]  # noqa: E203
+
+
+def criar_app(dados=None, config=None, seed=None):
+    """App do substituto; sem dados, gera os de tamanho padrão"""
+    if seed is None:
+        seed = int(os.environ.get("UPSTREAM_SEED", "1"))
+    upstream = FastAPI(title="JSONPlaceholder local")
+    upstream.state.recursos = Recursos(dados or gerar_dados(seed))
+    upstream.state.config = config or ConfigUpstream()
+    upstream.state.rng = random.Random(seed)
+
+    async def responder(conteudo):
+        """Aplica latência, erro e corpo lento sorteados"""
+        config = upstream.state.config
+        rng = upstream.state.rng
+        latencia = config.latencia.sortear(rng)
+        if latencia:
+            await asyncio.sleep(latencia)
+        if config.taxa_erro and rng.random() < config.taxa_erro:
+            return JSONResponse(
+                status_code=config.status_erro,
+                content={"erro": "falha injetada"},
+            )
+        if conteudo is None:
+            return JSONResponse(status_code=404, content={})
+        if config.taxa_corpo_lento and rng.random() < config.taxa_corpo_lento:
+            corpo = json.dumps(conteudo).encode()
+            return StreamingResponse(
+                _corpo_lento(corpo, config.corpo_lento_ms / 1000),
+                media_type="application/json",
+            )
+        return JSONResponse(content=conteudo)
+
+    def validar_recurso(recurso):
+        if recurso not in upstream.state.recursos.dados:
+            raise HTTPException(status_code=404)
+
+    @upstream.get("/_config")
+    def ver_config():
+        return upstream.state.config.como_dict()
+
+    @upstream.put("/_config")
+    def alterar_config(atualizacao: AtualizacaoConfig):
+        valores = atualizacao.model_dump(exclude_none=True)
+        try:
+            upstream.state.config.atualizar(**valores)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return upstream.state.config.como_dict()
+
+    @upstream.get("/{recurso}")
+    async def listar(recurso: str, request: Request):
+        validar_recurso(recurso)
+        filtros = dict(request.query_params)
+        return await responder(
+            upstream.state.recursos.listar(recurso, filtros)
+        )
+
+    @upstream.get("/{recurso}/{item_id}")
+    async def obter(recurso: str, item_id: int):
+        validar_recurso(recurso)
+        return await responder(upstream.state.recursos.obter(recurso, item_id))
+
+    @upstream.get("/{recurso_pai}/{pai_id}/{recurso}")
+    async def filhos(recurso_pai: str, pai_id: int, recurso: str):
+        validar_recurso(recurso_pai)
+        validar_recurso(recurso)
+        itens = upstream.state.recursos.filhos(recurso_pai, pai_id, recurso)
+        if itens is None:
+            raise HTTPException(status_code=404)
+        return await responder(itens)
+
+    return upstream
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8001)
+    parser.add_argument(
+        "--seed", type=int, default=int(os.environ.get("UPSTREAM_SEED", "1"))
+    )
+    for nome, padrao in TAMANHOS_PADRAO.items():
+        parser.add_argument(
+            f"--{nome.replace('_', '-')}", type=int, default=padrao
+        )
+    parser.add_argument("--latencia")
+    parser.add_argument("--taxa-erro", type=float)
+    parser.add_argument("--status-erro", type=int)
+    parser.add_argument("--taxa-corpo-lento", type=float)
+    parser.add_argument("--corpo-lento-ms", type=float)
+    args = vars(parser.parse_args())
+
+    # só necessário para rodar o servidor (vem com fastapi[standard])
+    import uvicorn
+
+    tamanhos = {nome: args[nome] for nome in TAMANHOS_PADRAO}
+    controles = {
+        nome: valor
+        for nome in (
+            "latencia",
+            "taxa_erro",
+            "status_erro",
+            "taxa_corpo_lento",
+            "corpo_lento_ms",
+        )
+        if (valor := args[nome]) is not None
+    }
+    upstream = criar_app(
+        gerar_dados(args["seed"], **tamanhos),
+        ConfigUpstream(**controles),
+        args["seed"],
+    )
+    uvicorn.run(upstream, host=args["host"], port=args["porta"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Índice em memória de usuários por username
+
+A tabela users é pequena e quase só lida, mas login_secure e
+search_users_secure consultavam o SQLite a cada chamada. O índice guarda
+um registro compacto (__slots__) por username e responde essas buscas
+sem abrir conexão.
+
+A senha não fica no índice: apenas o hash scrypt da coluna password ou,
+para linhas legadas em texto puro, um digest com chave aleatória do
+processo (passwords.credencial). Quando a versão dos dados muda
+(database.versao_dados), o índice confere a geração de users (contador
+mantido por triggers, schema.criar_geracao_usuarios) e só recarrega a
+tabela se ela foi alterada: escritas em pedidos e produtos não custam
+uma recarga. Uma única thread confere e recarrega; as demais esperam por
+ela (nunca respondem com um usuário desativado ou uma senha antiga).
+"""
+
+import os
+import sqlite3
+import threading
+
+from app import database
+from app.passwords import credencial
+
+CAMPOS_PUBLICOS = ("id", "username", "email", "role", "active")
+
+
+class RegistroUsuario:
+    """Dados públicos do usuário e a credencial (hash ou digest)"""
+
+    __slots__ = CAMPOS_PUBLICOS + ("credencial",)
+
+    def __init__(self, id, username, email, role, active, credencial):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.active = active
+        self.credencial = credencial
+
+    def como_dict(self):
+        """Campos públicos (sem senha), no formato da linha do banco"""
+        return {campo: getattr(self, campo) for campo in CAMPOS_PUBLICOS}
+
+
+class IndiceUsuarios:
+    """Mapa username -> RegistroUsuario, invalidado por escritas"""
+
+    def __init__(self):
+        self.ativo = os.environ.get("USER_INDEX", "1") != "0"
+        self.carregamentos = 0
+        self._lock = threading.Lock()
+        self._recarga = threading.Lock()
+        self._versao = None
+        self._geracao = None
+        self._por_username = {}
+
+    @staticmethod
+    def _ler_geracao(conn):
+        """Geração atual de users (None se o banco não tem o contador)"""
+        try:
+            row = conn.execute(
+                "SELECT geracao FROM users_geracao WHERE id = 1"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row is not None else None
+
+    def carregar(self):
+        """Lê a tabela users inteira e troca o índice de uma vez"""
+        chave = (database.DB_PATH, database.versao_dados())
+        conn = database.get_read_connection()
+        try:
+            geracao = self._ler_geracao(conn)
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, username, email, role, active, password "
+                "FROM users"
+            )
+            por_username = {
+                row["username"]: RegistroUsuario(
+                    row["id"],
+                    row["username"],
+                    row["email"],
+                    row["role"],
+                    row["active"],
+                    credencial(row["password"]),
+                )
+                for row in cursor.fetchall()
+            }
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._por_username = por_username
+            self._versao = chave
+            self._geracao = geracao
+            self.carregamentos += 1
+        return len(por_username)
+
+    def _sincronizar(self, chave):
+        """Recarrega só se users mudou desde a última carga"""
+        if self._versao is not None and self._versao[0] == chave[0]:
+            conn = database.get_read_connection()
+            try:
+                geracao = self._ler_geracao(conn)
+            finally:
+                conn.close()
+            if geracao is not None and geracao == self._geracao:
+                with self._lock:
+                    self._versao = chave
+                return
+        self.carregar()
+
+    def _atual(self):
+        chave = (database.DB_PATH, database.versao_dados())
+        if chave == self._versao:
+            return self._por_username
+        with self._recarga:
+            if chave != self._versao:
+                self._sincronizar(chave)
+        return self._por_username
+
+    def buscar(self, username):
+        """Registro do usuário ou None"""
+        return self._atual().get(username)
+
+    def limpar(self):
+        with self._lock:
+            self._por_username = {}
+            self._versao = None
+            self._geracao = None
+
+
+indice_usuarios = IndiceUsuarios()
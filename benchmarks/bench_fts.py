@@ -0,0 +1,183 @@
+"""
+Benchmark: busca textual FTS5 x LIKE '%termo%' em um catálogo sintético
+
+Uso (na raiz do projeto):
+
+    python -m benchmarks.bench_fts --linhas 1000000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app import schema
+from app.catalog_endpoints import montar_consulta_fts
+
+MARCAS = ["Dell", "Logitech", "Samsung", "Lenovo", "Asus", "Acer", "Philips"]
+TIPOS = [
+    "Notebook",
+    "Mouse",
+    "Teclado",
+    "Monitor",
+    "Cadeira",
+    "Webcam",
+    "Headset",
+    "Livro",
+    "Mesa",
+    "Impressora",
+]
+ADJETIVOS = [
+    "sem fio",
+    "gamer",
+    "ergonômico",
+    "mecânico",
+    "portátil",
+    "compacto",
+    "profissional",
+    "silencioso",
+    "premium",
+    "básico",
+]
+CATEGORIAS = ["Eletrônicos", "Livros", "Móveis", "Informática"]
+
+CONSULTAS = [
+    ("palavra comum", "notebook", False),
+    ("duas palavras", "mouse sem fio", False),
+    ("palavra rara", "impressora silencioso philips", False),
+    ("prefixo", "ergo", True),
+]
+
+
+def gerar_produtos(quantidade, seed):
+    """Gera produtos sintéticos de forma determinística"""
+    rnd = random.Random(seed)
+    for i in range(quantidade):
+        tipo = rnd.choice(TIPOS)
+        marca = rnd.choice(MARCAS)
+        adjetivos = " ".join(rnd.sample(ADJETIVOS, 2))
+        yield (
+            f"{tipo} {marca} {i}",
+            f"{tipo} {adjetivos} da linha {marca}",
+            round(rnd.uniform(10, 5000), 2),
+            rnd.randint(0, 200),
+            rnd.choice(CATEGORIAS),
+        )
+
+
+def criar_catalogo(db_path, quantidade, seed):
+    """Cria a tabela products e popula com o catálogo sintético"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            stock INTEGER DEFAULT 0,
+            category TEXT
+        )
+    """)
+
+    inicio = time.perf_counter()
+    produtos = gerar_produtos(quantidade, seed)
+    with conn:
+        while True:
+            lote = list(itertools.islice(produtos, 50_000))
+            if not lote:
+                break
+            conn.executemany(
+                "INSERT INTO products (name, description, price, stock, "
+                "category) VALUES (?, ?, ?, ?, ?)",
+                lote,
+            )
+    carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    with conn:
+        schema.criar_fts_produtos(conn)
+    indexacao = time.perf_counter() - inicio
+
+    print(f"Carga de {quantidade} produtos: {carga:.2f}s")
+    print(f"Construção do índice FTS5: {indexacao:.2f}s")
+    return conn
+
+
+def medir(conn, sql, params, repeticoes):
+    """Executa a consulta várias vezes e retorna (melhor tempo, linhas)"""
+    tempos = []
+    linhas = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = len(conn.execute(sql, params).fetchall())
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), linhas
+
+
+def executar(conn, repeticoes, tamanho_pagina):
+    """Compara FTS5 (primeira página, por relevância) com LIKE"""
+    sql_fts = """
+        SELECT p.*,
+               snippet(products_fts, 1, '<mark>', '</mark>', '…', 16),
+               bm25(products_fts, 10.0, 1.0) AS relevancia
+        FROM products_fts
+        JOIN products p ON p.id = products_fts.rowid
+        WHERE products_fts MATCH ?
+        ORDER BY relevancia
+        LIMIT ?
+    """
+    sql_total = "SELECT COUNT(*) FROM products_fts WHERE products_fts MATCH ?"
+
+    print(
+        f"\n{'consulta':<16}{'FTS5 (página)':>16}{'FTS5 (total)':>16}"
+        f"{'LIKE (total)':>16}{'resultados':>12}"
+    )
+    for nome, texto, prefixo in CONSULTAS:
+        consulta = montar_consulta_fts(texto, prefixo)
+        t_fts, _ = medir(conn, sql_fts, (consulta, tamanho_pagina), repeticoes)
+        t_total, _ = medir(conn, sql_total, (consulta,), repeticoes)
+        total = conn.execute(sql_total, (consulta,)).fetchone()[0]
+
+        # LIKE equivalente (contagem exige varrer a tabela inteira)
+        palavras = texto.split()
+        condicoes = " AND ".join(
+            ["(name LIKE ? OR description LIKE ?)"] * len(palavras)
+        )
+        params = []
+        for palavra in palavras:
+            params += [f"%{palavra}%", f"%{palavra}%"]
+        t_like, _ = medir(
+            conn,
+            f"SELECT COUNT(*) FROM products WHERE {condicoes}",
+            params,
+            repeticoes,
+        )
+
+        print(
+            f"{nome:<16}{t_fts * 1000:>14.1f}ms{t_total * 1000:>14.1f}ms"
+            f"{t_like * 1000:>14.1f}ms{total:>12}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--tamanho-pagina", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db_path = os.path.join(diretorio, "catalogo.db")
+        conn = criar_catalogo(db_path, args.linhas, args.seed)
+        executar(conn, args.repeticoes, args.tamanho_pagina)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: logins/s por núcleo com o hash scrypt no pool de processos
+
+Mede a verificação de senha (o trabalho de cada login) em sequência, na
+thread atual, e em paralelo pelo ServicoSenhas com 1..N processos.
+
+Uso (na raiz do projeto):
+
+    python -m benchmarks.bench_login --logins 200 --alvo-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from app import passwords
+from app.passwords import ServicoSenhas
+
+
+def medir_sequencial(armazenado, logins):
+    """Logins/s verificando na própria thread"""
+    inicio = time.perf_counter()
+    for _ in range(logins):
+        passwords.verificar_hash("senha-do-benchmark", armazenado)
+    return logins / (time.perf_counter() - inicio)
+
+
+async def _disparar(servico, armazenado, logins):
+    await asyncio.gather(
+        *(
+            servico.verificar("senha-do-benchmark", armazenado)
+            for _ in range(logins)
+        )
+    )
+
+
+def medir_pool(armazenado, logins, processos, n):
+    """Logins/s com todos os logins disparados de uma vez no pool"""
+    servico = ServicoSenhas(max_workers=processos, max_fila=logins)
+    servico.configurar(n=n)
+    try:
+        # sobe os processos antes de medir
+        asyncio.run(_disparar(servico, armazenado, processos))
+        inicio = time.perf_counter()
+        asyncio.run(_disparar(servico, armazenado, logins))
+        return logins / (time.perf_counter() - inicio)
+    finally:
+        servico.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--alvo-ms", type=float, default=None)
+    parser.add_argument("--n", type=int, default=passwords.SCRYPT_N)
+    parser.add_argument("--max-processos", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    n = args.n
+    if args.alvo_ms:
+        n = passwords.calibrar(args.alvo_ms)
+        print(f"Calibrado para {args.alvo_ms:.0f} ms: n = {n}")
+
+    armazenado = passwords.gerar_hash("senha-do-benchmark", n=n)
+    memoria_mib = 128 * passwords.SCRYPT_R * n / 2**20
+    print(f"scrypt n={n} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}")
+    print(f"Memória por hash: {memoria_mib:.0f} MiB")
+
+    sequencial = medir_sequencial(armazenado, max(args.logins // 10, 5))
+    print(f"\nSequencial: {sequencial:.1f} logins/s")
+    print(f"Tempo por hash: {1000 / sequencial:.1f} ms")
+
+    print(f"\n{'processos':>10}{'logins/s':>12}{'por núcleo':>12}")
+    processos = 1
+    while processos <= args.max_processos:
+        taxa = medir_pool(armazenado, args.logins, processos, n)
+        print(f"{processos:>10}{taxa:>12.1f}{taxa / processos:>12.1f}")
+        processos *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: pedidos/s do group commit por tamanho máximo de lote
+
+Dispara pedidos simultâneos no EscritorPedidos (em um banco temporário
+com os dados de exemplo) e compara lote=1 (um COMMIT por pedido) com
+lotes maiores.
+
+Uso (na raiz do projeto):
+
+    python -m benchmarks.bench_orders --pedidos 5000 --concorrencia 200
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import init_db
+from app import database
+from app.group_commit import EscritorPedidos
+
+
+async def _disparar(escritor, pedidos, concorrencia):
+    vagas = asyncio.Semaphore(concorrencia)
+
+    async def um(i):
+        async with vagas:
+            await escritor.inserir(2 + i % 4, 1 + i % 5, 1)
+
+    await asyncio.gather(*(um(i) for i in range(pedidos)))
+
+
+def medir(max_lote, pedidos, concorrencia):
+    """Pedidos/s e número de lotes (COMMITs)"""
+    escritor = EscritorPedidos(max_lote=max_lote, max_espera=0.002)
+    try:
+        inicio = time.perf_counter()
+        asyncio.run(_disparar(escritor, pedidos, concorrencia))
+        tempo = time.perf_counter() - inicio
+    finally:
+        escritor.parar()
+    return pedidos / tempo, escritor.lotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pedidos", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int, default=200)
+    parser.add_argument(
+        "--lotes", type=int, nargs="+", default=[1, 8, 64, 256]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        database.DB_PATH = os.path.join(diretorio, "database.db")
+        init_db.criar_banco(database.DB_PATH)
+
+        print(f"\n{'max_lote':>10}{'pedidos/s':>12}{'commits':>10}")
+        for max_lote in args.lotes:
+            taxa, lotes = medir(max_lote, args.pedidos, args.concorrencia)
+            print(f"{max_lote:>10}{taxa:>12.0f}{lotes:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Micro-benchmarks das funções quentes, com baselines em JSON
+
+Mede, no próprio processo:
+
+- user_stats_agregacao: resumir_atividade (agregação de get_user_stats)
+  com 10 mil posts e 100 mil comentários sintéticos;
+- row_para_dict: [dict(row) ...] sobre 10 mil sqlite3.Row, como nos
+  endpoints do router SQL (e, para comparação, via zip com as colunas);
+- json_lista_grande: jsonable_encoder + JSONResponse de 10 mil produtos,
+  o caminho de serialização de uma resposta grande do FastAPI;
+- get_db_connection: abrir e fechar uma conexão com o banco;
+- metricas_registrar: RegistroMetricas.registrar, chamado pelo middleware
+  de métricas ao fim de cada requisição.
+
+Cada benchmark roda em várias repetições de N chamadas (N calibrado para
+cerca de 0,2 s por repetição, com o GC desligado, como no timeit); o
+resultado é o tempo por chamada: mínimo e mediana das repetições.
+
+Uso (na raiz do projeto):
+
+    python -m benchmarks.micro run --saida benchmarks/baselines/micro.json
+    python -m benchmarks.micro compare benchmarks/baselines/micro.json
+    python -m benchmarks.micro compare base.json novo.json --limite 0.2
+
+compare com um só arquivo mede a versão atual e compara com ele; sai
+com código 1 se o tempo mínimo de algum benchmark piorou mais que o
+limite.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import database
+from app.main import resumir_atividade
+from app.metrics import RegistroMetricas
+
+VERSAO_RESULTADO = 1
+
+# Tempo alvo de cada repetição (s) e número de repetições
+ALVO_REPETICAO = 0.2
+REPETICOES = 7
+
+BENCHMARKS = {}
+
+
+def benchmark(nome):
+    """Registra um context manager que prepara os dados e entrega a função"""
+
+    def registrar(preparar):
+        BENCHMARKS[nome] = contextmanager(preparar)
+        return preparar
+
+    return registrar
+
+
+def posts_e_comentarios(posts=10_000, comentarios=100_000, seed=1):
+    """Posts e comentários por post no formato do JSONPlaceholder"""
+    rng = random.Random(seed)
+    lista_posts = [
+        {"userId": 1, "id": i, "title": f"Post {i}", "body": "..."}
+        for i in range(1, posts + 1)
+    ]
+    por_post = {post["id"]: [] for post in lista_posts}
+    for comment_id in range(1, comentarios + 1):
+        post_id = rng.randint(1, posts)
+        por_post[post_id].append(
+            {
+                "postId": post_id,
+                "id": comment_id,
+                "name": "Comentário",
+                "email": "leitor@exemplo.com",
+                "body": "...",
+            }
+        )
+    return lista_posts, por_post
+
+
+def produtos(quantidade=10_000):
+    return [
+        {
+            "id": i,
+            "name": f"Produto {i}",
+            "description": "Descrição do produto " * 3,
+            "price": round(i * 1.37, 2),
+            "stock": i % 50,
+            "category": "Eletrônicos" if i % 2 else "Livros",
+        }
+        for i in range(1, quantidade + 1)
+    ]
+
+
+@benchmark("user_stats_agregacao")
+def _agregacao():
+    posts, comentarios = posts_e_comentarios()
+    yield lambda: resumir_atividade(1, posts, comentarios)
+
+
+def _linhas_sqlite(quantidade=10_000):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, "
+        "description TEXT, price REAL, stock INTEGER, category TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)",
+        [tuple(produto.values()) for produto in produtos(quantidade)],
+    )
+    cursor = conn.execute("SELECT * FROM products")
+    colunas = [descricao[0] for descricao in cursor.description]
+    return conn, cursor.fetchall(), colunas
+
+
+@benchmark("row_para_dict")
+def _row_para_dict():
+    conn, rows, _ = _linhas_sqlite()
+    try:
+        yield lambda: [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+@benchmark("row_para_dict_zip")
+def _row_para_dict_zip():
+    conn, rows, colunas = _linhas_sqlite()
+    try:
+        yield lambda: [dict(zip(colunas, row)) for row in rows]
+    finally:
+        conn.close()
+
+
+@benchmark("json_lista_grande")
+def _json_lista_grande():
+    conteudo = {"total": 10_000, "products": produtos()}
+    yield lambda: JSONResponse(jsonable_encoder(conteudo)).body
+
+
+@benchmark("get_db_connection")
+def _get_db_connection():
+    anterior = database.DB_PATH
+    with tempfile.TemporaryDirectory() as diretorio:
+        database.DB_PATH = os.path.join(diretorio, "database.db")
+        sqlite3.connect(database.DB_PATH).close()
+
+        def abrir_e_fechar():
+            database.get_db_connection().close()
+
+        try:
+            yield abrir_e_fechar
+        finally:
+            database.DB_PATH = anterior
+
+
+@benchmark("metricas_registrar")
+def _metricas_registrar():
+    registro = RegistroMetricas()
+    fases = {"db_execute": 0.001, "db_fetch": 0.0005, "upstream": 0.01}
+    yield lambda: registro.registrar("GET", "/rota/{id}", 200, 0.02, fases)
+
+
+def medir(funcao, repeticoes=REPETICOES, alvo=ALVO_REPETICAO):
+    """Tempo por chamada (s) de cada repetição, com N calibrado"""
+    inicio = time.perf_counter()
+    funcao()
+    uma = time.perf_counter() - inicio
+    chamadas = max(1, int(alvo / uma)) if uma else 1000
+
+    tempos = []
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for _ in range(chamadas):
+                funcao()
+            tempos.append((time.perf_counter() - inicio) / chamadas)
+    finally:
+        if gc_ativo:
+            gc.enable()
+    return chamadas, tempos
+
+
+def executar(nomes=None, repeticoes=REPETICOES, alvo=ALVO_REPETICAO):
+    """Resultado no formato das baselines"""
+    resultados = {}
+    for nome in nomes or BENCHMARKS:
+        with BENCHMARKS[nome]() as funcao:
+            chamadas, tempos = medir(funcao, repeticoes, alvo)
+        resultados[nome] = {
+            "chamadas_por_repeticao": chamadas,
+            "repeticoes": repeticoes,
+            "min_s": min(tempos),
+            "mediana_s": statistics.median(tempos),
+        }
+        print(
+            f"{nome:<24}{resultados[nome]['mediana_s'] * 1e6:>14.1f} µs"
+            f"  (mín {resultados[nome]['min_s'] * 1e6:.1f} µs)"
+        )
+    return {
+        "versao": VERSAO_RESULTADO,
+        "quando": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "codigo": _versao_codigo(),
+        "maquina": _maquina(),
+        "benchmarks": resultados,
+    }
+
+
+def comparar(base, novo, limite=0.1):
+    """
+    Variação do tempo mínimo por benchmark presente nos dois resultados
+
+    Compara o mínimo (o menos afetado por ruído da máquina, como
+    recomenda o timeit); regressão: ficou mais que `limite` (fração)
+    mais lento.
+    """
+    linhas = []
+    for nome, atual in novo["benchmarks"].items():
+        anterior = base["benchmarks"].get(nome)
+        if anterior is None:
+            continue
+        variacao = atual["min_s"] / anterior["min_s"] - 1
+        linhas.append(
+            {
+                "nome": nome,
+                "base_s": anterior["min_s"],
+                "novo_s": atual["min_s"],
+                "variacao": round(variacao, 4),
+                "regressao": variacao > limite,
+            }
+        )
+    return linhas
+
+
+def _maquina():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _versao_codigo():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _carregar(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    run = comandos.add_parser("run", help="mede e grava o resultado")
+    run.add_argument("--saida", default="micro.json")
+    run.add_argument("--nomes", nargs="+", choices=list(BENCHMARKS))
+    run.add_argument("--repeticoes", type=int, default=REPETICOES)
+
+    compare = comandos.add_parser("compare", help="compara com a baseline")
+    compare.add_argument("base")
+    compare.add_argument("novo", nargs="?", help="padrão: mede agora")
+    compare.add_argument("--limite", type=float, default=0.1)
+    compare.add_argument("--repeticoes", type=int, default=REPETICOES)
+
+    args = parser.parse_args()
+
+    if args.comando == "run":
+        resultado = executar(args.nomes, args.repeticoes)
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"\nResultado em {args.saida}")
+        return
+
+    base = _carregar(args.base)
+    if args.novo:
+        novo = _carregar(args.novo)
+    else:
+        novo = executar(list(base["benchmarks"]), args.repeticoes)
+        print()
+    if base.get("maquina") != novo.get("maquina"):
+        print("aviso: resultados de máquinas/ambientes diferentes")
+
+    linhas = comparar(base, novo, args.limite)
+    print(f"{'benchmark':<24}{'base':>12}{'novo':>12}{'Δ':>9}")
+    for linha in linhas:
+        print(
+            f"{linha['nome']:<24}"
+            f"{linha['base_s'] * 1e6:>9.1f} µs{linha['novo_s'] * 1e6:>9.1f} µs"
+            f"{linha['variacao']:>+9.1%}"
+            f"{'  REGRESSÃO' if linha['regressao'] else ''}"
+        )
+    if any(linha["regressao"] for linha in linhas):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
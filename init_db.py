@@ -2,79 +2,86 @@
 Script de inicialização do banco de dados SQLite
 """
 
+import argparse
+import itertools
+import random
 import sqlite3
 import os
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from app import schema
 
 # Caminho do banco de dados
 DB_PATH = "database.db"
 
+# Linhas por chamada de executemany na carga em escala
+TAMANHO_LOTE = 50_000
 
-def criar_banco():
-    """Cria o banco de dados e tabelas"""
+# Proporções da carga em escala (por usuário)
+PRODUTOS_POR_USUARIO = 0.5
+PEDIDOS_POR_USUARIO = 3
 
-    # Remover banco existente
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
-        print(f"Banco {DB_PATH} removido")
+# PRAGMAs usados só durante a carga em escala: sem journal, sem fsync,
+# conexão exclusiva e cache grande. Se a carga falhar o banco é descartado
+# (ele é sempre recriado do zero).
+PRAGMAS_CARGA = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+]
 
-    # Criar conexão
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    # Criar tabela de usuários
-    cursor.execute(
-        """
-        CREATE TABLE users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL UNIQUE,
-            password TEXT NOT NULL,
-            email TEXT NOT NULL,
-            role TEXT DEFAULT 'user',
-            active INTEGER DEFAULT 1
-        )
+def criar_banco(db_path=DB_PATH, escala=None, seed=42):
     """
-    )
+    Cria o banco de dados e tabelas
 
-    # Criar tabela de produtos
-    cursor.execute(
-        """
-        CREATE TABLE products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            price REAL NOT NULL,
-            stock INTEGER DEFAULT 0,
-            category TEXT
-        )
-    """
-    )
+    Sem escala, insere os dados de exemplo. Com escala=N, gera N usuários
+    (e produtos/pedidos proporcionais) sintéticos e determinísticos a
+    partir da seed.
 
-    # Criar tabela de pedidos
-    cursor.execute(
-        """
-        CREATE TABLE orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL,
-            total REAL NOT NULL,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id),
-            FOREIGN KEY (product_id) REFERENCES products (id)
-        )
+    ATENÇÃO: remove o banco existente. O app não usa esta função: no
+    startup ele chama schema.inicializar_banco, que nunca apaga dados.
     """
-    )
 
+    # Remover banco existente
+    if os.path.exists(db_path):
+        os.remove(db_path)
+        print(f"Banco {db_path} removido")
+
+    # Criar conexão
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    if escala:
+        for pragma in PRAGMAS_CARGA:
+            cursor.execute(pragma)
+
+    schema.criar_tabelas(conn)
     print("Tabelas criadas com sucesso!")
 
-    # Popular dados de exemplo
-    popular_dados(cursor)
+    # Popular dados (uma única transação até o commit)
+    if escala:
+        popular_escala(cursor, escala, seed)
+    else:
+        popular_dados(cursor)
+
+    # Índices, FTS5 e resumos (migrações) - criados após a carga para
+    # construir tudo de uma vez em vez de atualizar a cada linha inserida
+    inicio = time.perf_counter()
+    schema.aplicar_migracoes(conn)
+    print(
+        "✓ Índices, busca textual e resumos de pedidos criados "
+        f"({time.perf_counter() - inicio:.2f}s)"
+    )
 
     # Commit e fechar
     conn.commit()
     conn.close()
-    print(f"\nBanco de dados '{DB_PATH}' criado com sucesso!")
+    print(f"\nBanco de dados '{db_path}' criado com sucesso!")
 
 
 def popular_dados(cursor):
@@ -134,9 +141,205 @@ def popular_dados(cursor):
     print(f"✓ {len(pedidos)} pedidos inseridos")
 
 
+# =============================================================================
+# Carga em escala (dados sintéticos)
+# =============================================================================
+
+NOMES = [
+    "ana", "bruno", "carla", "daniel", "eduarda", "felipe", "gabriela",
+    "henrique", "isabela", "joao", "julia", "lucas", "maria", "mateus",
+    "pedro", "rafaela", "sofia", "thiago", "vitoria", "yuri",
+]  # fmt: skip
+SOBRENOMES = [
+    "silva", "santos", "oliveira", "souza", "rodrigues", "ferreira",
+    "alves", "pereira", "lima", "gomes", "costa", "ribeiro", "martins",
+    "carvalho", "almeida", "lopes", "soares", "fernandes", "vieira",
+]  # fmt: skip
+DOMINIOS = ["example.com", "mail.com", "empresa.com.br"]
+
+# categoria -> (tipos de produto, faixa de preço)
+CATALOGO = {
+    "Eletrônicos": (
+        ["Notebook", "Mouse", "Teclado", "Monitor", "Webcam", "Headset"],
+        (50.0, 8000.0),
+    ),
+    "Livros": (["Livro", "Apostila", "Revista", "HQ"], (15.0, 300.0)),
+    "Móveis": (["Cadeira", "Mesa", "Estante", "Gaveteiro"], (150.0, 4000.0)),
+    "Informática": (["SSD", "Memória", "Roteador", "Hub USB"], (40.0, 2500.0)),
+}
+MARCAS = ["Dell", "Logitech", "Samsung", "Lenovo", "Asus", "Acer", "Philips"]
+ADJETIVOS = [
+    "sem fio", "gamer", "ergonômico", "mecânico", "portátil", "compacto",
+    "profissional", "silencioso", "premium", "básico",
+]  # fmt: skip
+
+# status -> peso
+STATUS_PEDIDOS = {
+    "completed": 70,
+    "shipped": 15,
+    "pending": 10,
+    "cancelled": 5,
+}
+
+
+def _sorteio(rnd, opcoes):
+    """Função que sorteia um item de opcoes (mais rápida que rnd.choice)"""
+    aleatorio = rnd.random
+    tamanho = len(opcoes)
+    return lambda: opcoes[int(aleatorio() * tamanho)]
+
+
+def gerar_usuarios(quantidade, rnd):
+    """(username, password, email, role, active)"""
+    nome = _sorteio(rnd, NOMES)
+    sobrenome = _sorteio(rnd, SOBRENOMES)
+    dominio = _sorteio(rnd, DOMINIOS)
+    aleatorio = rnd.random
+    for i in range(1, quantidade + 1):
+        username = f"{nome()}.{sobrenome()}{i}"
+        yield (
+            username,
+            f"senha{int(aleatorio() * 10**6):06d}",
+            f"{username}@{dominio()}",
+            "admin" if aleatorio() < 0.001 else "user",
+            0 if aleatorio() < 0.05 else 1,
+        )
+
+
+def gerar_produtos(quantidade, rnd, precos):
+    """(name, description, price, stock, category); guarda os preços"""
+    categoria_sorteada = _sorteio(rnd, list(CATALOGO))
+    marca_sorteada = _sorteio(rnd, MARCAS)
+    adjetivo = _sorteio(rnd, ADJETIVOS)
+    aleatorio = rnd.random
+    for i in range(1, quantidade + 1):
+        categoria = categoria_sorteada()
+        tipos, (minimo, maximo) = CATALOGO[categoria]
+        tipo = tipos[int(aleatorio() * len(tipos))]
+        marca = marca_sorteada()
+        preco = round(minimo + aleatorio() * (maximo - minimo), 2)
+        precos.append(preco)
+        yield (
+            f"{tipo} {marca} {i}",
+            f"{tipo} {adjetivo()} e {adjetivo()} da linha {marca}",
+            preco,
+            int(aleatorio() * 501),
+            categoria,
+        )
+
+
+def _tabela_pesos(pesos):
+    """Lista de 100 posições para sortear com um único random()"""
+    return [valor for valor, peso in pesos.items() for _ in range(peso)]
+
+
+def gerar_pedidos(quantidade, rnd, usuarios, precos):
+    """
+    (user_id, product_id, quantity, total, status, created_at)
+
+    created_at vai como epoch; a conversão para texto é feita pelo SQLite
+    no INSERT (datetime(?, 'unixepoch')), bem mais barata que em Python.
+    """
+    quantidades = _tabela_pesos({1: 60, 2: 20, 3: 10, 4: 6, 5: 4})
+    status = _tabela_pesos(STATUS_PEDIDOS)
+    fim = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp())
+    segundos = int(timedelta(days=730).total_seconds())
+    aleatorio = rnd.random
+    produtos = len(precos)
+    for _ in range(quantidade):
+        product_id = int(aleatorio() * produtos) + 1
+        quantity = quantidades[int(aleatorio() * 100)]
+        yield (
+            int(aleatorio() * usuarios) + 1,
+            product_id,
+            quantity,
+            round(precos[product_id - 1] * quantity, 2),
+            status[int(aleatorio() * 100)],
+            fim - int(aleatorio() * segundos),
+        )
+
+
+def inserir_em_lotes(cursor, sql, linhas, tabela):
+    """executemany em lotes de TAMANHO_LOTE a partir de um gerador"""
+    inicio = time.perf_counter()
+    total = 0
+    while True:
+        lote = list(itertools.islice(linhas, TAMANHO_LOTE))
+        if not lote:
+            break
+        cursor.executemany(sql, lote)
+        total += len(lote)
+    elapsed = time.perf_counter() - inicio
+    print(
+        f"✓ {total} {tabela} inseridos em {elapsed:.2f}s "
+        f"({total / elapsed if elapsed else 0:,.0f} linhas/s)"
+    )
+    return total, elapsed
+
+
+def popular_escala(cursor, usuarios, seed):
+    """
+    Gera e insere dados sintéticos determinísticos
+
+    Mesma seed e escala produzem exatamente o mesmo banco. Cada tabela usa
+    seu próprio gerador aleatório, então mudar uma não altera as outras.
+    """
+    produtos = max(1, int(usuarios * PRODUTOS_POR_USUARIO))
+    pedidos = usuarios * PEDIDOS_POR_USUARIO
+    precos = array("d")
+
+    resultados = [
+        inserir_em_lotes(
+            cursor,
+            "INSERT INTO users (username, password, email, role, active) "
+            "VALUES (?, ?, ?, ?, ?)",
+            gerar_usuarios(usuarios, random.Random(f"{seed}-users")),
+            "usuários",
+        ),
+        inserir_em_lotes(
+            cursor,
+            "INSERT INTO products (name, description, price, stock, "
+            "category) VALUES (?, ?, ?, ?, ?)",
+            gerar_produtos(
+                produtos, random.Random(f"{seed}-products"), precos
+            ),
+            "produtos",
+        ),
+        inserir_em_lotes(
+            cursor,
+            "INSERT INTO orders (user_id, product_id, quantity, total, "
+            "status, created_at) "
+            "VALUES (?, ?, ?, ?, ?, datetime(?, 'unixepoch'))",
+            gerar_pedidos(
+                pedidos, random.Random(f"{seed}-orders"), usuarios, precos
+            ),
+            "pedidos",
+        ),
+    ]
+
+    linhas = sum(total for total, _ in resultados)
+    elapsed = sum(tempo for _, tempo in resultados)
+    print(
+        f"✓ Carga: {linhas} linhas em {elapsed:.2f}s "
+        f"({linhas / elapsed if elapsed else 0:,.0f} linhas/s)"
+    )
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cria o banco de dados")
+    parser.add_argument("--db", default=DB_PATH, help="caminho do banco")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        help="gera N usuários sintéticos (N/2 produtos e 3N pedidos)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Iniciando criação do banco de dados...")
     print("=" * 60)
-    criar_banco()
+    inicio = time.perf_counter()
+    criar_banco(args.db, args.scale, args.seed)
+    print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
     print("=" * 60)
@@ -0,0 +1,15 @@
+"""
+Teste de carga ponta a ponta com varredura de concorrência
+
+Sobe o app (uvicorn) com um banco SQLite gerado e o substituto local da
+API externa (app/upstream_local.py), dispara todas as rotas em degraus
+de concorrência crescente e grava um JSON com throughput, p50/p95/p99 e
+taxa de erro por degrau, além do joelho de saturação. Dois resultados
+são comparados com o subcomando compare.
+
+Uso (na raiz do projeto):
+
+    python -m loadtest run --saida base.json
+    python -m loadtest run --saida replica.json --env DB_REPLICA_MEMORIA=1
+    python -m loadtest compare base.json replica.json
+"""
@@ -0,0 +1,234 @@
+"""
+Linha de comando do teste de carga (python -m loadtest run|compare)
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import httpx
+
+from loadtest import carga, cenarios
+from loadtest.ambiente import RAIZ, AmbienteLocal
+
+
+def _versao_codigo():
+    """Commit atual (com "+" se há alterações), para comparar versões"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        alterado = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+" if alterado else "")
+
+
+def _variaveis(pares):
+    env = {}
+    for par in pares:
+        nome, sep, valor = par.partition("=")
+        if not sep:
+            raise SystemExit(f"--env espera NOME=VALOR: {par!r}")
+        env[nome] = valor
+    return env
+
+
+def _fabrica_clientes(url, timeout):
+    def criar(concorrencia):
+        return httpx.AsyncClient(
+            base_url=url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=concorrencia,
+                max_keepalive_connections=concorrencia,
+            ),
+        )
+
+    return criar
+
+
+def _avisar_rotas_sem_cenario(url):
+    try:
+        openapi = httpx.get(f"{url}/openapi.json", timeout=10).json()
+    except (httpx.HTTPError, ValueError):
+        return
+    for metodo, rota in cenarios.rotas_sem_cenario(openapi):
+        print(f"aviso: {metodo} {rota} sem cenário de carga", file=sys.stderr)
+
+
+def executar(args):
+    try:
+        selecionados = cenarios.selecionar(args.rotas, args.grupos)
+    except KeyError as e:
+        raise SystemExit(f"Cenário desconhecido: {e.args[0]}")
+    env = _variaveis(args.env)
+    configuracao = {
+        "url": args.url,
+        "env": env,
+        "args_uvicorn": args.uvicorn,
+        "args_upstream": args.upstream,
+        "escala": args.escala,
+        "concorrencias": args.concorrencias,
+        "duracao_s": args.duracao,
+        "aquecimento_s": args.aquecimento,
+        "grupos": args.grupos,
+        "rotas": [cenario.nome for cenario in selecionados],
+    }
+
+    def varrer(url):
+        _avisar_rotas_sem_cenario(url)
+        return asyncio.run(
+            carga.varrer(
+                _fabrica_clientes(url, args.timeout),
+                selecionados,
+                args.concorrencias,
+                args.duracao,
+                args.aquecimento,
+            )
+        )
+
+    if args.url:
+        degraus = varrer(args.url)
+    else:
+        with AmbienteLocal(
+            args.escala, env, args.uvicorn, args.upstream
+        ) as ambiente:
+            degraus = varrer(ambiente.url)
+
+    joelho = carga.encontrar_joelho(degraus)
+    resultado = {
+        "versao": carga.VERSAO_RESULTADO,
+        "rotulo": args.rotulo,
+        "quando": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "codigo": _versao_codigo(),
+        "configuracao": configuracao,
+        "degraus": degraus,
+        "joelho": joelho,
+    }
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+    situacao = (
+        f"saturação por {joelho['motivo']}"
+        if joelho["saturado"]
+        else "sem saturação até a maior concorrência"
+    )
+    print(
+        f"\nJoelho: {joelho['concorrencia']} clientes, "
+        f"{joelho['throughput']:.1f} req/s, p99 {joelho['p99_ms']:.1f} ms "
+        f"({situacao})"
+    )
+    print(f"Resultado em {args.saida}")
+
+
+def comparar(args):
+    with open(args.base, encoding="utf-8") as arquivo:
+        base = json.load(arquivo)
+    with open(args.novo, encoding="utf-8") as arquivo:
+        novo = json.load(arquivo)
+
+    linhas = carga.comparar(base, novo, args.limite)
+    print(
+        f"{'clientes':>8}{'req/s base':>12}{'req/s novo':>12}{'Δ':>8}"
+        f"{'p99 base':>10}{'p99 novo':>10}{'Δ':>8}  regressões"
+    )
+    for linha in linhas:
+        print(
+            f"{linha['concorrencia']:>8}"
+            f"{linha['throughput'][0]:>12.1f}{linha['throughput'][1]:>12.1f}"
+            f"{linha['variacao_throughput']:>+8.1%}"
+            f"{linha['p99_ms'][0]:>10.1f}{linha['p99_ms'][1]:>10.1f}"
+            f"{linha['variacao_p99']:>+8.1%}"
+            f"  {', '.join(linha['regressoes']) or '-'}"
+        )
+    print(
+        f"\nJoelho: {base['joelho']['concorrencia']} -> "
+        f"{novo['joelho']['concorrencia']} clientes"
+    )
+    if any(linha["regressoes"] for linha in linhas):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest",
+        description="Teste de carga com varredura de concorrência",
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    run = comandos.add_parser("run", help="executa a varredura")
+    run.add_argument("--saida", default="loadtest.json")
+    run.add_argument("--rotulo", help="nome da configuração medida")
+    run.add_argument(
+        "--url", help="app já em execução (senão sobe um ambiente local)"
+    )
+    run.add_argument(
+        "--concorrencias",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16, 32, 64],
+    )
+    run.add_argument("--duracao", type=float, default=10.0)
+    run.add_argument("--aquecimento", type=float, default=1.0)
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument(
+        "--rotas", nargs="+", help="cenários (padrão: os dos --grupos)"
+    )
+    run.add_argument(
+        "--grupos",
+        nargs="+",
+        choices=cenarios.GRUPOS,
+        default=["leitura"],
+        help="grupos de cenários (escrita muda os dados entre degraus)",
+    )
+    run.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        help="variável NOME=VALOR do app (repetível)",
+    )
+    run.add_argument("--escala", type=int, help="usuários do banco gerado")
+    run.add_argument(
+        "--uvicorn",
+        action="append",
+        default=[],
+        help="opção extra do uvicorn (repetível, ex.: --uvicorn=--workers)",
+    )
+    run.add_argument(
+        "--upstream",
+        action="append",
+        default=[],
+        help="opção do app/upstream_local.py (repetível)",
+    )
+    run.set_defaults(funcao=executar)
+
+    compare = comandos.add_parser("compare", help="compara dois resultados")
+    compare.add_argument("base")
+    compare.add_argument("novo")
+    compare.add_argument(
+        "--limite",
+        type=float,
+        default=0.1,
+        help="variação tolerada de throughput e p99 (fração)",
+    )
+    compare.set_defaults(funcao=comparar)
+
+    args = parser.parse_args()
+    args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
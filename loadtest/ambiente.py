@@ -0,0 +1,132 @@
+"""
+Ambiente local do teste de carga: banco gerado, API externa e app
+
+Tudo roda em processos separados (o gerador de carga não disputa a CPU
+do event loop do app) dentro de um diretório temporário, que é o
+diretório de trabalho do app: o database.db dele é o banco gerado.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+import init_db
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _aguardar(url, processo, prazo=60.0):
+    """Espera o servidor responder 200 (ou o processo morrer)"""
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"Processo encerrou ao iniciar ({url})")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Servidor não respondeu a tempo ({url})")
+
+
+class AmbienteLocal:
+    """
+    Context manager que sobe o substituto da API externa e o app
+
+    env: variáveis extras do app (ex.: {"DB_REPLICA_MEMORIA": "1"});
+    args_uvicorn: opções extras do uvicorn (ex.: ["--workers", "4"]);
+    args_upstream: opções do app/upstream_local.py (ex.: latência).
+    """
+
+    def __init__(
+        self, escala=None, env=None, args_uvicorn=(), args_upstream=()
+    ):
+        self.escala = escala
+        self.env = env or {}
+        self.args_uvicorn = list(args_uvicorn)
+        self.args_upstream = list(args_upstream)
+        self.url = None
+        self._diretorio = None
+        self._processos = []
+
+    def _iniciar(self, comando, env=None, cwd=RAIZ):
+        processo = subprocess.Popen(
+            comando, cwd=cwd, env=env, stdout=subprocess.DEVNULL
+        )
+        self._processos.append(processo)
+        return processo
+
+    def __enter__(self):
+        self._diretorio = tempfile.TemporaryDirectory()
+        try:
+            init_db.criar_banco(
+                os.path.join(self._diretorio.name, "database.db"),
+                self.escala,
+            )
+
+            porta_upstream = porta_livre()
+            upstream = self._iniciar(
+                [
+                    sys.executable,
+                    "-m",
+                    "app.upstream_local",
+                    "--porta",
+                    str(porta_upstream),
+                    *self.args_upstream,
+                ]
+            )
+            url_upstream = f"http://127.0.0.1:{porta_upstream}"
+            _aguardar(f"{url_upstream}/users/1", upstream)
+
+            porta = porta_livre()
+            env = {
+                **os.environ,
+                "PYTHONPATH": RAIZ,
+                "UPSTREAM_BASE_URL": url_upstream,
+                **self.env,
+            }
+            app = self._iniciar(
+                [
+                    sys.executable,
+                    "-m",
+                    "uvicorn",
+                    "app.main:app",
+                    "--port",
+                    str(porta),
+                    "--log-level",
+                    "warning",
+                    "--no-access-log",
+                    *self.args_uvicorn,
+                ],
+                env=env,
+                cwd=self._diretorio.name,
+            )
+            self.url = f"http://127.0.0.1:{porta}"
+            _aguardar(f"{self.url}/", app)
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        for processo in reversed(self._processos):
+            processo.terminate()
+            try:
+                processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+        self._processos.clear()
+        self._diretorio.cleanup()
+        return False
@@ -0,0 +1,199 @@
+"""
+Execução dos degraus de carga, joelho de saturação e comparação
+
+Cada degrau é uma carga em laço fechado: `concorrencia` clientes
+disparam os cenários em rodízio, cada um enviando a próxima requisição
+assim que recebe a resposta. O throughput conta só as respostas
+esperadas; as demais (e falhas de conexão/timeout) entram na taxa de
+erro.
+"""
+
+import asyncio
+import itertools
+import time
+
+import httpx
+
+from app.query_stats import percentil
+
+# Versão do formato do JSON de resultado
+VERSAO_RESULTADO = 1
+
+
+def resumir(latencias, erros, duracao):
+    """Throughput (respostas esperadas/s), percentis (ms) e taxa de erro"""
+    ordenadas = sorted(latencias)
+    total = len(ordenadas) + erros
+    return {
+        "requisicoes": total,
+        "erros": erros,
+        "taxa_erro": round(erros / total, 4) if total else 0.0,
+        "throughput": round(len(ordenadas) / duracao, 2),
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 3),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 3),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3) if ordenadas else 0.0,
+    }
+
+
+async def _enviar(cliente, cenario):
+    """(sucesso, latência em s) de uma requisição"""
+    inicio = time.perf_counter()
+    try:
+        response = await cliente.request(
+            cenario.metodo,
+            cenario.caminho,
+            params=cenario.params,
+            json=cenario.json,
+            content=cenario.conteudo,
+            headers=cenario.headers,
+        )
+        await response.aread()
+        sucesso = response.status_code in cenario.esperados
+    except httpx.HTTPError:
+        sucesso = False
+    return sucesso, time.perf_counter() - inicio
+
+
+async def executar_degrau(
+    cliente, cenarios, concorrencia, duracao, aquecimento=0.0
+):
+    """
+    Roda um degrau e devolve o resumo geral e por cenário
+
+    As respostas do aquecimento (conexões novas, caches frios) são
+    descartadas.
+    """
+    latencias = {cenario.nome: [] for cenario in cenarios}
+    erros = dict.fromkeys(latencias, 0)
+    inicio = time.perf_counter()
+    medir_a_partir = inicio + aquecimento
+    fim = medir_a_partir + duracao
+
+    async def cliente_carga(deslocamento):
+        ordem = itertools.cycle(
+            cenarios[deslocamento:] + cenarios[:deslocamento]
+        )
+        while time.perf_counter() < fim:
+            cenario = next(ordem)
+            enviado = time.perf_counter()
+            sucesso, latencia = await _enviar(cliente, cenario)
+            if enviado < medir_a_partir:
+                continue
+            if sucesso:
+                latencias[cenario.nome].append(latencia)
+            else:
+                erros[cenario.nome] += 1
+
+    await asyncio.gather(
+        *(cliente_carga(i % len(cenarios)) for i in range(concorrencia))
+    )
+    medido = time.perf_counter() - medir_a_partir
+
+    degrau = {
+        "concorrencia": concorrencia,
+        "duracao_s": round(medido, 3),
+        **resumir(
+            [lat for valores in latencias.values() for lat in valores],
+            sum(erros.values()),
+            medido,
+        ),
+    }
+    degrau["rotas"] = {
+        nome: resumir(valores, erros[nome], medido)
+        for nome, valores in latencias.items()
+    }
+    return degrau
+
+
+async def varrer(
+    cliente_factory, cenarios, concorrencias, duracao, aquecimento=1.0
+):
+    """Degraus de concorrência crescente; um cliente HTTP por degrau"""
+    degraus = []
+    for concorrencia in concorrencias:
+        async with cliente_factory(concorrencia) as cliente:
+            degrau = await executar_degrau(
+                cliente, cenarios, concorrencia, duracao, aquecimento
+            )
+        degraus.append(degrau)
+        print(
+            f"{concorrencia:>6} clientes: {degrau['throughput']:>9.1f} req/s"
+            f"  p50 {degrau['p50_ms']:>8.1f} ms"
+            f"  p99 {degrau['p99_ms']:>8.1f} ms"
+            f"  erros {degrau['taxa_erro']:>6.1%}"
+        )
+    return degraus
+
+
+def encontrar_joelho(degraus, ganho_minimo=0.1, limite_erros=0.01):
+    """
+    Último degrau antes da saturação
+
+    O throughput satura quando dobrar (ou aumentar) a concorrência deixa
+    de render ao menos `ganho_minimo` a mais, ou quando a taxa de erro
+    passa de `limite_erros`; daí em diante só a latência cresce. Devolve
+    o degrau do joelho, o motivo e se a saturação chegou a ser vista
+    (sem isso, o joelho está acima da maior concorrência medida).
+    """
+    if not degraus:
+        return None
+    joelho, motivo = degraus[0], None
+    for anterior, atual in zip(degraus, degraus[1:]):
+        if atual["taxa_erro"] > limite_erros:
+            motivo = "erros"
+        elif atual["throughput"] < anterior["throughput"] * (1 + ganho_minimo):
+            motivo = "throughput"
+        if motivo:
+            break
+        joelho = atual
+    return {
+        "concorrencia": joelho["concorrencia"],
+        "throughput": joelho["throughput"],
+        "p99_ms": joelho["p99_ms"],
+        "saturado": motivo is not None,
+        "motivo": motivo,
+    }
+
+
+def comparar(base, novo, limite=0.1, limite_erros=0.01):
+    """
+    Diferenças por degrau (mesma concorrência) entre dois resultados
+
+    Regressão: throughput caiu ou p99 subiu mais que `limite` (fração do
+    valor base), ou a taxa de erro subiu mais que `limite_erros`.
+    """
+    por_concorrencia = {d["concorrencia"]: d for d in base["degraus"]}
+    linhas = []
+    for degrau in novo["degraus"]:
+        anterior = por_concorrencia.get(degrau["concorrencia"])
+        if anterior is None:
+            continue
+        throughput = _variacao(anterior["throughput"], degrau["throughput"])
+        p99 = _variacao(anterior["p99_ms"], degrau["p99_ms"])
+        erros = degrau["taxa_erro"] - anterior["taxa_erro"]
+        motivos = []
+        if throughput < -limite:
+            motivos.append("throughput")
+        if p99 > limite:
+            motivos.append("p99")
+        if erros > limite_erros:
+            motivos.append("erros")
+        linhas.append(
+            {
+                "concorrencia": degrau["concorrencia"],
+                "throughput": (anterior["throughput"], degrau["throughput"]),
+                "variacao_throughput": round(throughput, 4),
+                "p99_ms": (anterior["p99_ms"], degrau["p99_ms"]),
+                "variacao_p99": round(p99, 4),
+                "taxa_erro": (anterior["taxa_erro"], degrau["taxa_erro"]),
+                "regressoes": motivos,
+            }
+        )
+    return linhas
+
+
+def _variacao(anterior, atual):
+    if not anterior:
+        return 0.0 if not atual else float("inf")
+    return (atual - anterior) / anterior
@@ -0,0 +1,281 @@
+"""
+Requisição de carga de cada rota do app
+
+Os valores batem com o banco de exemplo do init_db (ids 1..5 de
+usuários, 1..7 de produtos) e com os dados padrão do substituto local da
+API externa. rotas_sem_cenario() aponta rotas novas ainda sem cenário.
+
+Os cenários de escrita ficam em um grupo à parte, fora da varredura
+padrão: cada escrita muda a versão dos dados (invalida o cache de
+consultas, a réplica e o índice de usuários) e faz o catálogo crescer
+entre os degraus, o que tornaria os degraus incomparáveis entre si.
+"""
+
+import json
+
+# Rotas fora da carga: administração e as que exigem sessão
+ROTAS_EXCLUIDAS = {("GET", "/auth/me"), ("POST", "/auth/logout")}
+PREFIXOS_EXCLUIDOS = ("/admin/",)
+
+
+class Cenario:
+    """Uma requisição da carga e os status considerados sucesso"""
+
+    __slots__ = (
+        "nome",
+        "metodo",
+        "rota",
+        "caminho",
+        "params",
+        "json",
+        "conteudo",
+        "headers",
+        "esperados",
+        "grupo",
+    )
+
+    def __init__(
+        self,
+        nome,
+        metodo,
+        rota,
+        caminho=None,
+        params=None,
+        json=None,
+        conteudo=None,
+        headers=None,
+        esperados=(200,),
+        grupo="leitura",
+    ):
+        self.nome = nome
+        self.metodo = metodo
+        self.rota = rota  # template, como no roteamento do app
+        self.caminho = caminho or rota
+        self.params = params
+        self.json = json
+        self.conteudo = conteudo
+        self.headers = headers
+        self.esperados = esperados
+        self.grupo = grupo  # "leitura" ou "escrita"
+
+
+_PRODUTOS_NDJSON = "\n".join(
+    json.dumps({"name": f"Carga {i}", "price": i, "category": "Carga"})
+    for i in range(1, 11)
+).encode()
+
+CENARIOS = [
+    # API externa (substituto local)
+    Cenario("raiz", "GET", "/"),
+    Cenario("posts", "GET", "/posts", params={"limit": 10}),
+    Cenario("post", "GET", "/posts/{post_id}", "/posts/1"),
+    Cenario(
+        "post_comments",
+        "GET",
+        "/posts/{post_id}/comments",
+        "/posts/1/comments",
+    ),
+    Cenario("users", "GET", "/users"),
+    Cenario("user", "GET", "/users/{user_id}", "/users/1"),
+    Cenario("user_posts", "GET", "/users/{user_id}/posts", "/users/1/posts"),
+    Cenario("comments", "GET", "/comments", params={"limit": 10}),
+    Cenario("todo", "GET", "/todos/{todo_id}", "/todos/1"),
+    Cenario(
+        "album_photos",
+        "GET",
+        "/albums/{album_id}/photos",
+        "/albums/1/photos",
+        params={"limit": 10},
+    ),
+    Cenario("user_stats", "GET", "/users/{user_id}/stats", "/users/1/stats"),
+    # SQLite: busca e verificação (as vulneráveis ficam no bulkhead e
+    # podem recusar com 503)
+    Cenario(
+        "users_search_secure",
+        "GET",
+        "/users/search-secure",
+        params={"username": "jo"},
+    ),
+    Cenario(
+        "users_search_vulnerable",
+        "GET",
+        "/users/search-vulnerable",
+        params={"username": "jo"},
+        esperados=(200, 503),
+    ),
+    Cenario(
+        "products_search_secure",
+        "GET",
+        "/products/search-secure",
+        params={"category": "Eletrônicos"},
+    ),
+    Cenario(
+        "products_search_vulnerable",
+        "GET",
+        "/products/search-vulnerable",
+        params={"category": "Eletrônicos"},
+        esperados=(200, 503),
+    ),
+    Cenario(
+        "products_search_stream",
+        "GET",
+        "/products/search-secure/stream",
+        params={"category": "Eletrônicos"},
+    ),
+    Cenario(
+        "products_check_secure",
+        "GET",
+        "/products/check-secure",
+        params={"product_id": 1},
+    ),
+    Cenario(
+        "products_check_vulnerable",
+        "GET",
+        "/products/check-vulnerable",
+        params={"product_id": "1"},
+        esperados=(200, 503),
+    ),
+    Cenario(
+        "products_check_batch",
+        "GET",
+        "/products/check-secure/batch",
+        params={"ids": [1, 2, 3]},
+    ),
+    Cenario(
+        "products_check_batch_post",
+        "POST",
+        "/products/check-secure/batch",
+        json={"ids": [1, 2, 3]},
+    ),
+    Cenario(
+        "users_check_secure",
+        "GET",
+        "/users/check-secure",
+        params={"user_id": 1},
+    ),
+    Cenario(
+        "users_check_vulnerable",
+        "GET",
+        "/users/check-vulnerable",
+        params={"user_id": "1"},
+        esperados=(200, 503),
+    ),
+    Cenario(
+        "users_check_batch",
+        "GET",
+        "/users/check-secure/batch",
+        params={"ids": [1, 2, 3]},
+    ),
+    Cenario(
+        "users_check_batch_post",
+        "POST",
+        "/users/check-secure/batch",
+        json={"ids": [1, 2, 3]},
+    ),
+    # Login: credenciais inválidas também são 200 ("sucesso": false, caso
+    # dos bancos gerados, sem o usuário); 503 quando o pool de hash ou o
+    # bulkhead está cheio
+    Cenario(
+        "login_secure",
+        "GET",
+        "/auth/login-secure",
+        params={"username": "joao", "password": "senha123"},
+        esperados=(200, 503),
+    ),
+    Cenario(
+        "login_vulnerable",
+        "GET",
+        "/auth/login-vulnerable",
+        params={"username": "joao", "password": "senha123"},
+        esperados=(200, 503),
+    ),
+    # Catálogo
+    Cenario(
+        "search_text",
+        "GET",
+        "/products/search-text",
+        params={"q": "notebook"},
+    ),
+    Cenario(
+        "catalog",
+        "GET",
+        "/products/catalog",
+        params={"ordenar": "price", "tamanho": 20},
+    ),
+    Cenario("export", "GET", "/products/export", params={"formato": "csv"}),
+    # Pedidos
+    Cenario(
+        "revenue_by_user",
+        "GET",
+        "/orders/analytics/revenue-by-user",
+        params={"limit": 10},
+    ),
+    Cenario(
+        "revenue_of_user",
+        "GET",
+        "/orders/analytics/users/{user_id}",
+        "/orders/analytics/users/2",
+    ),
+    Cenario(
+        "units_by_product",
+        "GET",
+        "/orders/analytics/units-by-product",
+        params={"limit": 10},
+    ),
+    Cenario(
+        "units_of_product",
+        "GET",
+        "/orders/analytics/products/{product_id}",
+        "/orders/analytics/products/1",
+    ),
+    Cenario("orders_status", "GET", "/orders/analytics/status"),
+    Cenario("metrics", "GET", "/metrics"),
+    # Escrita (grupo opcional)
+    Cenario(
+        "bulk",
+        "POST",
+        "/products/bulk",
+        conteudo=_PRODUTOS_NDJSON,
+        headers={"Content-Type": "application/x-ndjson"},
+        grupo="escrita",
+    ),
+    Cenario(
+        "order_create",
+        "POST",
+        "/orders",
+        json={"user_id": 2, "product_id": 1, "quantity": 1},
+        esperados=(201,),
+        grupo="escrita",
+    ),
+]
+
+GRUPOS = ("leitura", "escrita")
+
+
+def selecionar(nomes=None, grupos=("leitura",)):
+    """
+    Cenários pelo nome ou, sem nomes, os dos grupos pedidos
+
+    KeyError se algum nome é desconhecido.
+    """
+    if not nomes:
+        return [cenario for cenario in CENARIOS if cenario.grupo in grupos]
+    por_nome = {cenario.nome: cenario for cenario in CENARIOS}
+    return [por_nome[nome] for nome in nomes]
+
+
+def rotas_sem_cenario(openapi):
+    """(método, rota) do schema OpenAPI do app sem cenário de carga"""
+    cobertas = {(c.metodo, c.rota) for c in CENARIOS}
+    faltando = []
+    for rota, operacoes in openapi["paths"].items():
+        for metodo in operacoes:
+            chave = (metodo.upper(), rota)
+            if (
+                chave in cobertas
+                or chave in ROTAS_EXCLUIDAS
+                or rota.startswith(PREFIXOS_EXCLUIDOS)
+            ):
+                continue
+            faltando.append(chave)
+    return faltando
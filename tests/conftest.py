@@ -0,0 +1,16 @@
+import pytest
+
+import init_db
+from app import database
+
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    """
+    Fixture que cria um banco novo (com os dados de exemplo) em um
+    diretório temporário e aponta a aplicação para ele
+    """
+    db_path = str(tmp_path / "database.db")
+    init_db.criar_banco(db_path)
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    return db_path
@@ -0,0 +1,182 @@
+"""
+Testes da inicialização do banco (migrações sem perda de dados)
+"""
+
+import sqlite3
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database, schema
+from app.main import app
+
+
+def test_banco_novo_recebe_schema_completo(tmp_path):
+    db_path = str(tmp_path / "novo.db")
+
+    resultado = schema.inicializar_banco(db_path, aquecer=False)
+
+    assert resultado["migracoes_aplicadas"] == list(
+        range(1, schema.SCHEMA_VERSION + 1)
+    )
+    conn = sqlite3.connect(db_path)
+    assert schema.versao_schema(conn) == schema.SCHEMA_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+    conn.close()
+
+
+def test_banco_atual_nao_aplica_migracoes(banco_temporario):
+    resultado = schema.inicializar_banco(banco_temporario, aquecer=False)
+
+    assert resultado["versao_anterior"] == schema.SCHEMA_VERSION
+    assert resultado["migracoes_aplicadas"] == []
+
+
+def test_banco_antigo_e_migrado_sem_perder_dados(tmp_path):
+    """Banco só com as tabelas, como o init_db.py criava antes"""
+    db_path = str(tmp_path / "antigo.db")
+    conn = sqlite3.connect(db_path)
+    with conn:
+        schema.criar_tabelas(conn)
+        conn.execute(
+            "INSERT INTO products (name, description, price) "
+            "VALUES ('Mouse', 'Mouse sem fio', 85)"
+        )
+        conn.execute(
+            "INSERT INTO orders (user_id, product_id, quantity, total) "
+            "VALUES (1, 1, 2, 170)"
+        )
+    conn.close()
+
+    resultado = schema.inicializar_banco(db_path, aquecer=False)
+
+    conn = sqlite3.connect(db_path)
+    fts = conn.execute(
+        "SELECT rowid FROM products_fts WHERE products_fts MATCH 'fio'"
+    ).fetchall()
+    resumo = conn.execute("SELECT * FROM order_stats_user").fetchall()
+    conn.close()
+    assert resultado["versao_anterior"] == 0
+    assert fts == [(1,)]
+    assert resumo == [(1, 1, 2, 170.0)]
+
+
+def test_banco_mais_novo_que_o_app_e_recusado(tmp_path):
+    db_path = str(tmp_path / "futuro.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA user_version = {schema.SCHEMA_VERSION + 1}")
+    conn.close()
+
+    with pytest.raises(RuntimeError):
+        schema.inicializar_banco(db_path, aquecer=False)
+
+
+def test_migracao_interrompida_e_refeita_por_inteiro(tmp_path, monkeypatch):
+    """Falha no rebuild do FTS não deixa a tabela criada e o índice vazio"""
+    db_path = str(tmp_path / "interrompido.db")
+    conn = sqlite3.connect(db_path)
+    with conn:
+        schema.criar_tabelas(conn)
+        conn.execute(
+            "INSERT INTO products (name, description, price) "
+            "VALUES ('Notebook', 'Notebook leve', 3500)"
+        )
+    conn.close()
+
+    def falhar_no_rebuild(conn):
+        schema.criar_fts_produtos(conn)
+        raise sqlite3.OperationalError("queda durante o rebuild")
+
+    migracoes = list(schema.MIGRACOES)
+    migracoes[2] = falhar_no_rebuild
+    monkeypatch.setattr(schema, "MIGRACOES", migracoes)
+    with pytest.raises(sqlite3.OperationalError):
+        schema.inicializar_banco(db_path, aquecer=False)
+
+    conn = sqlite3.connect(db_path)
+    assert schema.versao_schema(conn) == 2
+    assert (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'products_fts'"
+        ).fetchone()
+        is None
+    )
+    conn.close()
+
+    monkeypatch.undo()
+    schema.inicializar_banco(db_path, aquecer=False)
+
+    conn = sqlite3.connect(db_path)
+    fts = conn.execute(
+        "SELECT rowid FROM products_fts WHERE products_fts MATCH 'notebook'"
+    ).fetchall()
+    conn.close()
+    assert fts == [(1,)]
+
+
+def test_migracao_aplicada_por_outro_processo_e_pulada(
+    banco_temporario, monkeypatch
+):
+    """Versão lida antes do lock ficou velha: outro worker já migrou"""
+    leituras = iter([schema.SCHEMA_VERSION - 1])
+    versao_real = schema.versao_schema
+
+    def versao_desatualizada(conn):
+        return next(leituras, None) or versao_real(conn)
+
+    def nao_rodar(conn):
+        raise AssertionError("migração aplicada duas vezes")
+
+    monkeypatch.setattr(schema, "versao_schema", versao_desatualizada)
+    monkeypatch.setattr(
+        schema, "MIGRACOES", schema.MIGRACOES[:-1] + [nao_rodar]
+    )
+
+    conn = sqlite3.connect(banco_temporario)
+    try:
+        assert schema.aplicar_migracoes(conn) == []
+    finally:
+        conn.close()
+
+
+def test_workers_simultaneos_migram_uma_vez(tmp_path):
+    db_path = str(tmp_path / "workers.db")
+    resultados = []
+
+    def subir():
+        resultados.append(schema.inicializar_banco(db_path, aquecer=False))
+
+    workers = [threading.Thread(target=subir) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    aplicadas = sorted(v for r in resultados for v in r["migracoes_aplicadas"])
+    assert len(resultados) == 4
+    assert aplicadas == list(range(1, schema.SCHEMA_VERSION + 1))
+
+
+def test_aquecimento_le_tabelas_quentes(banco_temporario):
+    conn = sqlite3.connect(banco_temporario)
+    usuarios = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    produtos = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    conn.close()
+
+    lidas = schema.aquecer_cache(banco_temporario)
+
+    assert lidas == {"users": usuarios, "products": produtos}
+    assert usuarios > 0 and produtos > 0
+
+
+def test_startup_do_app_inicializa_banco(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "startup.db")
+    monkeypatch.setattr(database, "DB_PATH", db_path)
+    monkeypatch.setenv("DB_WARM", "0")
+
+    with TestClient(app) as client:
+        response = client.get("/products/search-secure?category=Livros")
+
+    assert response.json()["total"] == 0
+    assert app.state.banco["versao"] == schema.SCHEMA_VERSION
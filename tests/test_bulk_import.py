@@ -0,0 +1,198 @@
+"""
+Testes da importação em massa de produtos (POST /products/bulk)
+"""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import bulk_import
+from app.main import app
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def _produtos(db_path, categoria):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT name, description, price, stock FROM products "
+        "WHERE category = ? ORDER BY id",
+        (categoria,),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def _em_pedacos(dados, tamanho):
+    async def gerar():
+        for inicio in range(0, len(dados), tamanho):
+            fim = inicio + tamanho
+            yield dados[inicio:fim]
+
+    return gerar()
+
+
+async def _coletar(registros):
+    return [item async for item in registros]
+
+
+def test_importa_ndjson_com_erros_por_linha(client, banco_temporario):
+    linhas = [
+        {"name": "Caneta", "price": 2.5, "stock": 10, "category": "Bulk"},
+        {"name": "", "price": 1, "category": "Bulk"},
+        "{json quebrado",
+        {"name": "Lápis", "price": "1.20", "category": "Bulk"},
+        {"name": "Borracha", "price": -1, "category": "Bulk"},
+    ]
+    corpo = "\n".join(
+        linha if isinstance(linha, str) else json.dumps(linha)
+        for linha in linhas
+    )
+
+    response = client.post(
+        "/products/bulk",
+        content=corpo.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    resultado = response.json()
+    assert resultado["recebidas"] == 5
+    assert resultado["inseridas"] == 2
+    assert resultado["total_erros"] == 3
+    assert [e["linha"] for e in resultado["erros"]] == [2, 3, 5]
+    assert _produtos(banco_temporario, "Bulk") == [
+        ("Caneta", None, 2.5, 10),
+        ("Lápis", None, 1.2, 0),
+    ]
+
+
+def test_importa_csv_com_quebra_de_linha_entre_aspas(client, banco_temporario):
+    corpo = (
+        "name,description,price,stock,category\r\n"
+        'Mesa,"Tampo de vidro,\r\n pés de metal",350.00,3,CSV\r\n'
+        'Cadeira "gamer",Reclinável,899.90,,CSV\r\n'
+        "Sem preço,,abc,1,CSV\r\n"
+        "Campos,demais,1,1,CSV,extra\r\n"
+    )
+
+    response = client.post(
+        "/products/bulk",
+        content=corpo.encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+
+    resultado = response.json()
+    assert resultado["formato"] == "csv"
+    assert resultado["inseridas"] == 2
+    assert [e["linha"] for e in resultado["erros"]] == [3, 4]
+    assert _produtos(banco_temporario, "CSV") == [
+        ("Mesa", "Tampo de vidro,\r\n pés de metal", 350.0, 3),
+        ('Cadeira "gamer"', "Reclinável", 899.9, 0),
+    ]
+
+
+def test_produtos_importados_entram_na_busca_textual(client):
+    corpo = json.dumps({"name": "Grampeador Xyzzy", "price": 15})
+    client.post("/products/bulk", content=corpo.encode())
+
+    response = client.get("/products/search-text", params={"q": "xyzzy"})
+
+    assert response.json()["total"] == 1
+
+
+def test_csv_independe_do_tamanho_dos_pedacos():
+    corpo = (
+        'name,description,price\nA,"linha 1\nlinha 2",1\nB,"x ""y""",2\n'
+    ).encode()
+
+    esperados = asyncio.run(
+        _coletar(bulk_import.registros_csv(_em_pedacos(corpo, len(corpo))))
+    )
+    for tamanho in (1, 2, 7):
+        registros = asyncio.run(
+            _coletar(bulk_import.registros_csv(_em_pedacos(corpo, tamanho)))
+        )
+        assert registros == esperados
+
+    assert esperados[0][1]["description"] == "linha 1\nlinha 2"
+    assert esperados[1][1]["description"] == 'x "y"'
+
+
+def test_grava_em_varios_lotes(client, banco_temporario, monkeypatch):
+    monkeypatch.setattr(bulk_import, "TAMANHO_LOTE", 10)
+    corpo = "\n".join(
+        json.dumps({"name": f"Item {i}", "price": i, "category": "Lotes"})
+        for i in range(35)
+    )
+
+    resultado = client.post("/products/bulk", content=corpo.encode()).json()
+
+    assert resultado["inseridas"] == 35
+    assert resultado["lotes"] == 4
+    assert len(_produtos(banco_temporario, "Lotes")) == 35
+
+
+@pytest.mark.parametrize("preco", ["inf", "1e999", "nan", "-inf"])
+def test_preco_nao_finito_e_recusado(client, banco_temporario, preco):
+    corpo = f"name,price,category\nInfinito,{preco},Infinitos\n"
+
+    resultado = client.post(
+        "/products/bulk?formato=csv", content=corpo.encode()
+    ).json()
+
+    assert resultado["inseridas"] == 0
+    assert "finito" in resultado["erros"][0]["erro"]
+    assert _produtos(banco_temporario, "Infinitos") == []
+    response = client.get("/products/search-secure?category=Livros")
+    assert response.status_code == 200
+
+
+def test_linha_grande_demais_vira_erro(monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_REGISTRO", 100)
+    corpo = (
+        json.dumps({"name": "x" * 200, "price": 1})
+        + "\n"
+        + json.dumps({"name": "Ok", "price": 1})
+    ).encode()
+
+    registros = asyncio.run(
+        _coletar(bulk_import.registros_ndjson(_em_pedacos(corpo, 7)))
+    )
+
+    assert [erro for _, _, erro in registros] == [
+        "registro maior que 100 bytes",
+        None,
+    ]
+    assert registros[1][1]["name"] == "Ok"
+
+
+def test_corpo_sem_quebra_de_linha_nao_acumula(monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_REGISTRO", 100)
+
+    async def sem_quebras():
+        for _ in range(1000):
+            yield b"x" * 1000
+
+    assert asyncio.run(_coletar(bulk_import.linhas(sem_quebras()))) == [None]
+
+
+def test_csv_com_aspas_abertas_descarta_o_registro(monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_REGISTRO", 100)
+    corpo = (
+        'name,price\nA,1\nB,"sem fechar\n' + "continua\n" * 20 + "C,3\n"
+    ).encode()
+
+    registros = asyncio.run(
+        _coletar(bulk_import.registros_csv(_em_pedacos(corpo, 5)))
+    )
+
+    assert registros[0] == (1, {"name": "A", "price": "1"}, None)
+    assert registros[1] == (2, None, "registro maior que 100 bytes")
+    assert registros[-1][1] == {"name": "C", "price": "3"}
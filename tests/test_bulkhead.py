@@ -0,0 +1,121 @@
+"""
+Testes do bulkhead das rotas de demonstração vulneráveis
+"""
+
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.bulkhead import Bulkhead, bulkhead_demo
+from app.main import app
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def test_rota_vulneravel_roda_no_executor_do_bulkhead():
+    bulkhead = Bulkhead("teste", max_workers=1, max_fila=0)
+
+    nome = asyncio.run(
+        bulkhead.executar(lambda: threading.current_thread().name)
+    )
+
+    assert nome.startswith("teste")
+
+
+def test_bulkhead_cheio_rejeita_imediatamente():
+    bulkhead = Bulkhead("teste", max_workers=1, max_fila=0)
+    liberar = threading.Event()
+
+    async def cenario():
+        ocupada = asyncio.ensure_future(bulkhead.executar(liberar.wait, 5))
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(HTTPException) as erro:
+                await bulkhead.executar(lambda: None)
+        finally:
+            liberar.set()
+            await ocupada
+        return erro.value
+
+    erro = asyncio.run(cenario())
+
+    assert erro.status_code == 503
+    assert bulkhead.rejeitadas == 1
+    assert bulkhead.em_andamento == 0
+
+
+def test_chamador_cancelado_mantem_a_vaga_ate_o_fim_do_trabalho():
+    bulkhead = Bulkhead("teste", max_workers=1, max_fila=0)
+    liberar = threading.Event()
+
+    async def cenario():
+        ocupada = asyncio.ensure_future(bulkhead.executar(liberar.wait, 5))
+        await asyncio.sleep(0.05)
+        ocupada.cancel()
+        await asyncio.sleep(0.01)
+
+        # o trabalho continua no executor: a vaga segue ocupada
+        assert bulkhead.em_andamento == 1
+        with pytest.raises(HTTPException):
+            await bulkhead.executar(lambda: None)
+
+        liberar.set()
+        for _ in range(100):
+            if bulkhead.em_andamento == 0:
+                break
+            await asyncio.sleep(0.01)
+        return await bulkhead.executar(lambda: "ok")
+
+    assert asyncio.run(cenario()) == "ok"
+    assert bulkhead.em_andamento == 0
+
+
+def test_conexao_do_bulkhead_e_somente_leitura(banco_temporario):
+    conn = bulkhead_demo.conexao()
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM users")
+    finally:
+        conn.close()
+
+
+def test_conexoes_sao_reutilizadas(banco_temporario):
+    primeira = bulkhead_demo.conexao()
+    primeira.close()
+    segunda = bulkhead_demo.conexao()
+    segunda.close()
+
+    assert primeira is segunda
+
+
+def test_copia_separada_do_banco(banco_temporario, tmp_path):
+    bulkhead = Bulkhead(
+        "teste", max_workers=1, max_fila=0, copia_banco=str(tmp_path / "c.db")
+    )
+    bulkhead.conexao().close()
+
+    original = sqlite3.connect(banco_temporario)
+    with original:
+        original.execute("DELETE FROM users")
+    original.close()
+
+    conn = bulkhead.conexao()
+    total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    conn.close()
+    assert total == 5
+
+
+def test_rotas_vulneraveis_continuam_demonstrando_ataques(client):
+    response = client.get(
+        "/auth/login-vulnerable",
+        params={"username": "admin' --", "password": "x"},
+    )
+
+    assert response.json()["sucesso"] is True
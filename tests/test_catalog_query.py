@@ -0,0 +1,126 @@
+"""
+Testes do catálogo com filtros e ordenação (GET /products/catalog)
+"""
+
+import itertools
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import schema
+from app.catalog_endpoints import montar_consulta_catalogo
+from app.main import app
+
+COMBINACOES = list(
+    itertools.product(
+        [None, "Eletrônicos"],  # category
+        [None, 10.0],  # preco_min
+        [None, 500.0],  # preco_max
+        [False, True],  # em_estoque
+        ["price", "name"],  # ordenar
+        ["asc", "desc"],  # ordem
+    )
+)
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("combinacao", COMBINACOES)
+def test_toda_combinacao_usa_indice(banco_temporario, combinacao):
+    sql, params = montar_consulta_catalogo(*combinacao)
+    conn = sqlite3.connect(banco_temporario)
+    plano = [
+        row[3]
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params + [20, 0])
+    ]
+    conn.close()
+
+    acessos = [p for p in plano if p.startswith(("SCAN", "SEARCH"))]
+    assert acessos, plano
+    for acesso in acessos:
+        assert "USING INDEX" in acesso or "USING COVERING INDEX" in acesso, (
+            combinacao,
+            plano,
+        )
+
+    # Com filtro, nada de percorrer um índice inteiro: só é aceito SCAN de
+    # um índice parcial que já contém apenas as linhas do filtro
+    category, preco_min, preco_max, em_estoque = combinacao[:4]
+    if category is not None or preco_min is not None or preco_max is not None:
+        assert all(a.startswith("SEARCH") for a in acessos), plano
+    elif em_estoque:
+        assert all(
+            any(indice in a for indice in schema.INDICES_ESTOQUE)
+            for a in acessos
+        ), plano
+
+
+def test_filtros_e_ordenacao(client, banco_temporario):
+    response = client.get(
+        "/products/catalog",
+        params={
+            "category": "Eletrônicos",
+            "preco_min": 100,
+            "em_estoque": True,
+            "ordenar": "price",
+            "ordem": "desc",
+        },
+    )
+
+    assert response.status_code == 200
+    produtos = response.json()["products"]
+
+    conn = sqlite3.connect(banco_temporario)
+    esperados = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM products WHERE category = 'Eletrônicos' "
+            "AND price >= 100 AND stock > 0 ORDER BY price DESC, id DESC"
+        )
+    ]
+    conn.close()
+    assert [p["id"] for p in produtos] == esperados
+    assert esperados
+
+
+def test_paginacao_indica_proxima_pagina(client):
+    primeira = client.get(
+        "/products/catalog", params={"tamanho": 2, "ordenar": "name"}
+    ).json()
+    segunda = client.get(
+        "/products/catalog",
+        params={"tamanho": 2, "ordenar": "name", "pagina": 2},
+    ).json()
+
+    assert primeira["proxima"] is True
+    assert len(primeira["products"]) == 2
+    nomes = [p["name"] for p in primeira["products"] + segunda["products"]]
+    assert nomes == sorted(nomes)
+
+
+def test_valores_maliciosos_sao_parametros(client):
+    response = client.get(
+        "/products/catalog", params={"category": "' OR '1'='1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["products"] == []
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"ordenar": "price; DROP TABLE products"},
+        {"ordem": "asc, (SELECT 1)"},
+        {"preco_min": -1},
+        {"tamanho": 101},
+    ],
+)
+def test_parametros_fora_da_lista_sao_recusados(client, params):
+    response = client.get("/products/catalog", params=params)
+
+    assert response.status_code == 422
@@ -0,0 +1,123 @@
+"""
+Testes da criação de pedidos com group commit
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.group_commit import EscritorPedidos, PedidoInvalido
+from app.main import app
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+@pytest.fixture
+def escritor(banco_temporario):
+    escritor = EscritorPedidos(max_lote=64, max_espera=0.05)
+    yield escritor
+    escritor.parar()
+
+
+def _contar_pedidos(db_path):
+    conn = sqlite3.connect(db_path)
+    total = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+    conn.close()
+    return total
+
+
+def test_post_orders_cria_pedido_com_total_do_produto(client):
+    response = client.post(
+        "/orders", json={"user_id": 2, "product_id": 2, "quantity": 3}
+    )
+
+    assert response.status_code == 201
+    pedido = response.json()
+    assert pedido["total"] == 255.0
+    assert pedido["status"] == "pending"
+
+    resumo = client.get("/orders/analytics/users/2").json()
+    assert resumo["pedidos"] == 3
+
+
+def test_post_orders_produto_inexistente_retorna_422(client):
+    response = client.post(
+        "/orders", json={"user_id": 2, "product_id": 9999, "quantity": 1}
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Produto não encontrado"
+
+
+def test_post_orders_valida_quantidade(client):
+    response = client.post(
+        "/orders", json={"user_id": 2, "product_id": 1, "quantity": 0}
+    )
+
+    assert response.status_code == 422
+
+
+def test_pedidos_simultaneos_sao_gravados_no_mesmo_lote(
+    escritor, banco_temporario
+):
+    antes = _contar_pedidos(banco_temporario)
+
+    async def cenario():
+        return await asyncio.gather(
+            *(escritor.inserir(2, 1 + i % 5, 1) for i in range(50))
+        )
+
+    pedidos = asyncio.run(cenario())
+
+    assert len({p["id"] for p in pedidos}) == 50
+    assert escritor.lotes < 50
+    assert escritor.maior_lote > 1
+    assert _contar_pedidos(banco_temporario) == antes + 50
+
+
+def test_pedido_invalido_nao_afeta_os_outros_do_lote(
+    escritor, banco_temporario
+):
+    antes = _contar_pedidos(banco_temporario)
+
+    async def cenario():
+        return await asyncio.gather(
+            escritor.inserir(2, 1, 1),
+            escritor.inserir(9999, 1, 1),
+            escritor.inserir(3, 2, 1),
+            return_exceptions=True,
+        )
+
+    primeiro, invalido, terceiro = asyncio.run(cenario())
+
+    assert isinstance(invalido, PedidoInvalido)
+    assert primeiro["lote"] == terceiro["lote"] == 3
+    assert _contar_pedidos(banco_temporario) == antes + 2
+
+
+def test_chamador_cancelado_nao_trava_os_outros_do_lote(
+    escritor, banco_temporario
+):
+    antes = _contar_pedidos(banco_temporario)
+
+    async def cenario():
+        cancelado = asyncio.ensure_future(escritor.inserir(2, 1, 1))
+        outro = asyncio.ensure_future(escritor.inserir(3, 2, 1))
+        await asyncio.sleep(0.01)  # ambos na fila, lote ainda aberto
+        cancelado.cancel()
+        pedido = await asyncio.wait_for(outro, timeout=5)
+        seguinte = await asyncio.wait_for(escritor.inserir(4, 3, 1), timeout=5)
+        return cancelado, pedido, seguinte
+
+    cancelado, pedido, seguinte = asyncio.run(cenario())
+
+    assert cancelado.cancelled()
+    assert pedido["user_id"] == 3
+    assert seguinte["user_id"] == 4
+    assert escritor._thread.is_alive()
+    assert _contar_pedidos(banco_temporario) == antes + 2
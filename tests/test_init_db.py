@@ -0,0 +1,89 @@
+"""
+Testes da criação do banco (dados de exemplo e carga em escala)
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+import init_db
+
+
+def _conteudo(db_path):
+    conn = sqlite3.connect(db_path)
+    conteudo = {
+        tabela: conn.execute(f"SELECT * FROM {tabela} ORDER BY id").fetchall()
+        for tabela in ("users", "products", "orders")
+    }
+    conn.close()
+    return conteudo
+
+
+def test_escala_gera_quantidades_proporcionais(tmp_path):
+    db_path = str(tmp_path / "escala.db")
+    init_db.criar_banco(db_path, escala=1000)
+
+    conteudo = _conteudo(db_path)
+    assert len(conteudo["users"]) == 1000
+    assert len(conteudo["products"]) == 500
+    assert len(conteudo["orders"]) == 3000
+
+
+def test_escala_e_deterministica(tmp_path):
+    a = str(tmp_path / "a.db")
+    b = str(tmp_path / "b.db")
+    c = str(tmp_path / "c.db")
+    init_db.criar_banco(a, escala=200, seed=1)
+    init_db.criar_banco(b, escala=200, seed=1)
+    init_db.criar_banco(c, escala=200, seed=2)
+
+    assert _conteudo(a) == _conteudo(b)
+    assert _conteudo(a) != _conteudo(c)
+
+
+def test_escala_cria_indices_fts_e_resumos(tmp_path):
+    db_path = str(tmp_path / "escala.db")
+    init_db.criar_banco(db_path, escala=300)
+
+    conn = sqlite3.connect(db_path)
+    total_fts = conn.execute(
+        "SELECT COUNT(*) FROM products_fts WHERE products_fts MATCH 'linha'"
+    ).fetchone()[0]
+    pedidos = conn.execute(
+        "SELECT SUM(pedidos) FROM order_stats_status"
+    ).fetchone()[0]
+    indices = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+    # pedidos com total = preço do produto * quantidade
+    divergentes = conn.execute(
+        "SELECT COUNT(*) FROM orders o JOIN products p "
+        "ON p.id = o.product_id "
+        "WHERE abs(o.total - round(p.price * o.quantity, 2)) > 0.001"
+    ).fetchone()[0]
+    conn.close()
+
+    assert total_fts == 150
+    assert pedidos == 900
+    assert "idx_orders_user_id" in indices
+    assert divergentes == 0
+
+
+def test_escala_independe_do_fuso_da_maquina(tmp_path, monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset indisponível")
+    conteudos = []
+    for fuso in ("UTC", "America/Sao_Paulo"):
+        monkeypatch.setenv("TZ", fuso)
+        time.tzset()
+        db_path = str(tmp_path / f"{fuso.replace('/', '_')}.db")
+        init_db.criar_banco(db_path, escala=50, seed=1)
+        conteudos.append(_conteudo(db_path))
+    monkeypatch.undo()
+    time.tzset()
+
+    assert conteudos[0] == conteudos[1]
@@ -0,0 +1,116 @@
+"""
+Testes do harness de carga (loadtest/)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.main import app
+from loadtest import carga, cenarios
+
+
+def _degrau(concorrencia, throughput, p99=10.0, taxa_erro=0.0):
+    return {
+        "concorrencia": concorrencia,
+        "throughput": throughput,
+        "p99_ms": p99,
+        "taxa_erro": taxa_erro,
+    }
+
+
+def test_toda_rota_do_app_tem_cenario():
+    assert cenarios.rotas_sem_cenario(app.openapi()) == []
+
+
+def test_escritas_ficam_fora_da_varredura_padrao():
+    padrao = {c.nome for c in cenarios.selecionar()}
+    escrita = {c.nome for c in cenarios.selecionar(grupos=("escrita",))}
+
+    assert escrita == {"bulk", "order_create"}
+    assert not padrao & escrita
+    assert [c.nome for c in cenarios.selecionar(["bulk"])] == ["bulk"]
+
+
+def test_degrau_contra_o_app(banco_temporario):
+    selecionados = cenarios.selecionar(
+        ["catalog", "users_check_secure", "revenue_of_user"]
+    )
+
+    async def rodar():
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transporte, base_url="http://teste"
+        ) as cliente:
+            return await carga.executar_degrau(
+                cliente, selecionados, concorrencia=3, duracao=0.3
+            )
+
+    degrau = asyncio.run(rodar())
+
+    assert degrau["concorrencia"] == 3
+    assert degrau["erros"] == 0
+    assert degrau["throughput"] > 0
+    assert degrau["p50_ms"] <= degrau["p95_ms"] <= degrau["p99_ms"]
+    assert set(degrau["rotas"]) == {c.nome for c in selecionados}
+    assert all(r["requisicoes"] > 0 for r in degrau["rotas"].values())
+
+
+def test_status_inesperado_conta_como_erro():
+    resumo = carga.resumir([0.01, 0.02, 0.03], erros=1, duracao=2.0)
+
+    assert resumo["requisicoes"] == 4
+    assert resumo["taxa_erro"] == 0.25
+    assert resumo["throughput"] == 1.5
+    assert resumo["p50_ms"] == 20.0
+    assert resumo["max_ms"] == 30.0
+
+
+def test_joelho_onde_o_throughput_para_de_crescer():
+    degraus = [
+        _degrau(1, 100),
+        _degrau(2, 190),
+        _degrau(4, 350),
+        _degrau(8, 370, p99=40),
+        _degrau(16, 360, p99=90),
+    ]
+
+    joelho = carga.encontrar_joelho(degraus)
+
+    assert joelho["concorrencia"] == 4
+    assert joelho["saturado"] is True
+    assert joelho["motivo"] == "throughput"
+
+
+def test_joelho_por_erros_e_sem_saturacao():
+    com_erros = [_degrau(1, 100), _degrau(2, 200), _degrau(4, 390, 0, 0.2)]
+    crescendo = [_degrau(1, 100), _degrau(2, 200), _degrau(4, 390)]
+
+    assert carga.encontrar_joelho(com_erros)["motivo"] == "erros"
+    assert carga.encontrar_joelho(com_erros)["concorrencia"] == 2
+    assert carga.encontrar_joelho(crescendo)["saturado"] is False
+    assert carga.encontrar_joelho(crescendo)["concorrencia"] == 4
+
+
+def test_comparacao_aponta_regressoes():
+    base = {"degraus": [_degrau(1, 100), _degrau(8, 400, p99=50)]}
+    novo = {
+        "degraus": [
+            _degrau(1, 105),
+            _degrau(8, 300, p99=80, taxa_erro=0.05),
+            _degrau(64, 10),
+        ]
+    }
+
+    linhas = carga.comparar(base, novo, limite=0.1)
+
+    assert [linha["concorrencia"] for linha in linhas] == [1, 8]
+    assert linhas[0]["regressoes"] == []
+    assert linhas[1]["regressoes"] == ["throughput", "p99", "erros"]
+    assert linhas[1]["variacao_throughput"] == pytest.approx(-0.25)
+
+
+def test_cenario_desconhecido():
+    with pytest.raises(KeyError):
+        cenarios.selecionar(["nao_existe"])
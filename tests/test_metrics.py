@@ -0,0 +1,134 @@
+"""
+Testes do endpoint /metrics (formato Prometheus) e do middleware
+"""
+
+import re
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import RegistroMetricas, metricas
+
+
+@pytest.fixture
+def client(banco_temporario):
+    metricas.limpar()
+    return TestClient(app)
+
+
+def _valor(texto, nome, **rotulos):
+    """Valor da série com os rótulos informados (todos precisam bater)"""
+    for linha in texto.splitlines():
+        if not linha.startswith(nome + "{") and not linha.startswith(
+            nome + " "
+        ):
+            continue
+        if all(f'{k}="{v}"' in linha for k, v in rotulos.items()):
+            return float(linha.rsplit(" ", 1)[1])
+    return None
+
+
+class _RespostaFalsa:
+    status_code = 200
+
+    def __init__(self, dados):
+        self._dados = dados
+
+    def json(self):
+        return self._dados
+
+
+def test_conta_requisicoes_por_template_da_rota(client):
+    client.get("/orders/analytics/users/2")
+    client.get("/orders/analytics/users/3")
+    client.get("/orders/analytics/users/999")
+    client.get("/rota/que/nao/existe")
+
+    texto = client.get("/metrics").text
+
+    rota = "/orders/analytics/users/{user_id}"
+    assert _valor(texto, "http_requests_total", route=rota, status=200) == 2
+    assert _valor(texto, "http_requests_total", route=rota, status=404) == 1
+    assert (
+        _valor(texto, "http_requests_total", route="desconhecida", status=404)
+        == 1
+    )
+    assert "/orders/analytics/users/2" not in texto
+
+
+def test_separa_tempo_da_api_externa_e_do_sqlite(client, monkeypatch):
+    def get_lento(url):
+        time.sleep(0.02)
+        if url.endswith("/posts"):
+            return _RespostaFalsa([{"id": 1, "title": "Post"}])
+        return _RespostaFalsa([{"id": 1}])
+
+    monkeypatch.setattr(requests, "get", get_lento)
+    client.get("/users/1/stats")
+    client.get("/products/catalog", params={"ordenar": "price"})
+
+    texto = client.get("/metrics").text
+
+    stats = "/users/{user_id}/stats"
+    assert _valor(texto, "http_request_upstream_seconds_sum", route=stats) >= (
+        0.04
+    )
+    assert _valor(texto, "http_request_db_seconds_sum", route=stats) == 0
+    catalogo = "/products/catalog"
+    assert _valor(texto, "http_request_db_seconds_sum", route=catalogo) > 0
+    assert (
+        _valor(texto, "http_request_upstream_seconds_sum", route=catalogo) == 0
+    )
+    assert (
+        _valor(
+            texto,
+            "http_request_duration_seconds_bucket",
+            route=stats,
+            le="+Inf",
+        )
+        == 1
+    )
+
+
+def test_histograma_e_cumulativo():
+    registro = RegistroMetricas()
+    for duracao in (0.0005, 0.003, 0.003, 7.0):
+        registro.registrar("GET", "/x", 200, duracao, {})
+
+    texto = registro.renderizar()
+
+    assert _valor(texto, "http_request_duration_seconds_bucket", le=0.001) == 1
+    assert _valor(texto, "http_request_duration_seconds_bucket", le=0.005) == 3
+    assert _valor(texto, "http_request_duration_seconds_bucket", le=5.0) == 3
+    assert (
+        _valor(texto, "http_request_duration_seconds_count", route="/x") == 4
+    )
+
+
+def test_expoe_gauges(client):
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    texto = response.text
+    assert re.search(r'^threadpool_threads\{estado="total"\} \d+', texto, re.M)
+    assert _valor(texto, "http_requests_in_flight") == 1
+    assert _valor(texto, "cache_hit_ratio", cache="consultas") is not None
+
+
+def test_registro_nao_cresce_com_as_requisicoes():
+    # O custo por chamada é medido em benchmarks/micro.py
+    # (metricas_registrar), não aqui: tempo de relógio em teste é instável
+    registro = RegistroMetricas()
+    fases = {"db_execute": 0.001, "db_fetch": 0.0005, "upstream": 0.01}
+
+    registro.registrar("GET", "/rota/{id}", 200, 0.02, fases)
+    series = len(registro.renderizar().splitlines())
+    for _ in range(19_999):
+        registro.registrar("GET", "/rota/{id}", 200, 0.02, fases)
+
+    texto = registro.renderizar()
+    assert len(texto.splitlines()) == series
+    assert _valor(texto, "http_requests_total", route="/rota/{id}") == 20_000
@@ -0,0 +1,54 @@
+"""
+Testes da suíte de micro-benchmarks (benchmarks/micro.py)
+"""
+
+from benchmarks import micro
+
+
+def _resultado(**tempos):
+    return {
+        "benchmarks": {
+            nome: {"min_s": tempo, "mediana_s": tempo}
+            for nome, tempo in tempos.items()
+        }
+    }
+
+
+def test_comparar_aponta_regressao_acima_do_limite():
+    base = _resultado(rapido=1.0, lento=1.0, removido=1.0)
+    novo = _resultado(rapido=0.8, lento=1.25, novo=1.0)
+
+    linhas = {linha["nome"]: linha for linha in micro.comparar(base, novo)}
+
+    # Benchmarks que não estão nos dois resultados ficam de fora
+    assert set(linhas) == {"rapido", "lento"}
+    assert linhas["rapido"]["variacao"] == -0.2
+    assert not linhas["rapido"]["regressao"]
+    assert linhas["lento"]["variacao"] == 0.25
+    assert linhas["lento"]["regressao"]
+    assert not micro.comparar(base, novo, limite=0.3)[1]["regressao"]
+
+
+def test_medir_devolve_um_tempo_por_repeticao():
+    chamadas = []
+
+    n, tempos = micro.medir(lambda: chamadas.append(1), repeticoes=3, alvo=0)
+
+    assert n == 1
+    assert len(tempos) == 3
+    assert len(chamadas) == 4  # calibração + 3 repetições
+
+
+def test_benchmarks_registrados_executam():
+    resultado = micro.executar(repeticoes=1, alvo=0)
+
+    assert set(resultado["benchmarks"]) == set(micro.BENCHMARKS)
+    for medida in resultado["benchmarks"].values():
+        assert medida["min_s"] > 0
+
+
+def test_dados_sinteticos_tem_o_tamanho_pedido():
+    posts, comentarios = micro.posts_e_comentarios(posts=10, comentarios=50)
+
+    assert len(posts) == 10
+    assert sum(len(lista) for lista in comentarios.values()) == 50
@@ -0,0 +1,117 @@
+"""
+Testes das análises de pedidos (tabelas de resumo mantidas por triggers)
+"""
+
+import random
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.schema import RESUMOS_PEDIDOS
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def test_deve_listar_receita_por_usuario(client):
+    response = client.get("/orders/analytics/revenue-by-user")
+
+    assert response.status_code == 200
+    usuarios = response.json()["usuarios"]
+    assert usuarios[0] == {
+        "user_id": 2,
+        "username": "joao",
+        "pedidos": 2,
+        "unidades": 4,
+        "receita": 3679.7,
+    }
+
+
+def test_deve_retornar_resumo_de_um_usuario(client):
+    response = client.get("/orders/analytics/users/3")
+
+    assert response.json() == {
+        "user_id": 3,
+        "pedidos": 2,
+        "unidades": 3,
+        "receita": 1370.0,
+    }
+
+
+def test_deve_retornar_404_para_usuario_sem_pedidos(client):
+    response = client.get("/orders/analytics/users/5")
+
+    assert response.status_code == 404
+
+
+def test_deve_listar_unidades_por_produto(client):
+    produtos = client.get("/orders/analytics/units-by-product").json()[
+        "produtos"
+    ]
+
+    assert produtos[0]["name"] == "Livro Python"
+    assert produtos[0]["unidades"] == 3
+    assert client.get("/orders/analytics/products/7").status_code == 404
+
+
+def test_deve_listar_pedidos_por_status(client):
+    status = client.get("/orders/analytics/status").json()["status"]
+
+    assert {s["status"]: s["pedidos"] for s in status} == {
+        "completed": 3,
+        "pending": 1,
+        "shipped": 1,
+    }
+
+
+def _agregado(conn, coluna):
+    """GROUP BY sobre orders, para comparar com o resumo"""
+    chave = "coalesce(status, '')" if coluna == "status" else coluna
+    rows = conn.execute(
+        f"SELECT {chave}, COUNT(*), SUM(quantity), ROUND(SUM(total), 2) "
+        f"FROM orders GROUP BY {chave}"
+    ).fetchall()
+    return sorted(rows)
+
+
+def test_resumos_iguais_ao_group_by_apos_escritas(client, banco_temporario):
+    rnd = random.Random(7)
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        for _ in range(300):
+            operacao = rnd.random()
+            if operacao < 0.6:
+                conn.execute(
+                    "INSERT INTO orders (user_id, product_id, quantity, "
+                    "total, status) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        rnd.randint(1, 5),
+                        rnd.randint(1, 7),
+                        rnd.randint(1, 5),
+                        round(rnd.uniform(1, 500), 2),
+                        rnd.choice(["pending", "shipped", None]),
+                    ),
+                )
+            elif operacao < 0.8:
+                conn.execute(
+                    "UPDATE orders SET status = ?, quantity = quantity + 1 "
+                    "WHERE id = (SELECT id FROM orders ORDER BY random())",
+                    (rnd.choice(["completed", "cancelled"]),),
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM orders "
+                    "WHERE id = (SELECT id FROM orders ORDER BY random())"
+                )
+
+    for tabela, coluna in RESUMOS_PEDIDOS.items():
+        resumo = conn.execute(
+            f"SELECT {coluna}, pedidos, unidades, ROUND(receita, 2) "
+            f"FROM {tabela}"
+        ).fetchall()
+        assert sorted(resumo) == _agregado(conn, coluna)
+    conn.close()
@@ -0,0 +1,213 @@
+"""
+Testes do hash de senhas (scrypt no pool de processos) e do login seguro
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app import passwords
+from app.main import app
+from app.passwords import ServicoSenhas, gerar_hash, verificar_hash
+
+# Parâmetros baratos para os testes
+N_TESTE = 2**10
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def _senha_no_banco(db_path, username):
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(
+        "SELECT password FROM users WHERE username = ?", (username,)
+    ).fetchone()
+    conn.close()
+    return row[0]
+
+
+def test_hash_confere_apenas_com_a_senha_certa():
+    armazenado = gerar_hash("segredo", n=N_TESTE)
+
+    assert armazenado.startswith(f"scrypt${N_TESTE}$8$1$")
+    assert verificar_hash("segredo", armazenado)
+    assert not verificar_hash("Segredo", armazenado)
+    assert not verificar_hash("segredo", "scrypt$lixo")
+
+
+def test_hash_usa_salt_aleatorio():
+    assert gerar_hash("segredo", n=N_TESTE) != gerar_hash("segredo", n=N_TESTE)
+
+
+def test_calibracao_respeita_o_alvo():
+    n = passwords.calibrar(alvo_ms=20)
+
+    assert n >= 2**10
+    assert n & (n - 1) == 0
+
+
+def test_servico_roda_no_pool_de_processos():
+    servico = ServicoSenhas(max_workers=1)
+    servico.configurar(n=N_TESTE)
+    try:
+        armazenado = asyncio.run(servico.gerar("segredo"))
+        resultado = asyncio.run(servico.verificar("segredo", armazenado))
+    finally:
+        servico.encerrar()
+
+    assert resultado == (True, False)
+
+
+def test_servico_cheio_rejeita_com_503():
+    servico = ServicoSenhas(max_workers=1, max_fila=0)
+    servico._vagas.acquire()
+
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(servico.gerar("segredo"))
+
+    assert erro.value.status_code == 503
+    assert servico.rejeitadas == 1
+
+
+def test_login_cancelado_mantem_a_vaga_ate_o_hash_terminar():
+    servico = ServicoSenhas(max_workers=1, max_fila=0)
+
+    async def cenario():
+        # aquece o pool: o processo já existe quando o hash começa
+        await servico._executar(time.sleep, 0)
+        ocupada = asyncio.ensure_future(servico._executar(time.sleep, 0.5))
+        await asyncio.sleep(0.1)
+        ocupada.cancel()
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as erro:
+            await servico._executar(time.sleep, 0)
+
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if servico._vagas.acquire(blocking=False):
+                servico._vagas.release()
+                break
+        await servico._executar(time.sleep, 0)
+        return erro.value
+
+    try:
+        erro = asyncio.run(cenario())
+    finally:
+        servico.encerrar()
+
+    assert erro.status_code == 503
+
+
+def test_usuario_inexistente_tambem_paga_o_scrypt():
+    servico = ServicoSenhas(max_workers=1)
+    servico.configurar(n=N_TESTE)
+    try:
+        resultados = [
+            asyncio.run(servico.verificar_ausente(senha))
+            for senha in ("", "qualquer")
+        ]
+    finally:
+        servico.encerrar()
+
+    assert resultados == [(False, False), (False, False)]
+    [ficticio] = servico._ficticios.values()
+    assert passwords.parametros(ficticio) == (N_TESTE, 8, 1)
+
+
+def test_login_de_usuario_inexistente_verifica_hash(client, monkeypatch):
+    chamadas = []
+    executar = passwords.servico_senhas._executar
+
+    async def espiar(funcao, *args):
+        chamadas.append(funcao)
+        return await executar(funcao, *args)
+
+    monkeypatch.setattr(passwords.servico_senhas, "_executar", espiar)
+
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "usuario_fake", "password": "qualquer"},
+    )
+
+    assert response.json()["sucesso"] is False
+    assert verificar_hash in chamadas
+
+
+def test_senha_legada_errada_tambem_paga_o_scrypt(
+    client, banco_temporario, monkeypatch
+):
+    chamadas = []
+    executar = passwords.servico_senhas._executar
+
+    async def espiar(funcao, *args):
+        chamadas.append(funcao)
+        return await executar(funcao, *args)
+
+    monkeypatch.setattr(passwords.servico_senhas, "_executar", espiar)
+
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "errada"},
+    )
+
+    assert response.json()["sucesso"] is False
+    assert _senha_no_banco(banco_temporario, "admin") == "admin123"
+    assert verificar_hash in chamadas
+
+
+def test_login_converte_senha_legada_em_hash(client, banco_temporario):
+    assert _senha_no_banco(banco_temporario, "admin") == "admin123"
+
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "admin123"},
+    )
+    assert response.json()["sucesso"] is True
+
+    armazenado = _senha_no_banco(banco_temporario, "admin")
+    assert passwords.e_hash(armazenado)
+    assert verificar_hash("admin123", armazenado)
+
+    # o login seguinte usa o hash
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "admin123"},
+    )
+    assert response.json()["sucesso"] is True
+    assert _senha_no_banco(banco_temporario, "admin") == armazenado
+
+
+def test_login_invalido_nao_altera_senha_legada(client, banco_temporario):
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "errada"},
+    )
+
+    assert response.json()["sucesso"] is False
+    assert _senha_no_banco(banco_temporario, "admin") == "admin123"
+
+
+def test_hash_com_parametros_antigos_e_refeito(client, banco_temporario):
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute(
+            "UPDATE users SET password = ? WHERE username = 'admin'",
+            (gerar_hash("admin123", n=N_TESTE),),
+        )
+    conn.close()
+
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "admin123"},
+    )
+
+    assert response.json()["sucesso"] is True
+    armazenado = _senha_no_banco(banco_temporario, "admin")
+    assert passwords.parametros(armazenado)[0] == passwords.SCRYPT_N
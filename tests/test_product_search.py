@@ -0,0 +1,94 @@
+"""
+Testes da busca textual de produtos (FTS5)
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.catalog_endpoints import montar_consulta_fts
+from app.main import app
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def test_deve_encontrar_produto_por_palavra_do_nome(client):
+    response = client.get("/products/search-text?q=notebook")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["products"][0]["name"] == "Notebook Dell"
+    assert data["products"][0]["destaque"] == "<mark>Notebook</mark> Dell"
+
+
+def test_deve_ignorar_acentos_e_destacar_descricao(client):
+    response = client.get("/products/search-text?q=ergonomica")
+
+    data = response.json()
+    assert data["total"] == 1
+    assert "<mark>ergonômica</mark>" in data["products"][0]["trecho"]
+
+
+def test_deve_ordenar_nome_antes_de_descricao(client, banco_temporario):
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute(
+            "INSERT INTO products (name, description, price, stock, category)"
+            " VALUES ('Suporte', 'Suporte para mouse', 10, 1, 'Acessórios')"
+        )
+    conn.close()
+
+    response = client.get("/products/search-text?q=mouse")
+
+    data = response.json()
+    assert data["total"] == 2
+    assert data["products"][0]["name"] == "Mouse Logitech"
+
+
+def test_deve_buscar_por_prefixo(client):
+    response = client.get("/products/search-text?q=gam&prefixo=true")
+
+    nomes = {p["name"] for p in response.json()["products"]}
+    assert nomes == {"Cadeira Gamer", "Headset Gamer"}
+
+
+def test_deve_paginar_resultados(client):
+    primeira = client.get("/products/search-text?q=gamer&tamanho=1").json()
+    segunda = client.get(
+        "/products/search-text?q=gamer&tamanho=1&pagina=2"
+    ).json()
+
+    assert primeira["total"] == segunda["total"] == 2
+    assert len(primeira["products"]) == len(segunda["products"]) == 1
+    assert primeira["products"][0]["id"] != segunda["products"][0]["id"]
+
+
+def test_triggers_mantem_indice_sincronizado(client, banco_temporario):
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute("UPDATE products SET name = 'Ultrabook' WHERE id = 1")
+        conn.execute("DELETE FROM products WHERE id = 2")
+    conn.close()
+
+    assert client.get("/products/search-text?q=dell").json()["total"] == 0
+    assert client.get("/products/search-text?q=ultrabook").json()["total"] == 1
+    assert client.get("/products/search-text?q=logitech").json()["total"] == 0
+
+
+@pytest.mark.parametrize(
+    "texto, esperado",
+    [
+        ("mouse sem fio", '"mouse" "sem" "fio"'),
+        ("note*", '"note"*'),
+        ('" OR 1=1 --', '"OR" "1" "1"'),
+        ("NEAR(a b)", '"NEAR" "a" "b"'),
+        ("", ""),
+    ],
+)
+def test_consulta_fts_escapa_sintaxe(texto, esperado):
+    assert montar_consulta_fts(texto) == esperado
@@ -0,0 +1,170 @@
+"""
+Testes do profiling sob demanda (header X-Profile e amostragem 1-em-N)
+"""
+
+import pstats
+import threading
+import time
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.profiling import registro_perfis
+
+ADMIN = {"X-Admin-Token": "segredo"}
+
+
+@pytest.fixture
+def client(banco_temporario, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "segredo")
+    registro_perfis.limpar()
+    yield TestClient(app)
+    registro_perfis.limpar()
+
+
+class _RespostaFalsa:
+    status_code = 200
+
+    def __init__(self, dados):
+        self._dados = dados
+
+    def json(self):
+        return self._dados
+
+
+def test_header_perfila_a_requisicao(client, tmp_path):
+    response = client.get(
+        "/orders/analytics/users/2", headers={"X-Profile": "segredo"}
+    )
+
+    assert response.status_code == 200
+    perfil_id = response.headers["X-Profile-Id"]
+    resumo = client.get("/admin/profiles", headers=ADMIN).json()["perfis"][0]
+    assert resumo["id"] == perfil_id
+    assert resumo["rota"] == "/orders/analytics/users/{user_id}"
+    assert resumo["motivo"] == "pedido"
+
+    texto = client.get(f"/admin/profiles/{perfil_id}", headers=ADMIN).text
+    assert "function calls" in texto
+    assert "revenue_of_user" in texto
+
+    arquivo = tmp_path / "perfil.pstats"
+    arquivo.write_bytes(
+        client.get(
+            f"/admin/profiles/{perfil_id}",
+            params={"formato": "pstats"},
+            headers=ADMIN,
+        ).content
+    )
+    assert pstats.Stats(str(arquivo)).total_calls > 0
+
+
+def test_token_invalido_nao_perfila(client):
+    response = client.get(
+        "/orders/analytics/users/2", headers={"X-Profile": "errado"}
+    )
+
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/admin/profiles", headers=ADMIN).json()["perfis"] == []
+
+
+def test_modo_amostragem_gera_stacks_colapsadas(client, monkeypatch):
+    def get_lento(url):
+        time.sleep(0.02)
+        if url.endswith("/posts"):
+            return _RespostaFalsa([{"id": 1, "title": "Post"}])
+        return _RespostaFalsa([{"id": 1}])
+
+    monkeypatch.setattr(requests, "get", get_lento)
+
+    response = client.get(
+        "/users/1/stats",
+        headers={"X-Profile": "segredo", "X-Profile-Mode": "amostragem"},
+    )
+
+    perfil_id = response.headers["X-Profile-Id"]
+    pilhas = client.get(f"/admin/profiles/{perfil_id}", headers=ADMIN).text
+    linhas = pilhas.strip().splitlines()
+    assert linhas
+    for linha in linhas:
+        pilha, amostras = linha.rsplit(" ", 1)
+        assert pilha.startswith("app.main:get_user_stats")
+        assert int(amostras) > 0
+    assert any("get_lento" in linha for linha in linhas)
+
+    formato_errado = client.get(
+        f"/admin/profiles/{perfil_id}",
+        params={"formato": "pstats"},
+        headers=ADMIN,
+    )
+    assert formato_errado.status_code == 400
+
+
+def test_perfis_cprofile_simultaneos_nao_falham(client, monkeypatch):
+    # as duas requisições ficam dentro do endpoint ao mesmo tempo
+    juntas = threading.Barrier(2, timeout=5)
+
+    def get_sincronizado(url):
+        if url.endswith("/posts"):
+            juntas.wait()
+            return _RespostaFalsa([{"id": 1, "title": "Post"}])
+        return _RespostaFalsa([{"id": 1}])
+
+    monkeypatch.setattr(requests, "get", get_sincronizado)
+    respostas = []
+
+    def perfilar():
+        respostas.append(
+            client.get("/users/1/stats", headers={"X-Profile": "segredo"})
+        )
+
+    threads = [threading.Thread(target=perfilar) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in respostas] == [200, 200]
+    modos = sorted(
+        p["modo"]
+        for p in client.get("/admin/profiles", headers=ADMIN).json()["perfis"]
+    )
+    assert modos == ["amostragem", "cprofile"]
+
+
+def test_amostra_uma_a_cada_n_por_rota(client, monkeypatch):
+    monkeypatch.setattr(registro_perfis, "amostra_n", 2)
+
+    for _ in range(4):
+        client.get("/orders/analytics/users/2")
+    client.get("/products/catalog")
+
+    perfis = client.get("/admin/profiles", headers=ADMIN).json()["perfis"]
+    assert [p["rota"] for p in perfis] == [
+        "/orders/analytics/users/{user_id}"
+    ] * 2
+    assert {p["motivo"] for p in perfis} == {"amostra"}
+
+
+def test_buffer_circular_descarta_os_mais_antigos(client, monkeypatch):
+    monkeypatch.setattr(registro_perfis, "capacidade", 2)
+
+    ids = [
+        client.get("/", headers={"X-Profile": "segredo"}).headers[
+            "X-Profile-Id"
+        ]
+        for _ in range(3)
+    ]
+
+    perfis = client.get("/admin/profiles", headers=ADMIN).json()["perfis"]
+    assert [p["id"] for p in perfis] == ids[:0:-1]
+    assert (
+        client.get(f"/admin/profiles/{ids[0]}", headers=ADMIN).status_code
+        == 404
+    )
+
+
+def test_download_exige_token_administrativo(client):
+    assert client.get("/admin/profiles").status_code == 403
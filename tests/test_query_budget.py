@@ -0,0 +1,75 @@
+"""
+Testes do orçamento de execução (progress handler) das rotas vulneráveis
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import sql_injection_endpoints
+from app.database import OrcamentoConsulta
+from app.main import app
+
+# Consulta que levaria vários segundos sem orçamento
+CONSULTA_PESADA = (
+    "1 AND (WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 "
+    "FROM c WHERE x < 100000000) SELECT COUNT(*) FROM c) > 0"
+)
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "rota, parametro",
+    [
+        ("/users/check-vulnerable", "user_id"),
+        ("/products/check-vulnerable", "product_id"),
+    ],
+)
+def test_consulta_pesada_e_interrompida(client, rota, parametro):
+    inicio = time.monotonic()
+    response = client.get(rota, params={parametro: CONSULTA_PESADA})
+    elapsed = time.monotonic() - inicio
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == (
+        "Consulta excedeu o tempo de execução permitido"
+    )
+    assert response.headers["retry-after"] == "1"
+    assert elapsed < 2
+
+
+def test_limite_de_passos_interrompe(client, monkeypatch):
+    monkeypatch.setattr(
+        sql_injection_endpoints,
+        "ORCAMENTO_BUSCA_VULNERAVEL",
+        OrcamentoConsulta(segundos=60, passos=1000, intervalo=100),
+    )
+    payload = (
+        "' OR (WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 "
+        "FROM c WHERE x < 1000000) SELECT COUNT(*) FROM c) > 0 --"
+    )
+
+    response = client.get(
+        "/users/search-vulnerable", params={"username": payload}
+    )
+
+    assert response.status_code == 503
+
+
+def test_consulta_normal_continua_funcionando(client):
+    response = client.get("/users/check-vulnerable?user_id=1 AND 1=1")
+
+    assert response.status_code == 200
+    assert response.json()["usuario_existe"] is True
+
+
+def test_erro_de_sintaxe_continua_sendo_demonstrado(client):
+    response = client.get("/products/check-vulnerable?product_id=1'")
+
+    assert response.status_code == 200
+    assert "erro" in response.json()
@@ -0,0 +1,75 @@
+"""
+Testes do cache de consultas invalidado pela versão do banco
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+from app.query_cache import cache_consultas
+
+
+@pytest.fixture
+def client(banco_temporario):
+    cache_consultas.limpar()
+    return TestClient(app)
+
+
+def test_deve_reutilizar_resultado_em_cache(client):
+    client.get("/products/search-secure?category=Livros")
+    client.get("/products/search-secure?category=Livros")
+
+    stats = cache_consultas.estatisticas()
+    assert stats["faltas"] == 1
+    assert stats["acertos"] == 1
+
+
+def test_escrita_de_outra_conexao_invalida_cache(client, banco_temporario):
+    antes = client.get("/products/search-secure?category=Livros").json()
+
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute(
+            "INSERT INTO products (name, price, category) "
+            "VALUES ('Livro SQL', 80, 'Livros')"
+        )
+    conn.close()
+
+    depois = client.get("/products/search-secure?category=Livros").json()
+    assert depois["total"] == antes["total"] + 1
+
+
+def test_exclusao_invalida_verificacao_de_existencia(client, banco_temporario):
+    assert client.get("/users/check-secure?user_id=5").json()["usuario_existe"]
+
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute("DELETE FROM users WHERE id = 5")
+    conn.close()
+
+    assert not client.get("/users/check-secure?user_id=5").json()[
+        "usuario_existe"
+    ]
+
+
+def test_escrita_do_app_invalida_cache(client):
+    client.get("/products/check-secure?product_id=1")
+    database.registrar_escrita()
+    client.get("/products/check-secure?product_id=1")
+
+    assert cache_consultas.estatisticas()["acertos"] == 0
+
+
+def test_cache_desativado_sempre_consulta_o_banco(client):
+    cache_consultas.ativo = False
+    try:
+        client.get("/products/check-secure?product_id=1")
+        client.get("/products/check-secure?product_id=1")
+    finally:
+        cache_consultas.ativo = True
+
+    assert cache_consultas.estatisticas()["acertos"] == 0
+    assert cache_consultas.estatisticas()["faltas"] == 0
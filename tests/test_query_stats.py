@@ -0,0 +1,130 @@
+"""
+Testes da instrumentação de consultas e do endpoint administrativo
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import query_stats
+from app.database import get_db_connection
+from app.main import app
+from app.query_cache import cache_consultas
+from app.query_stats import estatisticas_consultas, normalizar_consulta
+
+ADMIN = {"X-Admin-Token": "segredo"}
+
+
+@pytest.fixture
+def client(banco_temporario, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "segredo")
+    cache_consultas.limpar()
+    estatisticas_consultas.limpar()
+    return TestClient(app)
+
+
+def _consulta(client, trecho):
+    consultas = client.get("/admin/queries", headers=ADMIN).json()
+    return next(c for c in consultas["consultas"] if trecho in c["consulta"])
+
+
+def test_normaliza_literais():
+    assert normalizar_consulta(
+        "SELECT *  FROM users\n WHERE username = 'a''b' AND id = 10"
+    ) == ("SELECT * FROM users WHERE username = ? AND id = ?")
+
+
+def test_deve_agrupar_consultas_vulneraveis_pela_forma(client):
+    client.get("/users/search-vulnerable?username=admin")
+    client.get("/users/search-vulnerable?username=joao")
+
+    consulta = _consulta(client, "FROM users WHERE username")
+    assert consulta["consulta"] == "SELECT * FROM users WHERE username = ?"
+    assert consulta["contagem"] == 2
+    assert consulta["linhas"] == 2
+    assert consulta["p50_ms"] <= consulta["p99_ms"]
+
+
+def test_deve_contar_erros(client):
+    client.get("/users/search-vulnerable?username='")
+
+    consulta = _consulta(client, "FROM users WHERE username")
+    assert consulta["erros"] == 1
+
+
+def test_deve_registrar_linhas_em_fetchmany_e_fechamento(banco_temporario):
+    estatisticas_consultas.limpar()
+    conn = get_db_connection()
+    cursor = conn.execute("SELECT id FROM products")
+    cursor.fetchmany(3)
+    conn.execute("SELECT COUNT(*) FROM users").fetchone()
+    conn.close()
+
+    resumo = {c["consulta"]: c for c in estatisticas_consultas.resumo()}
+    assert resumo["SELECT id FROM products"]["linhas"] == 3
+    assert resumo["SELECT COUNT(*) FROM users"]["contagem"] == 1
+
+
+def test_consulta_lenta_tem_plano(client, monkeypatch):
+    monkeypatch.setattr(query_stats, "LIMITE_LENTA_MS", 0)
+
+    client.get("/products/search-secure?category=Livros")
+
+    lentas = client.get("/admin/queries/slow", headers=ADMIN).json()
+    lenta = lentas["lentas"][0]
+    assert lenta["parametros"] == ["str(6)"]
+    assert any("idx_products_category" in passo for passo in lenta["plano"])
+
+
+def test_consulta_lenta_nao_guarda_valores(client, monkeypatch):
+    monkeypatch.setattr(query_stats, "LIMITE_LENTA_MS", 0)
+
+    client.get(
+        "/auth/login-secure",
+        params={"username": "joao", "password": "senha123"},
+    )
+    client.get(
+        "/auth/login-vulnerable",
+        params={"username": "joao", "password": "senha123"},
+    )
+
+    lentas = client.get("/admin/queries/slow", headers=ADMIN).text
+    assert "senha123" not in lentas
+    assert "joao" not in lentas
+
+
+def test_consultas_alem_do_limite_somam_em_outras(monkeypatch):
+    monkeypatch.setattr(query_stats, "MAX_CONSULTAS", 2)
+    estatisticas = query_stats.EstatisticasConsultas()
+
+    for tabela in ("a", "b", "c", "d"):
+        estatisticas.registrar(f"SELECT * FROM {tabela}", 0.001, 1)
+
+    resumo = {c["consulta"]: c for c in estatisticas.resumo()}
+    assert set(resumo) == {
+        "SELECT * FROM a",
+        "SELECT * FROM b",
+        query_stats.CONSULTAS_OUTRAS,
+    }
+    assert resumo[query_stats.CONSULTAS_OUTRAS]["contagem"] == 2
+
+
+def test_admin_exige_token(client, monkeypatch):
+    assert client.get("/admin/queries").status_code == 403
+    assert (
+        client.get(
+            "/admin/queries", headers={"X-Admin-Token": "errado"}
+        ).status_code
+        == 403
+    )
+
+    monkeypatch.delenv("ADMIN_TOKEN")
+    assert client.get("/admin/queries", headers=ADMIN).status_code == 403
+
+
+def test_deve_zerar_estatisticas(client):
+    client.get("/products/check-secure?product_id=1")
+    client.delete("/admin/queries", headers=ADMIN)
+
+    assert client.get("/admin/queries", headers=ADMIN).json() == {
+        "consultas": []
+    }
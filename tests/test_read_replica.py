@@ -0,0 +1,120 @@
+"""
+Testes da réplica em memória usada pelas rotas de leitura
+"""
+
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+from app.replica import ReplicaMemoria
+
+
+@pytest.fixture
+def replica(banco_temporario, monkeypatch):
+    replica = ReplicaMemoria(banco_temporario).iniciar()
+    monkeypatch.setattr(database, "replica_leitura", replica)
+    yield replica
+    replica.parar()
+
+
+def _arquivo_da_conexao(conn):
+    """Arquivo do banco 'main' da conexão ('' para banco em memória)"""
+    return conn.execute("PRAGMA database_list").fetchone()["file"]
+
+
+def _inserir_produto(db_path, nome):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO products (name, description, price, stock, "
+            "category) VALUES (?, '', 10.0, 1, 'Replica')",
+            (nome,),
+        )
+    conn.close()
+
+
+def test_leitura_vem_da_memoria_quando_banco_nao_mudou(replica):
+    conn = database.get_read_connection()
+    try:
+        assert _arquivo_da_conexao(conn) == ""
+        total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    finally:
+        conn.close()
+
+    assert total > 0
+    assert replica.leituras_disco == 0
+
+
+def test_conexao_da_replica_e_somente_leitura(replica):
+    conn = database.get_read_connection()
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            conn.execute("DELETE FROM products")
+    finally:
+        conn.close()
+
+
+def test_escrita_no_arquivo_e_vista_e_replica_e_atualizada(
+    replica, banco_temporario
+):
+    _inserir_produto(banco_temporario, "Produto novo da replica")
+
+    # réplica desatualizada: leitura vai para o arquivo
+    conn = database.get_read_connection()
+    try:
+        assert _arquivo_da_conexao(conn) != ""
+        row = conn.execute(
+            "SELECT 1 FROM products WHERE name = ?",
+            ("Produto novo da replica",),
+        ).fetchone()
+    finally:
+        conn.close()
+    assert row is not None
+
+    replica.aguardar()
+    assert replica.atualizacoes == 2
+
+    conn = database.get_read_connection()
+    try:
+        assert _arquivo_da_conexao(conn) == ""
+        row = conn.execute(
+            "SELECT 1 FROM products WHERE name = ?",
+            ("Produto novo da replica",),
+        ).fetchone()
+    finally:
+        conn.close()
+    assert row is not None
+
+
+def test_conexao_aberta_na_copia_antiga_continua_valida(
+    replica, banco_temporario
+):
+    antiga = database.get_read_connection()
+    _inserir_produto(banco_temporario, "Outro produto")
+    database.get_read_connection().close()
+    replica.aguardar()
+
+    try:
+        total = antiga.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    finally:
+        antiga.close()
+    assert total > 0
+
+
+def test_rotas_seguras_respondem_pela_replica(replica):
+    client = TestClient(app)
+
+    response = client.get(
+        "/products/search-secure", params={"category": "Eletrônicos"}
+    )
+    assert response.status_code == 200
+    assert response.json()["total"] > 0
+
+    response = client.get("/users/search-secure", params={"username": "admin"})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+
+    assert replica.leituras_disco == 0
@@ -0,0 +1,84 @@
+"""
+Testes do header Server-Timing (fases da requisição)
+"""
+
+import re
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import timing
+from app.main import app
+
+
+@pytest.fixture
+def client(banco_temporario, monkeypatch):
+    monkeypatch.setattr(timing, "SERVER_TIMING", True)
+    return TestClient(app)
+
+
+class _RespostaFalsa:
+    status_code = 200
+
+    def __init__(self, dados):
+        self._dados = dados
+
+    def json(self):
+        return self._dados
+
+
+def _fases(response):
+    """{fase: duração em ms} do header Server-Timing"""
+    return {
+        nome: float(dur)
+        for nome, dur in re.findall(
+            r"(\w+);dur=([\d.]+)", response.headers["server-timing"]
+        )
+    }
+
+
+def test_separa_api_externa_e_decodificacao(client, monkeypatch):
+    def get_falso(url):
+        if url.endswith("/posts"):
+            return _RespostaFalsa([{"id": 1, "title": "Post"}])
+        return _RespostaFalsa([{"id": 1}])
+
+    monkeypatch.setattr(requests, "get", get_falso)
+
+    fases = _fases(client.get("/users/1/stats"))
+
+    assert {"upstream", "json_decode", "serialize", "total"} <= set(fases)
+    assert not any(fase.startswith("db_") for fase in fases)
+    assert fases["total"] >= fases["upstream"]
+
+
+def test_separa_fases_do_sqlite(client):
+    fases = _fases(
+        client.get("/products/catalog", params={"ordenar": "price"})
+    )
+
+    assert {"db_connect", "db_execute", "db_fetch"} <= set(fases)
+    assert fases["total"] >= fases["db_connect"] + fases["db_execute"]
+
+
+def test_vale_para_rotas_assincronas_e_erros(client):
+    assert "total" in _fases(client.get("/metrics"))
+    assert "total" in _fases(client.get("/rota/que/nao/existe"))
+
+
+def test_desativado_por_padrao(banco_temporario):
+    response = TestClient(app).get("/users/check-secure?user_id=1")
+
+    assert "server-timing" not in response.headers
+    assert re.fullmatch(r"\d+\.\d{3}s", response.json()["tempo_resposta"])
+
+
+def test_formato_do_cabecalho():
+    valor = timing.cabecalho_server_timing(
+        {"db_fetch": 0.0005, "upstream": 0.25, "outra": 1.0}, 0.3
+    )
+
+    assert (
+        valor == "upstream;dur=250.000, db_fetch;dur=0.500, total;dur=300.000"
+    )
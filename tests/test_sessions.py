@@ -0,0 +1,117 @@
+"""
+Testes das sessões emitidas pelo login seguro
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+from app.passwords import servico_senhas
+from app.sessions import CacheSessoes
+
+USUARIO = {"id": 1, "username": "admin", "role": "admin"}
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def _login(client):
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "admin123"},
+    )
+    return response.json()["token"]
+
+
+def _autorizacao(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_token_valido_no_cache_e_pela_assinatura():
+    cache = CacheSessoes(segredo="teste")
+    token, _ = cache.emitir(USUARIO)
+
+    assert cache.validar(token).username == "admin"
+    assert cache.acertos == 1
+
+    # outro processo com a mesma chave (sessão fora do cache)
+    outro = CacheSessoes(segredo="teste")
+    assert outro.validar(token).user_id == 1
+    assert outro.faltas == 1
+
+
+def test_token_adulterado_e_recusado():
+    cache = CacheSessoes(segredo="teste")
+    token, _ = cache.emitir(USUARIO)
+    payload, assinatura = token.split(".")
+
+    assert cache.validar(payload + "." + assinatura[::-1]) is None
+    assert CacheSessoes(segredo="outra").validar(token) is None
+    assert cache.validar("lixo") is None
+
+
+def test_token_expirado_e_recusado():
+    cache = CacheSessoes(segredo="teste", ttl=-1)
+    token, _ = cache.emitir(USUARIO)
+
+    assert cache.validar(token) is None
+    assert cache.validar(token) is None
+
+
+def test_cache_e_limitado_por_lru():
+    cache = CacheSessoes(segredo="teste", max_sessoes=2)
+    tokens = [cache.emitir(USUARIO)[0] for _ in range(3)]
+
+    assert len(cache._sessoes) == 2
+    assert tokens[0] not in cache._sessoes
+    # fora do cache, ainda válido pela assinatura
+    assert cache.validar(tokens[0]) is not None
+
+
+def test_login_emite_token_e_me_nao_consulta_banco(client, monkeypatch):
+    token = _login(client)
+
+    def falhar(*args, **kwargs):
+        raise AssertionError("não deveria consultar o banco nem o hash")
+
+    monkeypatch.setattr(database, "get_read_connection", falhar)
+    monkeypatch.setattr(database, "get_db_connection", falhar)
+    monkeypatch.setattr(servico_senhas, "verificar", falhar)
+
+    response = client.get("/auth/me", headers=_autorizacao(token))
+
+    assert response.status_code == 200
+    usuario = response.json()["usuario"]
+    assert usuario["username"] == "admin"
+    assert usuario["expira_em"] > time.time()
+
+
+def test_me_sem_token_retorna_401(client):
+    response = client.get("/auth/me")
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_logout_revoga_o_token(client):
+    token = _login(client)
+
+    response = client.post("/auth/logout", headers=_autorizacao(token))
+    assert response.status_code == 200
+
+    response = client.get("/auth/me", headers=_autorizacao(token))
+    assert response.status_code == 401
+
+
+def test_login_invalido_nao_emite_token(client):
+    response = client.get(
+        "/auth/login-secure",
+        params={"username": "admin", "password": "errada"},
+    )
+
+    assert "token" not in response.json()
@@ -5,6 +5,7 @@ Aula: Testando Vulnerabilidades - SQL Injection
 Estes testes verificam que os endpoints seguros BLOQUEIAM ataques SQL Injection
 """
 
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -153,9 +154,10 @@ def test_check_user_secure_nonexistent_id():
 
 
 # TESTES: Login Bypass - Endpoint Seguro
+# (em banco temporário: o login válido converte a senha legada em hash)
 
 
-def test_login_secure_blocks_comment_bypass():
+def test_login_secure_blocks_comment_bypass(banco_temporario):
     """Verifica que bypass com comentário SQL é bloqueado"""
     # Ataque: admin' --
     response = client.get(
@@ -169,7 +171,7 @@ def test_login_secure_blocks_comment_bypass():
     assert data["sucesso"] is False
 
 
-def test_login_secure_blocks_or_bypass():
+def test_login_secure_blocks_or_bypass(banco_temporario):
     """Verifica que bypass com OR 1=1 é bloqueado"""
     # Ataque: ' OR '1'='1' --
     response = client.get(
@@ -183,7 +185,7 @@ def test_login_secure_blocks_or_bypass():
     assert data["sucesso"] is False
 
 
-def test_login_secure_valid_credentials():
+def test_login_secure_valid_credentials(banco_temporario):
     """Verifica que login legítimo funciona"""
     response = client.get(
         "/auth/login-secure?username=admin&password=admin123"
@@ -199,7 +201,7 @@ def test_login_secure_valid_credentials():
     assert "password" not in data["usuario"]
 
 
-def test_login_secure_invalid_credentials():
+def test_login_secure_invalid_credentials(banco_temporario):
     """Verifica que credenciais inválidas são rejeitadas"""
     response = client.get(
         "/auth/login-secure?username=admin&password=senha_errada"
@@ -212,7 +214,7 @@ def test_login_secure_invalid_credentials():
     assert data["sucesso"] is False
 
 
-def test_login_secure_nonexistent_user():
+def test_login_secure_nonexistent_user(banco_temporario):
     """Verifica que usuário inexistente é rejeitado"""
     response = client.get(
         "/auth/login-secure?username=usuario_fake&password=qualquer"
@@ -223,3 +225,73 @@ def test_login_secure_nonexistent_user():
 
     # Login deve falhar
     assert data["sucesso"] is False
+
+
+# TESTES: Verificação em lote - Endpoints Seguros
+
+
+def test_check_products_secure_batch_query():
+    """Verifica vários produtos em uma única requisição"""
+    response = client.get("/products/check-secure/batch?ids=1&ids=999&ids=1")
+
+    assert response.status_code == 200
+    data = response.json()
+
+    # IDs repetidos aparecem uma única vez
+    assert data["total"] == 2
+    assert data["produtos"] == {"1": True, "999": False}
+
+
+def test_check_users_secure_batch_post():
+    """Verifica vários usuários enviando os IDs no corpo"""
+    response = client.post(
+        "/users/check-secure/batch", json={"ids": [1, 2, 999]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["usuarios"] == {
+        "1": True,
+        "2": True,
+        "999": False,
+    }
+
+
+def test_check_secure_batch_valida_tipo_e_tamanho():
+    """Verifica que o lote aceita apenas inteiros e tem tamanho máximo"""
+    injecao = client.get("/products/check-secure/batch?ids=1 OR 1=1")
+    vazio = client.post("/users/check-secure/batch", json={"ids": []})
+    grande = client.post(
+        "/users/check-secure/batch", json={"ids": list(range(1001))}
+    )
+
+    assert injecao.status_code == 422
+    assert vazio.status_code == 422
+    assert grande.status_code == 422
+
+
+# TESTES: JSON montado pelo SQLite (caminho rápido)
+
+
+@pytest.mark.parametrize("category", ["Eletrônicos", "Livros", "Inexistente"])
+def test_search_products_secure_json_nativo_igual_ao_padrao(category):
+    """Verifica que o caminho rápido devolve o mesmo conteúdo"""
+    padrao = client.get(
+        f"/products/search-secure?category={category}&json_nativo=false"
+    )
+    nativo = client.get(
+        f"/products/search-secure?category={category}&json_nativo=true"
+    )
+
+    assert nativo.status_code == 200
+    assert nativo.headers["content-type"] == "application/json"
+    assert nativo.json() == padrao.json()
+
+
+def test_search_products_secure_json_nativo_bloqueia_injecao():
+    """Verifica que o caminho rápido também usa prepared statement"""
+    payload = "' UNION SELECT id, username, password, email, null, null"
+    response = client.get(
+        f"/products/search-secure?category={payload}&json_nativo=true"
+    )
+
+    assert response.json() == {"tipo": "SEGURO", "total": 0, "products": []}
@@ -0,0 +1,101 @@
+"""
+Testes das respostas em streaming (NDJSON/CSV)
+"""
+
+import csv
+import io
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.streaming import ler_em_lotes
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+@pytest.fixture
+def muitos_livros(banco_temporario):
+    """Insere mais livros do que cabem em um lote de fetchmany"""
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (name, price, stock, category) "
+            "VALUES (?, ?, ?, 'Livros')",
+            [(f"Livro {i}", 10.0 + i, i) for i in range(2500)],
+        )
+    conn.close()
+    return 2501
+
+
+def test_deve_enviar_ndjson_com_todas_as_linhas(client, muitos_livros):
+    response = client.get("/products/search-secure/stream?category=Livros")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert len(linhas) == muitos_livros
+    assert linhas[0]["name"] == "Livro Python"
+
+
+def test_ndjson_igual_a_busca_padrao(client):
+    padrao = client.get("/products/search-secure?category=Eletrônicos").json()
+    stream = client.get("/products/search-secure/stream?category=Eletrônicos")
+
+    linhas = [json.loads(linha) for linha in stream.text.splitlines()]
+    assert linhas == padrao["products"]
+
+
+def test_deve_exportar_csv_com_cabecalho(client):
+    response = client.get("/products/export?formato=csv")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "produtos.csv" in response.headers["content-disposition"]
+    linhas = list(csv.reader(io.StringIO(response.text)))
+    assert linhas[0] == [
+        "id",
+        "name",
+        "description",
+        "price",
+        "stock",
+        "category",
+    ]
+    assert len(linhas) == 8
+
+
+def test_categoria_vazia_nao_envia_nada(client):
+    response = client.get("/products/export?category=Inexistente")
+
+    assert response.status_code == 200
+    assert response.text == ""
+
+
+def test_deve_ler_em_lotes(banco_temporario):
+    lotes = list(ler_em_lotes("SELECT id FROM products", (), 3))
+
+    assert [len(linhas) for _, linhas in lotes] == [3, 3, 1]
+    assert lotes[0][0] == ["id"]
+
+
+def test_csv_vazio_envia_so_o_cabecalho(client):
+    response = client.get("/products/export?formato=csv&category=Inexistente")
+
+    assert response.status_code == 200
+    linhas = list(csv.reader(io.StringIO(response.text)))
+    assert linhas == [
+        ["id", "name", "description", "price", "stock", "category"]
+    ]
+
+
+def test_consulta_vazia_gera_um_lote_com_as_colunas(banco_temporario):
+    lotes = list(
+        ler_em_lotes("SELECT id, name FROM products WHERE id < 0", (), 3)
+    )
+
+    assert lotes == [(["id", "name"], [])]
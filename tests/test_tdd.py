@@ -11,7 +11,7 @@ Casos de teste:
 
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from app.main import app, resumir_atividade
 
 
 @pytest.fixture
@@ -224,3 +224,30 @@ def test_deve_retornar_estatisticas_diferentes_para_usuarios_diferentes(
 
     assert data2["user_id"] == 2
     assert data2["total_posts"] == 2
+
+
+# 🔴 TESTE 6: Agregação sem I/O
+def test_deve_resumir_atividade_sem_chamadas_externas():
+    """
+    A agregação de get_user_stats funciona só com os dados em memória
+
+    Cenário: Empate no número de comentários fica com o primeiro post
+    """
+    posts = [
+        {"id": 1, "title": "Primeiro"},
+        {"id": 2, "title": "Segundo"},
+        {"id": 3, "title": "Terceiro"},
+    ]
+    comentarios = {1: [{}, {}], 2: [{}, {}], 3: []}
+
+    data = resumir_atividade(7, posts, comentarios)
+
+    assert data["user_id"] == 7
+    assert data["total_posts"] == 3
+    assert data["average_comments_per_post"] == 1.33
+    assert data["most_commented_post"] == {
+        "id": 1,
+        "title": "Primeiro",
+        "comments_count": 2,
+    }
+    assert resumir_atividade(7, [], {})["most_commented_post"]["id"] is None
@@ -0,0 +1,171 @@
+"""
+Testes do tracing em processo (spans, traceparent e /admin/traces)
+"""
+
+import json
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.tracing import Rastreador, Span, rastreador
+
+ADMIN = {"X-Admin-Token": "segredo"}
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PAI_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def client(banco_temporario, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "segredo")
+    monkeypatch.setattr(rastreador, "ativo", True)
+    rastreador.limpar()
+    yield TestClient(app)
+    rastreador.limpar()
+
+
+class _RespostaFalsa:
+    status_code = 200
+
+    def __init__(self, dados):
+        self._dados = dados
+
+    def json(self):
+        return self._dados
+
+
+@pytest.fixture
+def api_externa(monkeypatch):
+    """requests.get falso que guarda os headers enviados"""
+    enviados = []
+
+    def get_falso(url, headers=None):
+        enviados.append((url, headers))
+        if url.endswith("/posts"):
+            return _RespostaFalsa(
+                [{"id": i, "title": "Post"} for i in (1, 2, 3)]
+            )
+        return _RespostaFalsa([{"id": 1}])
+
+    monkeypatch.setattr(requests, "get", get_falso)
+    return enviados
+
+
+def _spans(client, trace_id):
+    response = client.get(f"/admin/traces/{trace_id}", headers=ADMIN)
+    assert response.status_code == 200
+    return response.json()["spans"]
+
+
+def test_span_por_chamada_externa_com_traceparent(client, api_externa):
+    response = client.get("/users/1/stats")
+
+    trace_id = response.headers["X-Trace-Id"]
+    spans = _spans(client, trace_id)
+    raiz = spans[0]
+    assert raiz["nome"] == "GET /users/{user_id}/stats"
+    assert raiz["pai_id"] is None
+    assert raiz["atributos"]["http.status_code"] == 200
+
+    externas = [s for s in spans[1:] if s["nome"].startswith("GET /")]
+    assert [s["nome"] for s in externas] == [
+        "GET /users/1/posts",
+        "GET /posts/1/comments",
+        "GET /posts/2/comments",
+        "GET /posts/3/comments",
+    ]
+    assert {s["pai_id"] for s in spans[1:]} == {raiz["span_id"]}
+    assert [s["nome"] for s in spans].count("serialize") == 1
+
+    for (url, headers), span in zip(api_externa, externas):
+        assert span["atributos"]["url"] == url
+        assert headers["traceparent"] == (
+            f"00-{trace_id}-{span['span_id']}-01"
+        )
+
+
+def test_continua_trace_do_header_traceparent(client, api_externa):
+    response = client.get(
+        "/users/1/stats",
+        headers={"traceparent": f"00-{TRACE_ID}-{PAI_ID}-01"},
+    )
+
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    assert _spans(client, TRACE_ID)[0]["pai_id"] == PAI_ID
+
+
+def test_traceparent_invalido_inicia_novo_trace(client, api_externa):
+    response = client.get(
+        "/users/1/stats", headers={"traceparent": "00-xyz-abc-01"}
+    )
+
+    assert len(response.headers["X-Trace-Id"]) == 32
+    assert response.headers["X-Trace-Id"] != TRACE_ID
+
+
+def test_span_por_statement_sqlite(client):
+    response = client.get("/products/catalog", params={"ordenar": "price"})
+
+    spans = _spans(client, response.headers["X-Trace-Id"])
+    consultas = [s for s in spans if s["nome"] == "sqlite"]
+    assert consultas
+    assert "FROM products" in consultas[0]["atributos"]["consulta"]
+    assert consultas[0]["atributos"]["linhas"] > 0
+
+
+def test_exporta_jsonl(client, api_externa, monkeypatch, tmp_path):
+    arquivo = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(rastreador, "arquivo", str(arquivo))
+
+    trace_id = client.get("/users/1/stats").headers["X-Trace-Id"]
+    rastreador.descarregar()
+
+    linhas = [json.loads(linha) for linha in arquivo.read_text().splitlines()]
+    assert {linha["trace_id"] for linha in linhas} == {trace_id}
+    assert len(linhas) == len(_spans(client, trace_id))
+
+
+def test_arquivo_e_gravado_em_outra_thread_com_um_handle(
+    tmp_path, monkeypatch
+):
+    arquivo = tmp_path / "traces.jsonl"
+    local = Rastreador(ativo=True, capacidade=100, arquivo=str(arquivo))
+    aberturas = []
+    abrir = open
+
+    def contar(*args, **kwargs):
+        aberturas.append(args[0])
+        return abrir(*args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", contar)
+    pai = Span("raiz", "a" * 32, None, 0.0, {})
+
+    for _ in range(20):
+        local.registrar_filho(pai, "sqlite", 0.0, 0.001)
+    local.descarregar()
+
+    assert len(arquivo.read_text().splitlines()) == 20
+    assert aberturas == [str(arquivo)]
+    assert local._escritor.name == "exportador-traces"
+
+
+def test_lista_traces_recentes(client, api_externa):
+    client.get("/")
+    trace_id = client.get("/users/1/stats").headers["X-Trace-Id"]
+
+    traces = client.get("/admin/traces", headers=ADMIN).json()["traces"]
+
+    assert traces[0]["trace_id"] == trace_id
+    assert traces[0]["raiz"] == "GET /users/{user_id}/stats"
+    assert traces[1]["raiz"] == "GET /"
+    assert client.get("/admin/traces/nada", headers=ADMIN).status_code == 404
+
+
+def test_desativado_nao_envia_headers(client, api_externa, monkeypatch):
+    monkeypatch.setattr(rastreador, "ativo", False)
+
+    response = client.get("/users/1/stats")
+
+    assert "X-Trace-Id" not in response.headers
+    assert {headers for _, headers in api_externa} == {None}
@@ -0,0 +1,150 @@
+"""
+Testes do substituto local do JSONPlaceholder (app/upstream_local.py)
+"""
+
+import random
+import sys
+import time
+import types
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from app import main
+from app import upstream_local
+from app.upstream_local import (
+    ConfigUpstream,
+    Latencia,
+    criar_app,
+    gerar_dados,
+)
+
+TAMANHOS = {
+    "usuarios": 3,
+    "posts_por_usuario": 4,
+    "comentarios_por_post": 2,
+    "albuns_por_usuario": 2,
+    "fotos_por_album": 3,
+    "tarefas_por_usuario": 2,
+}
+
+
+@pytest.fixture
+def upstream():
+    return TestClient(criar_app(gerar_dados(**TAMANHOS), ConfigUpstream()))
+
+
+def test_recursos_no_formato_do_jsonplaceholder(upstream):
+    assert len(upstream.get("/users").json()) == 3
+    assert len(upstream.get("/posts").json()) == 12
+    assert set(upstream.get("/posts/1").json()) == {
+        "userId",
+        "id",
+        "title",
+        "body",
+    }
+    assert set(upstream.get("/users/2").json()["address"]) >= {"geo", "city"}
+
+    posts = upstream.get("/users/2/posts").json()
+    assert [p["userId"] for p in posts] == [2] * 4
+    comentarios = upstream.get("/posts/5/comments").json()
+    assert [c["postId"] for c in comentarios] == [5, 5]
+    assert upstream.get("/comments", params={"postId": 5}).json() == (
+        comentarios
+    )
+    fotos = upstream.get("/albums/1/photos").json()
+    assert len(fotos) == 3 and "thumbnailUrl" in fotos[0]
+    assert "completed" in upstream.get("/todos/1").json()
+
+
+def test_inexistentes_retornam_404(upstream):
+    response = upstream.get("/posts/999")
+
+    assert response.status_code == 404
+    assert response.json() == {}
+    assert upstream.get("/nada").status_code == 404
+    assert upstream.get("/users/1/comments").status_code == 404
+    assert upstream.get("/users/999/posts").json() == []
+
+
+def test_injeta_erros_e_latencia(upstream):
+    upstream.put("/_config", json={"taxa_erro": 1, "status_erro": 503})
+    assert upstream.get("/posts/1").status_code == 503
+
+    upstream.put("/_config", json={"taxa_erro": 0, "latencia": "fixa:30"})
+    inicio = time.perf_counter()
+    assert upstream.get("/posts/1").status_code == 200
+    assert time.perf_counter() - inicio >= 0.03
+
+    assert upstream.get("/_config").json()["latencia"] == "fixa:30"
+
+
+def test_corpo_lento_chega_inteiro(upstream):
+    upstream.put(
+        "/_config", json={"taxa_corpo_lento": 1, "corpo_lento_ms": 50}
+    )
+
+    inicio = time.perf_counter()
+    response = upstream.get("/posts")
+
+    assert time.perf_counter() - inicio >= 0.04
+    assert len(response.json()) == 12
+
+
+def test_config_invalida_e_recusada(upstream):
+    assert (
+        upstream.put("/_config", json={"latencia": "normal:1"}).status_code
+        == 422
+    )
+    assert upstream.put("/_config", json={"taxa_erro": 2}).status_code == 422
+
+
+@pytest.mark.parametrize(
+    "texto", ["fixa:5", "uniforme:1:5", "exponencial:3", "lognormal:3:0.5"]
+)
+def test_distribuicoes_de_latencia(texto):
+    latencia = Latencia(texto)
+    rng = random.Random(1)
+
+    amostras = [latencia.sortear(rng) for _ in range(200)]
+
+    assert all(amostra >= 0 for amostra in amostras)
+    assert 0.001 < sum(amostras) / len(amostras) < 0.01
+
+
+@pytest.mark.parametrize("texto", ["fixa", "uniforme:1", "fixa:-1", "x:1"])
+def test_latencia_invalida(texto):
+    with pytest.raises(ValueError):
+        Latencia(texto)
+
+
+def test_app_principal_usa_o_substituto(upstream, monkeypatch):
+    def get_local(url, **kwargs):
+        return upstream.get(url.removeprefix(main.BASE_URL), **kwargs)
+
+    monkeypatch.setattr(requests, "get", get_local)
+    client = TestClient(main.app)
+
+    stats = client.get("/users/1/stats").json()
+
+    assert stats["total_posts"] == 4
+    assert stats["average_comments_per_post"] == 2
+    assert client.get("/posts", params={"limit": 3}).status_code == 200
+    assert len(client.get("/albums/2/photos").json()) == 3
+
+
+@pytest.mark.parametrize("argv, esperado", [([], 42), (["--seed", "7"], 7)])
+def test_linha_de_comando_respeita_upstream_seed(monkeypatch, argv, esperado):
+    iniciados = []
+    uvicorn = types.SimpleNamespace(
+        run=lambda app, **kwargs: iniciados.append(app)
+    )
+    monkeypatch.setitem(sys.modules, "uvicorn", uvicorn)
+    monkeypatch.setenv("UPSTREAM_SEED", "42")
+    monkeypatch.setattr(sys, "argv", ["upstream_local", *argv])
+
+    upstream_local.main()
+
+    (upstream,) = iniciados
+    assert upstream.state.rng.random() == random.Random(esperado).random()
@@ -0,0 +1,160 @@
+"""
+Testes do índice de usuários em memória (login e busca por username)
+"""
+
+import sqlite3
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+from app.passwords import SenhaLegada
+from app.user_index import IndiceUsuarios, indice_usuarios
+
+
+@pytest.fixture
+def client(banco_temporario):
+    return TestClient(app)
+
+
+def _usernames(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT username FROM users").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def test_registro_nao_guarda_senha_em_texto(banco_temporario):
+    indice = IndiceUsuarios()
+    registro = indice.buscar("admin")
+
+    assert not hasattr(registro, "__dict__")
+    assert not hasattr(registro, "password")
+    assert isinstance(registro.credencial, SenhaLegada)
+    assert b"admin123" not in registro.credencial.digest
+    assert "password" not in registro.como_dict()
+
+
+def test_busca_pelo_indice_igual_a_busca_no_banco(
+    client, banco_temporario, monkeypatch
+):
+    nomes = _usernames(banco_temporario) + ["inexistente", "ADMIN", "admin "]
+
+    def buscar_todos():
+        return [
+            client.get(
+                "/users/search-secure", params={"username": nome}
+            ).json()
+            for nome in nomes
+        ]
+
+    pelo_indice = buscar_todos()
+    monkeypatch.setattr(indice_usuarios, "ativo", False)
+    pelo_banco = buscar_todos()
+
+    assert pelo_indice == pelo_banco
+    assert all("password" not in u for r in pelo_indice for u in r["users"])
+
+
+@pytest.mark.parametrize(
+    "username,password",
+    [
+        ("admin", "admin123"),
+        ("admin", "errada"),
+        ("admin", "ADMIN123"),
+        ("inexistente", "admin123"),
+    ],
+)
+def test_login_pelo_indice_igual_ao_login_no_banco(
+    client, monkeypatch, username, password
+):
+    params = {"username": username, "password": password}
+
+    pelo_indice = client.get("/auth/login-secure", params=params).json()
+    monkeypatch.setattr(indice_usuarios, "ativo", False)
+    pelo_banco = client.get("/auth/login-secure", params=params).json()
+
+    # cada login emite uma sessão nova
+    for resposta in (pelo_indice, pelo_banco):
+        resposta.pop("token", None)
+        resposta.pop("expira_em", None)
+    assert pelo_indice == pelo_banco
+
+
+def test_indice_e_recarregado_apos_escrita(client, banco_temporario):
+    client.get("/users/search-secure", params={"username": "admin"})
+
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute(
+            "UPDATE users SET password = 'nova' WHERE username = 'admin'"
+        )
+        conn.execute(
+            "INSERT INTO users (username, password, email) "
+            "VALUES ('novato', 'x', 'novato@example.com')"
+        )
+    conn.close()
+
+    login = client.get(
+        "/auth/login-secure", params={"username": "admin", "password": "nova"}
+    )
+    busca = client.get("/users/search-secure", params={"username": "novato"})
+
+    assert login.json()["sucesso"] is True
+    assert busca.json()["total"] == 1
+
+
+def test_indice_nao_consulta_o_banco_sem_escritas(client, monkeypatch):
+    client.get("/users/search-secure", params={"username": "admin"})
+
+    def falhar(*args, **kwargs):
+        raise AssertionError("não deveria abrir conexão")
+
+    monkeypatch.setattr(database, "get_read_connection", falhar)
+    monkeypatch.setattr(database, "get_db_connection", falhar)
+
+    response = client.get(
+        "/auth/login-secure", params={"username": "admin", "password": "x"}
+    )
+    assert response.status_code == 200
+    assert response.json()["sucesso"] is False
+
+
+def test_escrita_em_pedidos_nao_recarrega_o_indice(client):
+    client.get("/users/search-secure", params={"username": "admin"})
+    antes = indice_usuarios.carregamentos
+
+    pedido = client.post(
+        "/orders", json={"user_id": 2, "product_id": 1, "quantity": 1}
+    )
+    busca = client.get("/users/search-secure", params={"username": "admin"})
+
+    assert pedido.status_code == 201
+    assert busca.json()["total"] == 1
+    assert indice_usuarios.carregamentos == antes
+
+
+def test_buscas_esperam_a_recarga_apos_escrita_em_users(banco_temporario):
+    indice = IndiceUsuarios()
+    indice.buscar("admin")
+
+    conn = sqlite3.connect(banco_temporario)
+    with conn:
+        conn.execute("UPDATE users SET active = 0 WHERE username = 'admin'")
+    conn.close()
+
+    # outra thread recarregando: a busca espera por ela
+    resultado = []
+    with indice._recarga:
+        thread = threading.Thread(
+            target=lambda: resultado.append(indice.buscar("admin"))
+        )
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+    thread.join()
+
+    assert resultado[0].active == 0
+    assert indice.carregamentos == 2